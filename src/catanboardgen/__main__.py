@@ -1,4 +1,18 @@
-from catanboardgen.app import main
+import sys
+
+
+def main():
+    # "generate" runs the command line generator, which does not need toga,
+    # anything else starts the app
+    if sys.argv[1:2] == ["generate"]:
+        from catanboardgen.cli import main as cli_main
+
+        return cli_main(sys.argv[1:])
+
+    from catanboardgen.app import main as app_main
+
+    app_main().main_loop()
+
 
 if __name__ == "__main__":
-    main().main_loop()
+    sys.exit(main())
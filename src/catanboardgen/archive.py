@@ -0,0 +1,318 @@
+"""
+On-disk archive of boards, with fixed-width records read through mmap
+
+An archive holds boards of one layout (3-4 or 5-6 players). The file starts
+with a header: magic, version, More_players flag, number of tiles, number of
+records, then the (x, y) coordinates of the tiles. Then come the records,
+one per board: one byte with the options flags (in the order of
+DEFAULT_OPTIONS), then one byte per tile, holding the ressource code in the
+high nibble and the number in the low nibble.
+
+Next to the archive, a small index file maps the options flags, and the pip
+spread of the boards, to the sorted indices of the matching records, so a
+query never scans the archive.
+"""
+
+import mmap
+import random as r
+import struct
+from array import array
+
+from catanboardgen.codes import OPTION_NAMES
+from catanboardgen.generator import DESERT, BoardGenerator
+
+
+MAGIC = b"CATB"
+INDEX_MAGIC = b"CATI"
+VERSION = 1
+
+# magic, version, More_players, padding, number of tiles, number of records
+HEADER = struct.Struct("<4sHBxHQ")
+# kind of index, key, offset of the indices, number of indices
+INDEX_ENTRY = struct.Struct("<BHQQ")
+
+# kinds of index
+BY_OPTIONS = 0
+BY_PIP_SPREAD = 1
+
+
+def options_to_flags(options):
+    return sum(bool(options[name]) << i for i, name in enumerate(OPTION_NAMES))
+
+
+def flags_to_options(flags):
+    return {name: bool(flags >> i & 1) for i, name in enumerate(OPTION_NAMES)}
+
+
+def pip_spread(ressources, numbers):
+    """Difference of pips between the richest and the poorest ressource.
+
+    The pips of a number are the number of ways to roll it with two dice,
+    a simple balance metric: 0 means all ressources produce as much.
+    """
+    pips = [0] * DESERT
+    for res, num in zip(ressources, numbers):
+        if res != DESERT:
+            pips[res] += 6 - abs(7 - num)
+    return max(pips) - min(pips)
+
+
+class ArchiveWriter:
+    """Write boards to an archive, and its index when closed.
+
+    To be used as a context manager:
+
+        with ArchiveWriter("boards.catb", more_players=False) as writer:
+            writer.write_many(boards)
+    """
+
+    def __init__(self, path, more_players=False):
+        self.path = path
+        self.more_players = bool(more_players)
+        self.generator = BoardGenerator({"More_players": self.more_players})
+        self.nb_tiles = len(self.generator.tile_centers)
+        self.nb_records = 0
+
+        # record indices for each key of each index
+        self.indices = {BY_OPTIONS: {}, BY_PIP_SPREAD: {}}
+
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.more_players, self.nb_tiles, 0))
+        self.file.write(
+            struct.pack(f"<{2 * self.nb_tiles}b", *sum(self.generator.tile_centers, ()))
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_to_index(self, kind, key, idx):
+        self.indices[kind].setdefault(key, array("I")).append(idx)
+
+    def write(self, board):
+        more_players = bool(board.options["More_players"])
+        if more_players != self.more_players or not board.layout.is_standard(more_players):
+            raise ValueError("Board does not match the layout of the archive")
+
+        ressources = [self.generator.ressource_list.index(res) for res in board.deck]
+        self.write_codes(board.options, ressources, board.numbers_deck)
+
+    def write_many(self, boards):
+        for board in boards:
+            self.write(board)
+
+    def write_codes(self, options, ressources, numbers):
+        if len(ressources) != self.nb_tiles or len(numbers) != self.nb_tiles:
+            raise ValueError(f"Archive records need {self.nb_tiles} tiles")
+        flags = options_to_flags(options)
+        self.file.write(
+            bytes([flags] + [res << 4 | num for res, num in zip(ressources, numbers)])
+        )
+        self.add_to_index(BY_OPTIONS, flags, self.nb_records)
+        self.add_to_index(BY_PIP_SPREAD, pip_spread(ressources, numbers), self.nb_records)
+        self.nb_records += 1
+
+    def write_arrays(self, options, ressources, numbers):
+        """Write a batch of boards given as (N, tiles) arrays, see batch.py."""
+        import numpy as np
+
+        if ressources.shape[1:] != (self.nb_tiles,) or numbers.shape != ressources.shape:
+            raise ValueError(f"Archive records need {self.nb_tiles} tiles")
+        flags = options_to_flags(options)
+        n = len(ressources)
+        records = np.empty((n, 1 + self.nb_tiles), dtype=np.uint8)
+        records[:, 0] = flags
+        records[:, 1:] = ressources.astype(np.uint8) << 4 | numbers.astype(np.uint8)
+        self.file.write(records.tobytes())
+
+        # pips of each ressource of each board
+        pips = np.where(ressources == DESERT, 0, 6 - np.abs(7 - numbers.astype(int)))
+        idx = np.arange(n)[:, None] * 6 + ressources
+        pips = np.bincount(idx.ravel(), pips.ravel(), minlength=6 * n).reshape(n, 6)
+        spreads = pips[:, :DESERT].max(1) - pips[:, :DESERT].min(1)
+
+        self.indices[BY_OPTIONS].setdefault(flags, array("I")).extend(
+            range(self.nb_records, self.nb_records + n)
+        )
+        for i, spread in enumerate(spreads.astype(int).tolist()):
+            self.add_to_index(BY_PIP_SPREAD, spread, self.nb_records + i)
+        self.nb_records += n
+
+    def close(self):
+        if self.file.closed:
+            return
+
+        # write the number of records in the header
+        self.file.seek(0)
+        self.file.write(
+            HEADER.pack(MAGIC, VERSION, self.more_players, self.nb_tiles, self.nb_records)
+        )
+        self.file.close()
+
+        # write the index: a table of entries, then the arrays of indices
+        entries = [
+            (kind, key, indices)
+            for kind in sorted(self.indices)
+            for key, indices in sorted(self.indices[kind].items())
+        ]
+        offset = len(INDEX_MAGIC) + 4 + INDEX_ENTRY.size * len(entries)
+        with open(self.path + ".idx", "wb") as f:
+            f.write(INDEX_MAGIC)
+            f.write(struct.pack("<I", len(entries)))
+            for kind, key, indices in entries:
+                f.write(INDEX_ENTRY.pack(kind, key, offset, len(indices)))
+                offset += indices.itemsize * len(indices)
+            for kind, key, indices in entries:
+                f.write(indices.tobytes())
+
+
+class BoardArchive:
+    """Read-only access to an archive, without loading it in memory.
+
+    Records are read from the memory mapped file, so opening an archive is
+    instantaneous and reading any record is O(1).
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(path, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, more_players, self.nb_tiles, self.nb_records = HEADER.unpack_from(
+            self.mmap
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a board archive")
+
+        self.more_players = bool(more_players)
+        coords = struct.unpack_from(f"<{2 * self.nb_tiles}b", self.mmap, HEADER.size)
+        self.tile_centers = list(zip(coords[::2], coords[1::2]))
+        self.offset = HEADER.size + 2 * self.nb_tiles
+        self.record_size = 1 + self.nb_tiles
+
+        with open(path + ".idx", "rb") as f:
+            self.index_mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.index_mmap[: len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise ValueError(f"{path}.idx is not a board archive index")
+        (nb_entries,) = struct.unpack_from("<I", self.index_mmap, len(INDEX_MAGIC))
+
+        # (offset, count) of the indices of each key of each index
+        self.indices = {BY_OPTIONS: {}, BY_PIP_SPREAD: {}}
+        for i in range(nb_entries):
+            kind, key, offset, count = INDEX_ENTRY.unpack_from(
+                self.index_mmap, len(INDEX_MAGIC) + 4 + i * INDEX_ENTRY.size
+            )
+            self.indices[kind][key] = (offset, count)
+
+        self.generators = {}
+
+    def __len__(self):
+        return self.nb_records
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.mmap.close()
+        self.index_mmap.close()
+
+    def record(self, i):
+        """Raw bytes of the i-th record, as a view on the file."""
+        if not 0 <= i < self.nb_records:
+            raise IndexError("record index out of range")
+        start = self.offset + i * self.record_size
+        return memoryview(self.mmap)[start : start + self.record_size]
+
+    def codes(self, i):
+        """Options, ressource codes and numbers of the i-th board."""
+        record = self.record(i)
+        options = flags_to_options(record[0])
+        ressources = [b >> 4 for b in record[1:]]
+        numbers = [b & 15 for b in record[1:]]
+        record.release()
+        return options, ressources, numbers
+
+    def __getitem__(self, i):
+        options, ressources, numbers = self.codes(i)
+        flags = options_to_flags(options)
+        if flags not in self.generators:
+            self.generators[flags] = BoardGenerator(options)
+        return self.generators[flags].make_board(ressources, numbers)
+
+    def as_array(self):
+        """The records as a NumPy memmap of shape (boards, 1 + tiles)."""
+        import numpy as np
+
+        return np.memmap(
+            self.path,
+            dtype=np.uint8,
+            mode="r",
+            offset=self.offset,
+            shape=(self.nb_records, self.record_size),
+        )
+
+    def index(self, kind, key):
+        """Sorted indices of the records with the given key, as a view."""
+        if key not in self.indices[kind]:
+            return memoryview(array("I"))
+        offset, count = self.indices[kind][key]
+        return memoryview(self.index_mmap)[offset : offset + 4 * count].cast("I")
+
+    def matching_indices(self, options=None, max_pip_spread=None):
+        """Views on the indices of the records matching all criteria.
+
+        options can be partial, e.g. {"Number_repeats": True}. Without
+        max_pip_spread, the views are on the options index; with it, on the
+        pip spread index, filtered by options.
+        """
+        flags = [
+            key
+            for key in self.indices[BY_OPTIONS]
+            if options is None
+            or all(
+                flags_to_options(key)[name] == bool(value)
+                for name, value in options.items()
+            )
+        ]
+        if max_pip_spread is None:
+            return [self.index(BY_OPTIONS, key) for key in flags]
+
+        if len(flags) == len(self.indices[BY_OPTIONS]):
+            return [
+                self.index(BY_PIP_SPREAD, key)
+                for key in self.indices[BY_PIP_SPREAD]
+                if key <= max_pip_spread
+            ]
+
+        # combine both indices: keep the boards with matching options
+        flags = set(flags)
+        return [
+            array(
+                "I",
+                [
+                    i
+                    for i in self.index(BY_PIP_SPREAD, key)
+                    if self.mmap[self.offset + i * self.record_size] in flags
+                ],
+            )
+            for key in self.indices[BY_PIP_SPREAD]
+            if key <= max_pip_spread
+        ]
+
+    def random_board(self, options=None, max_pip_spread=None, rng=r):
+        """A random board matching the criteria, or None if there is none."""
+        indices = self.matching_indices(options, max_pip_spread)
+        total = sum(len(idx) for idx in indices)
+        if total == 0:
+            return None
+
+        k = rng.randrange(total)
+        for idx in indices:
+            if k < len(idx):
+                return self[idx[k]]
+            k -= len(idx)
@@ -0,0 +1,308 @@
+"""
+Generate and check many boards at once, stored as NumPy arrays
+
+A batch of N boards is a pair of (N, tiles) int8 arrays: the ressource code
+of each tile (its index in BoardGenerator.ressource_list) and its number.
+"""
+
+import numpy as np
+
+from catanboardgen.generator import BoardGenerator, DESERT, MAX_SAME_NEIGHBOURS
+
+
+# the numbers on the tokens, the index in this array is used as number code
+NUMBERS = np.array([2, 3, 4, 5, 6, 8, 9, 10, 11, 12])
+CODE_6, CODE_8 = 4, 5
+
+# upper triangular matrices of ones, to cumulate the weights of the options
+# of the ressources and of the numbers, see BatchGenerator.draw
+TRIANGULAR = {k: np.triu(np.ones((k, k))) for k in (6, len(NUMBERS))}
+
+
+class BatchGenerator:
+    """Generate boards by batches of NumPy arrays.
+
+    Each batch fills all the tiles of all its boards at once, one tile at a
+    time, drawing every tile among the ressources (and numbers) left in the
+    deck that do not break the rules with the tiles already placed. Rows
+    running out of options are dropped as soon as they do, and the
+    vectorized check_* methods are run on the full batch so only valid
+    boards are kept. Invalid rows are replaced by sampling new batches.
+
+    With all the options, about 11% of the rows of a 3-4 player batch, and
+    6% of a 5-6 player one, are complete boards; the rest run out of
+    options on the way. This gives about 15 000 boards per second for 3-4
+    players (10 times BoardGenerator) and 4 000 for 5-6 players (5 times).
+    """
+
+    def __init__(self, options=None, seed=None, batch_size=4096):
+        self.generator = BoardGenerator(options)
+        self.options = self.generator.options
+        self.rng = np.random.default_rng(seed)
+        self.batch_size = batch_size
+
+        nb_tiles = len(self.generator.tile_centers)
+
+        # neighbours of each tile, padded with nb_tiles, which points to
+        # an extra column of the board arrays never matching anything
+        self.neighbours = np.full((nb_tiles, 6), nb_tiles)
+        for i, neighbours in enumerate(self.generator.tile_neighbours):
+            self.neighbours[i, : len(neighbours)] = neighbours
+
+        # the neighbours already filled when filling tiles in order
+        self.previous_neighbours = [
+            np.array([j for j in neighbours if j < i], dtype=int)
+            for i, neighbours in enumerate(self.generator.tile_neighbours)
+        ]
+
+        self.port_neighbours = np.full((len(self.generator.ports), 6), nb_tiles)
+        for i, neighbours in enumerate(self.generator.port_neighbours):
+            self.port_neighbours[i, : len(neighbours)] = neighbours
+        self.port_ressources = np.array(
+            [
+                self.generator.ressource_list.index(p[2])
+                if p[2] in self.generator.ressource_list
+                else -1
+                for p in self.generator.ports
+            ]
+        )
+
+        # ressources each tile may not get, because of the ports
+        self.port_excluded = np.zeros((nb_tiles, 6), dtype=bool)
+        if self.options["Balanced_ports"]:
+            for res, neighbours in zip(
+                self.port_ressources, self.generator.port_neighbours
+            ):
+                if res >= 0:
+                    self.port_excluded[neighbours, res] = True
+
+        self.max_same_neighbours = np.array(MAX_SAME_NEIGHBOURS)
+        self.res_counts = np.array(self.generator.res_counts, dtype=float)
+        self.num_counts = np.array(self.generator.num_counts, dtype=float)[NUMBERS]
+
+    def generate(self, n):
+        """Return n valid boards, as (ressources, numbers) arrays."""
+        empty = np.empty((0, len(self.generator.tile_centers)), dtype=np.int8)
+        ressources, numbers = [empty], [empty]
+        nb_valid = 0
+        while nb_valid < n:
+            res, nums = self.sample(self.batch_size)
+            valid = self.valid_rows(res, nums)
+            ressources.append(res[valid])
+            numbers.append(nums[valid])
+            nb_valid += valid.sum()
+
+        return (
+            np.concatenate(ressources)[:n],
+            np.concatenate(numbers)[:n],
+        )
+
+    def to_boards(self, ressources, numbers):
+        """Convert arrays of boards to a list of Board objects."""
+        return [
+            self.generator.make_board(res_row, num_row)
+            for (res_row, num_row) in zip(ressources, numbers)
+        ]
+
+    def sample(self, n):
+        """Fill n boards, which can still break the rules checked at the end.
+
+        Only the boards that did not run out of options are returned, so
+        there can be less than n of them.
+        """
+        return self.sample_numbers(self.sample_ressources(n))
+
+    def sample_ressources(self, n):
+        nb_tiles = len(self.generator.tile_centers)
+
+        # extra column for the padding of the neighbours
+        res = np.full((n, nb_tiles + 1), -1, dtype=np.int8)
+        # number of neighbours with the same ressource
+        same = np.zeros((n, nb_tiles + 1), dtype=np.int8)
+        counts = np.tile(self.res_counts, (n, 1))
+
+        for i in range(nb_tiles):
+            allowed = (counts > 0) & ~self.port_excluded[i]
+
+            if self.options["Ressource_clusters"]:
+                prev = self.previous_neighbours[i]
+                is_res = res[:, prev, None] == np.arange(6)
+                # not too many neighbours of the same ressource for the tile,
+                # nor for the neighbours which would get one more
+                allowed &= is_res.sum(1) <= self.max_same_neighbours
+                allowed &= ~(
+                    is_res
+                    & (same[:, prev, None] >= self.max_same_neighbours)
+                ).any(1)
+
+            choice, has_options = self.draw(counts * allowed)
+
+            # rows out of options are dropped at once, so the next tiles are
+            # only filled for the boards that can still be completed
+            if not has_options.all():
+                res, same, counts = res[has_options], same[has_options], counts[has_options]
+                choice = choice[has_options]
+
+            res[:, i] = choice
+            counts[np.arange(len(res)), choice] -= 1
+            for j in self.previous_neighbours[i]:
+                is_same = res[:, j] == choice
+                same[:, j] += is_same
+                same[:, i] += is_same
+
+        return res[:, :nb_tiles]
+
+    def sample_numbers(self, ressources):
+        """Numbers of the boards of ressources, as (ressources, numbers) of
+        the boards that did not run out of options."""
+        n, nb_tiles = ressources.shape
+        more_players = self.options["More_players"]
+        repeats_rule = self.options["Number_repeats"]
+
+        # numbers are filled as codes, index in NUMBERS, -1 for the desert
+        nums = np.full((n, nb_tiles + 1), -1, dtype=np.int8)
+        counts = np.tile(self.num_counts, (n, 1))
+        # how many of each number each ressource has, and its repeats
+        res_nums = np.zeros((n, 6, len(NUMBERS)), dtype=np.int8)
+        repeats = np.zeros((n, 6), dtype=np.int8)
+
+        # for 5-6 players, tiles of each ressource left to fill, so the last
+        # one of a ressource without a 6 or an 8 gets one
+        six_eight_needed = more_players and repeats_rule
+        if six_eight_needed:
+            left = (ressources[:, :, None] == np.arange(6)).sum(1)
+
+        is_68 = np.zeros(len(NUMBERS), dtype=bool)
+        is_68[[CODE_6, CODE_8]] = True
+
+        for i in range(nb_tiles):
+            rows = np.arange(len(ressources))
+            desert = ressources[:, i] == DESERT
+            allowed = counts > 0
+
+            if self.options["Number_clusters"]:
+                prev_nums = nums[:, self.previous_neighbours[i]]
+                is_num = prev_nums[:, :, None] == np.arange(len(NUMBERS))
+                allowed &= ~is_num.any(1)
+                # no 6 or 8 next to a 6 or an 8
+                allowed &= ~(is_68 & is_num[:, :, is_68].any((1, 2))[:, None])
+
+            if repeats_rule:
+                res = np.where(desert, 0, ressources[:, i])
+                taken = res_nums[rows, res]
+                if more_players:
+                    # one repeat per ressource, never twice a 6 or an 8
+                    allowed &= (taken == 0) | (
+                        (repeats[rows, res] == 0)[:, None] & (taken == 1) & ~is_68
+                    )
+                    # and at least one of them
+                    last = (left[rows, res] == 1) & ~taken[:, is_68].any(1)
+                    allowed &= ~last[:, None] | is_68
+                    left[rows, res] -= ~desert
+                else:
+                    allowed &= taken == 0
+                    # at most one of either 6 or 8
+                    has_68 = taken[:, is_68].any(1)
+                    allowed &= ~(is_68 & has_68[:, None])
+
+            choice, has_options = self.draw(counts * allowed)
+
+            # rows out of options are dropped, as for the ressources
+            kept = has_options | desert
+            if not kept.all():
+                ressources, nums, counts = ressources[kept], nums[kept], counts[kept]
+                res_nums, repeats = res_nums[kept], repeats[kept]
+                if six_eight_needed:
+                    left = left[kept]
+                choice, desert = choice[kept], desert[kept]
+
+            choice = np.where(desert, -1, choice)
+            nums[:, i] = choice
+            placed = np.flatnonzero(~desert)
+            counts[placed, choice[placed]] -= 1
+            res = ressources[placed, i]
+            repeats[placed, res] += res_nums[placed, res, choice[placed]] > 0
+            res_nums[placed, res, choice[placed]] += 1
+
+        nums = nums[:, :nb_tiles]
+        return ressources, np.where(nums < 0, 7, NUMBERS[nums]).astype(np.int8)
+
+    def draw(self, weights):
+        # draw one option per row, proportionally to the weights: the number
+        # of copies left in the deck of the allowed options. The weights are
+        # cumulated by a product with a triangular matrix of ones, as cumsum
+        # is slow on rows this short, so the counts are kept as floats
+        cumulated = weights @ TRIANGULAR[weights.shape[1]]
+        total = cumulated[:, -1]
+        u = self.rng.random(len(weights)) * total
+        choice = (cumulated > u[:, None]).argmax(1)
+        return choice, total > 0
+
+    def valid_rows(self, ressources, numbers):
+        """Boards of the batch that follow all the rules set in the options."""
+        valid = np.ones(len(ressources), dtype=bool)
+        if self.options["Ressource_clusters"]:
+            valid &= self.check_ressource_clusters(ressources).all(1)
+        if self.options["Balanced_ports"]:
+            valid &= self.check_ports(ressources).all(1)
+        if self.options["Number_clusters"]:
+            valid &= self.check_number_clusters(numbers).all(1)
+        if self.options["Number_repeats"]:
+            valid &= self.check_number_repeats(ressources, numbers).all(1)
+        return valid
+
+    def padded_neighbours(self, boards, neighbours, pad):
+        # values of the neighbours of each tile (or port), for each board
+        padded = np.concatenate(
+            [boards, np.full((len(boards), 1), pad, dtype=boards.dtype)], axis=1
+        )
+        return padded[:, neighbours]
+
+    def ressource_neighbours(self, ressources):
+        nb = self.padded_neighbours(ressources, self.neighbours, 6)
+        return (nb == ressources[:, :, None]).sum(2)
+
+    def check_ressource_clusters(self, ressources):
+        return self.ressource_neighbours(ressources) <= self.max_same_neighbours[
+            ressources
+        ]
+
+    def check_ports(self, ressources):
+        nb = self.padded_neighbours(ressources, self.port_neighbours, 6)
+        return ~(nb == self.port_ressources[:, None]).any(2)
+
+    def check_number_clusters(self, numbers):
+        nb = self.padded_neighbours(numbers, self.neighbours, 0)
+        # check that no same numbers are touching
+        valid = ~(nb == numbers[:, :, None]).any(2)
+
+        # check that no 6 and 8 are adjacent
+        is_68 = (numbers == 6) | (numbers == 8)
+        nb_68 = ((nb == 6) | (nb == 8)).any(2)
+        return valid & ~(is_68 & nb_68)
+
+    def check_number_repeats(self, ressources, numbers):
+        n = len(ressources)
+
+        # count of each number (0 to 12) for each ressource of each board
+        idx = (np.arange(n)[:, None] * 6 + ressources) * 13 + numbers
+        counts = np.bincount(idx.ravel(), minlength=n * 6 * 13).reshape(n, 6, 13)
+        counts = counts[:, :DESERT]
+
+        # For all ressources (except desert), check that there is no repeat
+        # For 5/6 players, at most one repeat
+        repeats = np.maximum(counts - 1, 0).sum(2)
+        valid = repeats <= 1 * self.options["More_players"]
+
+        # Conditions for 6 and 8
+        count_6, count_8 = counts[:, :, 6], counts[:, :, 8]
+
+        # there can only be at most one of either for 3-4 player boards,
+        if not self.options["More_players"]:
+            valid &= count_6 + count_8 <= 1
+
+        # and at least one, or both (but not twice the same) for 5-6 player boards
+        else:
+            valid &= (count_6 + count_8 >= 1) & (count_6 <= 1) & (count_8 <= 1)
+
+        return valid
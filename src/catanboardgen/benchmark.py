@@ -0,0 +1,341 @@
+"""
+Benchmark of the generator, for all the options combinations
+
+Run it with:
+
+    python -m catanboardgen.benchmark --boards 200 --output bench.json
+
+The More_players flag picks the layout, so the 32 combinations of the five
+options cover both the 19-tile and the 30-tile boards. For each one, the
+results give the boards per second, the latency percentiles per board, the
+restarts of the solver per board, and the peak memory of the generation.
+Passing --compare with the JSON of a previous run reports the combinations
+that got slower.
+
+--engine swap benchmarks the local search instead of the wave function
+collapse, and giving both (--engine wfc --engine swap) adds the fastest
+engine of each combination to the results.
+
+The results also give the startup times, measured in new processes: the
+import of the generator, its first board, and the import of the GUI of the
+app (when toga is installed). --compare reports the ones that got slower
+too, and the run fails if importing the generator or catanboardgen.app
+imports toga. --startup-only skips the boards.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from catanboardgen.generator import DEFAULT_OPTIONS, ENGINES, BoardGenerator
+from catanboardgen.stats import SolverStats
+
+
+def all_options():
+    """The 32 combinations of the options, as option dicts."""
+    return [
+        dict(zip(DEFAULT_OPTIONS, flags))
+        for flags in itertools.product([False, True], repeat=len(DEFAULT_OPTIONS))
+    ]
+
+
+# run in a new process: the times (in ms) to import the generator and to
+# generate its first board, and whether it (or the module of the app entry
+# point) imported toga
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from catanboardgen.generator import BoardGenerator
+imported = time.perf_counter()
+BoardGenerator().generate()
+generated = time.perf_counter()
+import catanboardgen.app
+print(json.dumps({
+    "import_ms": 1000 * (imported - start),
+    "first_board_ms": 1000 * (generated - imported),
+    "gui_imported": "toga" in sys.modules,
+}))
+"""
+
+APP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+try:
+    import catanboardgen.gui
+except ImportError:
+    print("null")
+else:
+    print(json.dumps(1000 * (time.perf_counter() - start)))
+"""
+
+
+def percentile(sorted_values, p):
+    # nearest rank percentile
+    k = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def benchmark_options(options, boards=100, seed=0, memory_boards=10, engine="wfc"):
+    """Generate boards for one options combination, and measure it."""
+    generator = BoardGenerator(options, seed=seed, engine=engine)
+
+    latencies = []
+    stats = []
+    start = time.perf_counter()
+    for _ in range(boards):
+        t = time.perf_counter()
+        board = generator.generate()
+        latencies.append(time.perf_counter() - t)
+        stats.append(board.stats)
+    elapsed = time.perf_counter() - start
+    solver = SolverStats.total(stats).per_board()
+
+    # tracing the allocations slows the generation down, so the memory is
+    # measured on a few more boards, apart from the timings
+    tracemalloc.start()
+    for _ in range(memory_boards):
+        generator.generate()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "options": options,
+        "engine": engine,
+        "tiles": len(generator.tile_centers),
+        "boards": boards,
+        "boards_per_second": boards / elapsed,
+        "latency_ms": {
+            "mean": 1000 * statistics.mean(latencies),
+            "p50": 1000 * percentile(latencies, 50),
+            "p95": 1000 * percentile(latencies, 95),
+            "p99": 1000 * percentile(latencies, 99),
+        },
+        "res_restarts_per_board": solver["res_restarts"],
+        "num_restarts_per_board": solver["num_restarts"],
+        "peak_memory_bytes": peak,
+        "solver_per_board": solver,
+    }
+
+
+def run_python(script):
+    # run a script in a new interpreter, which imports this package, and
+    # return what it printed as JSON, and its wall time in ms
+    env = dict(os.environ)
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_dir, env.get("PYTHONPATH")]))
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True, env=env
+    ).stdout
+    return json.loads(output), 1000 * (time.perf_counter() - start)
+
+
+def measure_startup(repeat=7):
+    """Startup times in ms, the best of repeat new processes.
+
+    - "process_ms": running the interpreter, importing the generator and
+      generating a first board
+    - "import_ms", "first_board_ms": the two steps, inside the process
+    - "app_import_ms": importing the GUI of the app, None without toga
+    - "gui_imported": whether importing the generator, or the module of the
+      app entry point, imported toga
+    """
+    runs = [run_python(STARTUP_SCRIPT) for _ in range(repeat)]
+    startup = {
+        "process_ms": min(wall for _, wall in runs),
+        "import_ms": min(times["import_ms"] for times, _ in runs),
+        "first_board_ms": min(times["first_board_ms"] for times, _ in runs),
+        "gui_imported": any(times["gui_imported"] for times, _ in runs),
+    }
+    app_imports = [run_python(APP_SCRIPT)[0] for _ in range(repeat)]
+    startup["app_import_ms"] = None if None in app_imports else min(app_imports)
+    return startup
+
+
+STARTUP_TIMES = ["process_ms", "import_ms", "first_board_ms", "app_import_ms"]
+
+
+def run_benchmark(boards=100, seed=0, combinations=None, log=None, engines=("wfc",)):
+    """Benchmark all the combinations, returning the results as a dict.
+
+    With several engines, "fastest_engine" gives the engine with the most
+    boards per second for each combination.
+    """
+    if combinations is None:
+        combinations = all_options()
+
+    results = []
+    fastest = {}
+    for options in combinations:
+        for engine in engines:
+            result = benchmark_options(options, boards, seed, engine=engine)
+            results.append(result)
+            if log is not None:
+                log(
+                    f"{key_of(options)} {engine}: {result['boards_per_second']:.1f} boards/s, "
+                    f"p99 {result['latency_ms']['p99']:.2f} ms"
+                )
+            best = fastest.get(key_of(options))
+            if best is None or result["boards_per_second"] > best["boards_per_second"]:
+                fastest[key_of(options)] = result
+
+    extra = {}
+    if len(engines) > 1:
+        extra["fastest_engine"] = {key: r["engine"] for key, r in fastest.items()}
+
+    return {
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "boards": boards,
+        "seed": seed,
+        "results": results,
+        **extra,
+    }
+
+
+def key_of(options):
+    # short name of an options combination, like "10110"
+    return "".join(str(int(options[name])) for name in DEFAULT_OPTIONS)
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_key(result):
+    # combination and engine of a result (runs from before the engines were
+    # recorded used the wave function collapse)
+    return key_of(result["options"]) + " " + result.get("engine", "wfc")
+
+
+def compare_startup(baseline, results, threshold=0.2, min_change_ms=2.0):
+    """Startup times at least `threshold` slower than in the baseline.
+
+    The times are the best of several processes (see measure_startup), and
+    a time is only reported if it also got slower by at least min_change_ms,
+    as a few milliseconds of noise are a large share of the shortest ones.
+    Returns (name, baseline ms, ms) for each of them.
+    """
+    before, after = baseline.get("startup"), results.get("startup")
+    if before is None or after is None:
+        return []
+    return [
+        (name, before[name], after[name])
+        for name in STARTUP_TIMES
+        if before.get(name) is not None
+        and after.get(name) is not None
+        and after[name] > (1 + threshold) * before[name]
+        and after[name] - before[name] >= min_change_ms
+    ]
+
+
+def compare(baseline, results, threshold=0.2):
+    """Combinations at least `threshold` slower than in the baseline.
+
+    Returns (key, baseline boards/s, boards/s) for each of them, the key
+    being the combination and the engine, like "10110 wfc".
+    """
+    before = {result_key(r): r["boards_per_second"] for r in baseline["results"]}
+    regressions = []
+    for r in results["results"]:
+        key = result_key(r)
+        if key in before and r["boards_per_second"] < (1 - threshold) * before[key]:
+            regressions.append((key, before[key], r["boards_per_second"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--boards", type=int, default=100, help="boards per combination")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--more-players", choices=["yes", "no"], help="only one layout")
+    parser.add_argument(
+        "--engine", action="append", choices=ENGINES, help="engines to benchmark (wfc by default)"
+    )
+    parser.add_argument("--output", help="JSON file to write, instead of stdout")
+    parser.add_argument("--compare", help="JSON of a previous run")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="slowdown reported by --compare"
+    )
+    parser.add_argument(
+        "--startup-floor",
+        type=float,
+        default=2.0,
+        help="smallest slowdown of a startup time (in ms) reported by --compare",
+    )
+    parser.add_argument(
+        "--startup-only", action="store_true", help="only measure the startup times"
+    )
+    args = parser.parse_args(argv)
+
+    combinations = all_options()
+    if args.startup_only:
+        combinations = []
+    elif args.more_players is not None:
+        combinations = [
+            o for o in combinations if o["More_players"] == (args.more_players == "yes")
+        ]
+
+    results = run_benchmark(
+        args.boards,
+        args.seed,
+        combinations,
+        log=lambda s: print(s, file=sys.stderr),
+        engines=args.engine or ["wfc"],
+    )
+    results["startup"] = startup = measure_startup()
+    print(
+        f"startup: import {startup['import_ms']:.1f} ms, "
+        f"first board {startup['first_board_ms']:.1f} ms",
+        file=sys.stderr,
+    )
+
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failed = False
+    if startup["gui_imported"]:
+        print("importing the generator or the app imported toga", file=sys.stderr)
+        failed = True
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.threshold)
+        for key, before, after in regressions:
+            print(
+                f"{key}: {before:.1f} -> {after:.1f} boards/s", file=sys.stderr
+            )
+        slow_startup = compare_startup(
+            baseline, results, args.threshold, args.startup_floor
+        )
+        for name, before, after in slow_startup:
+            print(f"startup {name}: {before:.1f} -> {after:.1f} ms", file=sys.stderr)
+        failed = failed or bool(regressions or slow_startup)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
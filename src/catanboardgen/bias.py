@@ -0,0 +1,452 @@
+"""
+Measure how far the generated boards are from uniformly random valid boards
+
+Run it with:
+
+    python -m catanboardgen.bias --boards 1000000 --baseline 100000 --workers 4
+
+The solvers give valid boards, but not all the valid boards with the same
+odds: the wave function collapse tries the options of a tile in a uniform
+order, whatever the copies of each one left in the deck. To see where that
+shows, the generated boards and a baseline of uniform valid boards are
+streamed through a BiasAggregator, which only keeps fixed-size counters:
+
+- the ressources, and the numbers, of each tile
+- the pairs of ressources, and of numbers, on neighbouring tiles
+
+and the counters are compared with chi-square tests, for each tile and in
+total, along with the share of the deserts and of the 6 and 8 on the border
+of the board. Needs NumPy.
+
+The baseline is drawn in two stages, by rejection: uniform ressource layouts
+following the rules of the ressources, then for each one, a uniform
+numbering following the rules of the numbers. That is what both solvers aim
+at (they place the ressources first, then the numbers). Drawing full boards
+at once would weigh each layout by its count of valid numberings, which is
+out of reach with all the rules on (a few boards in a million are valid).
+"""
+
+import argparse
+import json
+import math
+import sys
+from functools import partial
+
+import numpy as np
+
+from catanboardgen.batch import BatchGenerator
+from catanboardgen.cli import add_option_flags, options_of
+from catanboardgen.generator import DESERT, ENGINES, BoardGenerator
+from catanboardgen.layout import RESSOURCES
+from catanboardgen.parallel import derive_seed, run_chunks
+
+
+# boards counted at once, by the aggregators and per chunk of the workers
+BLOCK_SIZE = 4096
+
+
+class BiasAggregator:
+    """Counters of the tiles of a stream of boards, of a fixed size.
+
+    - ressource_counts: (tiles, 6) boards with each ressource code on each tile
+    - number_counts: (tiles, 13) boards with each number on each tile
+    - ressource_pairs: (6, 6) neighbouring tiles with each pair of ressource
+      codes, the lowest code first
+    - number_pairs: (13, 13) the same for the numbers
+    - boards: boards counted
+
+    Boards added one at a time are buffered and counted by blocks. Counters
+    of the same layout add up with merge, so each worker can fill its own.
+    """
+
+    def __init__(self, layout, block_size=BLOCK_SIZE):
+        self.layout = layout
+        self.block_size = block_size
+
+        nb_tiles = len(layout)
+        self.edges = np.array(
+            [
+                (i, j)
+                for i, neighbours in enumerate(layout.tile_neighbours)
+                for j in neighbours
+                if j > i
+            ],
+            dtype=int,
+        ).reshape(-1, 2)
+        degrees = np.bincount(self.edges.ravel(), minlength=nb_tiles)
+        self.border = degrees < 6
+
+        self.ressource_counts = np.zeros((nb_tiles, 6), dtype=np.int64)
+        self.number_counts = np.zeros((nb_tiles, 13), dtype=np.int64)
+        self.ressource_pairs = np.zeros((6, 6), dtype=np.int64)
+        self.number_pairs = np.zeros((13, 13), dtype=np.int64)
+        self.boards = 0
+
+        self.buffer_ressources = np.empty((block_size, nb_tiles), dtype=np.int8)
+        self.buffer_numbers = np.empty((block_size, nb_tiles), dtype=np.int8)
+        self.buffered = 0
+
+    def __getstate__(self):
+        # sent back from the workers: the counters, not the buffers
+        self.flush()
+        state = self.__dict__.copy()
+        del state["buffer_ressources"], state["buffer_numbers"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        nb_tiles = len(self.layout)
+        self.buffer_ressources = np.empty((self.block_size, nb_tiles), dtype=np.int8)
+        self.buffer_numbers = np.empty((self.block_size, nb_tiles), dtype=np.int8)
+
+    def add(self, board):
+        """Count one Board."""
+        self.buffer_ressources[self.buffered] = [RESSOURCES.index(res) for res in board.deck]
+        self.buffer_numbers[self.buffered] = board.numbers_deck
+        self.buffered += 1
+        if self.buffered == self.block_size:
+            self.flush()
+
+    def add_many(self, boards):
+        for board in boards:
+            self.add(board)
+
+    def flush(self):
+        """Count the buffered boards."""
+        if self.buffered:
+            n, self.buffered = self.buffered, 0
+            self.add_arrays(self.buffer_ressources[:n], self.buffer_numbers[:n])
+
+    def add_arrays(self, ressources, numbers):
+        """Count (N, tiles) arrays of ressource codes and numbers."""
+        ressources = np.asarray(ressources, dtype=np.int64)
+        numbers = np.asarray(numbers, dtype=np.int64)
+        nb_tiles = len(self.layout)
+        tiles = np.arange(nb_tiles)
+
+        self.ressource_counts += np.bincount(
+            (tiles * 6 + ressources).ravel(), minlength=nb_tiles * 6
+        ).reshape(nb_tiles, 6)
+        self.number_counts += np.bincount(
+            (tiles * 13 + numbers).ravel(), minlength=nb_tiles * 13
+        ).reshape(nb_tiles, 13)
+        self.ressource_pairs += pair_counts(ressources, self.edges, 6)
+        self.number_pairs += pair_counts(numbers, self.edges, 13)
+        self.boards += len(ressources)
+
+    def merge(self, other):
+        """Add the counters of another aggregator of the same layout."""
+        if other.layout.tile_centers != self.layout.tile_centers:
+            raise ValueError("Cannot merge the counters of different layouts")
+        self.flush()
+        other.flush()
+        self.ressource_counts += other.ressource_counts
+        self.number_counts += other.number_counts
+        self.ressource_pairs += other.ressource_pairs
+        self.number_pairs += other.number_pairs
+        self.boards += other.boards
+        return self
+
+    def border_share(self, counts, values):
+        # share of the tiles with one of the values that are on the border
+        on_values = counts[:, values].sum(1)
+        return float(on_values[self.border].sum() / max(1, on_values.sum()))
+
+
+def pair_counts(values, edges, size):
+    # (size, size) counts of the values on the two tiles of each edge, the
+    # lowest value first
+    a, b = values[:, edges[:, 0]], values[:, edges[:, 1]]
+    low, high = np.minimum(a, b), np.maximum(a, b)
+    return np.bincount((low * size + high).ravel(), minlength=size * size).reshape(size, size)
+
+
+class UniformSampler:
+    """Uniform valid boards of the standard layouts, drawn by rejection.
+
+    The ressources are uniform shuffles of the deck, kept when they follow
+    the rules of the ressources. Each one then gets uniform shuffles of the
+    numbers by rounds, numbering_tries at first and twice as many each round
+    up to max_tries, and keeps the first valid one, or is dropped (and
+    counted in .dropped) after max_rounds rounds. On the 5-6 player layout
+    with both rules of the numbers, about one shuffle in 500000 is valid.
+    """
+
+    def __init__(
+        self, options=None, seed=None, batch_size=BLOCK_SIZE, numbering_tries=64,
+        max_tries=65536, max_rounds=100,
+    ):
+        self.batch = BatchGenerator(options)
+        self.options = self.batch.options
+        self.rng = np.random.default_rng(seed)
+        self.batch_size = batch_size
+        self.numbering_tries = numbering_tries
+        self.max_tries = max_tries
+        self.max_rounds = max_rounds
+        self.dropped = 0
+
+        generator = self.batch.generator
+        self.layout = generator.layout
+        self.deck = np.array(
+            [RESSOURCES.index(res) for res in generator.get_deck()], dtype=np.int8
+        )
+        self.numbers = np.array(self.layout.numbers, dtype=np.int8)
+
+    def generate(self, n):
+        """Return n boards, as (ressources, numbers) arrays."""
+        ressources, numbers = [], []
+        nb_boards = 0
+        while nb_boards < n:
+            res = self.sample_ressources(self.batch_size)
+            res, nums = self.sample_numbers(res[: n - nb_boards])
+            ressources.append(res)
+            numbers.append(nums)
+            nb_boards += len(res)
+        empty = np.empty((0, len(self.deck)), dtype=np.int8)
+        return np.concatenate([empty] + ressources), np.concatenate([empty] + numbers)
+
+    def sample_ressources(self, n):
+        # the valid layouts among n shuffles of the deck
+        res = self.rng.permuted(np.tile(self.deck, (n, 1)), axis=1)
+        valid = np.ones(n, dtype=bool)
+        if self.options["Ressource_clusters"]:
+            valid &= self.batch.check_ressource_clusters(res).all(1)
+        if self.options["Balanced_ports"]:
+            valid &= self.batch.check_ports(res).all(1)
+        if self.options["Number_clusters"]:
+            # the 7 of the deserts cannot touch
+            neighbours = self.batch.padded_neighbours(res, self.batch.neighbours, 0)
+            valid &= ~((res == DESERT)[:, :, None] & (neighbours == DESERT)).any((1, 2))
+        return res[valid]
+
+    def sample_numbers(self, ressources):
+        # a valid numbering for each layout, the layouts without one after
+        # max_rounds rounds are dropped
+        done_res, done_nums = [ressources[:0]], [ressources[:0]]
+        tries = self.numbering_tries
+        for _ in range(self.max_rounds):
+            if not len(ressources):
+                break
+            candidates = np.repeat(ressources, tries, axis=0)
+            nums = np.full(candidates.shape, 7, dtype=np.int8)
+            shuffled = self.rng.permuted(np.tile(self.numbers, (len(candidates), 1)), axis=1)
+            nums[candidates != DESERT] = shuffled.ravel()
+
+            valid = self.valid_numbers(candidates, nums).reshape(-1, tries)
+            found = valid.any(1)
+            # the first valid numbering of each layout
+            first = np.arange(len(ressources)) * tries + valid.argmax(1)
+            done_res.append(ressources[found])
+            done_nums.append(nums[first[found]])
+            ressources = ressources[~found]
+            tries = min(2 * tries, self.max_tries)
+        self.dropped += len(ressources)
+        return np.concatenate(done_res), np.concatenate(done_nums)
+
+    def valid_numbers(self, ressources, numbers):
+        valid = np.ones(len(ressources), dtype=bool)
+        if self.options["Number_clusters"]:
+            valid &= self.batch.check_number_clusters(numbers).all(1)
+        if self.options["Number_repeats"]:
+            valid &= self.batch.check_number_repeats(ressources, numbers).all(1)
+            if self.options["More_players"]:
+                # the solvers allow no repeat at all, as for 3-4 players
+                valid &= no_repeats(ressources, numbers)
+        return valid
+
+
+def no_repeats(ressources, numbers):
+    # boards where the tiles of each ressource (but the desert) have
+    # distinct numbers
+    idx = ressources.astype(np.int64) * 13 + numbers
+    ordered = np.sort(np.where(ressources == DESERT, -1 - np.arange(ressources.shape[1]), idx), 1)
+    return ~(ordered[:, 1:] == ordered[:, :-1]).any(1)
+
+
+def chi_square(a, b):
+    """Two-sample chi-square test that the counts a and b have the same odds.
+
+    a and b are counts of the same categories, the categories empty in both
+    are left out. Returns the statistic, the degrees of freedom and the
+    p-value.
+    """
+    a = np.asarray(a, dtype=float).ravel()
+    b = np.asarray(b, dtype=float).ravel()
+    used = (a + b) > 0
+    a, b = a[used], b[used]
+    total_a, total_b = a.sum(), b.sum()
+    dof = len(a) - 1
+    if dof < 1 or not total_a or not total_b:
+        return {"chi2": 0.0, "dof": 0, "p_value": 1.0}
+    k_a, k_b = math.sqrt(total_b / total_a), math.sqrt(total_a / total_b)
+    statistic = float((((k_a * a - k_b * b) ** 2) / (a + b)).sum())
+    return {"chi2": statistic, "dof": dof, "p_value": chi2_sf(statistic, dof)}
+
+
+def chi2_sf(x, dof):
+    # probability of a chi-square of dof degrees of freedom above x: the
+    # regularized upper incomplete gamma function Q(dof / 2, x / 2)
+    a, x = dof / 2, x / 2
+    if x <= 0:
+        return 1.0
+    log_prefactor = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1:
+        # series of the lower function P
+        term = total = 1 / a
+        k = a
+        while abs(term) > abs(total) * 1e-15:
+            k += 1
+            term *= x / k
+            total += term
+        return max(0.0, 1 - total * math.exp(log_prefactor))
+
+    # continued fraction of Q (modified Lentz)
+    tiny = 1e-300
+    b = x + 1 - a
+    c, d = 1 / tiny, 1 / b
+    h = d
+    for i in range(1, 10000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return min(1.0, h * math.exp(log_prefactor))
+
+
+def compare(generated, baseline):
+    """Chi-square tests and border shares of two aggregators of a layout.
+
+    The tests of each tile ("tiles") are exact up to the chi-square
+    approximation. The totals count all the tiles (or neighbouring pairs) of
+    a board as independent draws, which they are not, so their p-values are
+    indicative; "worst_tile_p_value" is the lowest p-value of the tiles,
+    multiplied by the count of tests (Bonferroni).
+    """
+    generated.flush()
+    baseline.flush()
+    tiles = []
+    for i, center in enumerate(generated.layout.tile_centers):
+        tiles.append(
+            {
+                "tile": list(center),
+                "ressources": chi_square(
+                    generated.ressource_counts[i], baseline.ressource_counts[i]
+                ),
+                "numbers": chi_square(generated.number_counts[i], baseline.number_counts[i]),
+            }
+        )
+    p_values = [t[kind]["p_value"] for t in tiles for kind in ("ressources", "numbers")]
+
+    def shares(values, counts):
+        return {
+            "generated": generated.border_share(getattr(generated, counts), values),
+            "baseline": baseline.border_share(getattr(baseline, counts), values),
+        }
+
+    return {
+        "boards": {"generated": generated.boards, "baseline": baseline.boards},
+        "ressources": chi_square(generated.ressource_counts, baseline.ressource_counts),
+        "numbers": chi_square(generated.number_counts, baseline.number_counts),
+        "ressource_pairs": chi_square(generated.ressource_pairs, baseline.ressource_pairs),
+        "number_pairs": chi_square(generated.number_pairs, baseline.number_pairs),
+        "worst_tile_p_value": min(1.0, min(p_values) * len(p_values)),
+        "border": {
+            "tiles": float(generated.border.mean()),
+            "desert": shares([DESERT], "ressource_counts"),
+            "six_eight": shares([6, 8], "number_counts"),
+        },
+        "tiles": tiles,
+    }
+
+
+def generated_chunk(options, engine, weighted_collapse, count, seed):
+    # run in the worker processes, the counters of count generated boards
+    generator = BoardGenerator(
+        options, seed=seed, engine=engine, record_stats=False,
+        weighted_collapse=weighted_collapse,
+    )
+    aggregator = BiasAggregator(generator.layout)
+    for _ in range(count):
+        aggregator.add(generator.generate())
+    aggregator.flush()
+    return aggregator
+
+
+def baseline_chunk(options, count, seed):
+    # run in the worker processes, the counters of count baseline boards
+    sampler = UniformSampler(options, seed=seed)
+    aggregator = BiasAggregator(sampler.layout)
+    aggregator.add_arrays(*sampler.generate(count))
+    return aggregator
+
+
+def aggregate(task, n, seed, workers):
+    """Merged counters of task(count, seed) for the chunks of n boards."""
+    if workers:
+        chunks = run_chunks(task, n, seed, workers, BLOCK_SIZE)
+    else:
+        chunks = (
+            task(min(BLOCK_SIZE, n - start), derive_seed(seed, i))
+            for i, start in enumerate(range(0, n, BLOCK_SIZE))
+        )
+    total = None
+    for aggregator in chunks:
+        total = aggregator if total is None else total.merge(aggregator)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--boards", type=int, default=100000, help="generated boards")
+    parser.add_argument("--baseline", type=int, default=100000, help="uniform boards")
+    parser.add_argument("--engine", choices=ENGINES, default="wfc")
+    parser.add_argument(
+        "--weighted", action="store_true", help="weigh the collapse by the copies left"
+    )
+    parser.add_argument("--workers", type=int, help="count on this many processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file to write, instead of stdout")
+    add_option_flags(parser)
+    args = parser.parse_args(argv)
+    if args.boards < 1 or args.baseline < 1:
+        print("--boards and --baseline must be positive", file=sys.stderr)
+        return 2
+
+    options = options_of(args)
+    generated = aggregate(
+        partial(generated_chunk, options, args.engine, args.weighted),
+        args.boards,
+        derive_seed(args.seed, "generated"),
+        args.workers,
+    )
+    baseline = aggregate(
+        partial(baseline_chunk, options),
+        args.baseline,
+        derive_seed(args.seed, "baseline"),
+        args.workers,
+    )
+
+    results = {
+        "options": options,
+        "engine": args.engine,
+        "weighted_collapse": args.weighted,
+        **compare(generated, baseline),
+    }
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
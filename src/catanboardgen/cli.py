@@ -0,0 +1,140 @@
+"""
+Command line generation of boards, streamed to stdout
+
+    python -m catanboardgen generate --count 1000000 --more-players --seed 42
+
+writes one board per line: a JSON object (see codes.board_to_dict) with
+--format ndjson, the default, or the board code with --format code. The
+boards are generated and written by chunks, so the memory used does not
+depend on --count.
+
+The constraints are on by default, and turned off with --no-ressource-clusters,
+--no-balanced-ports, --no-number-clusters and --no-number-repeats. A seed
+gives the boards of BoardGenerator(options, seed=seed).generate_many(count),
+or with --workers, the ones of generate_parallel (the same whatever the
+number of workers). --progress reports the boards written on stderr.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from functools import partial
+
+from catanboardgen.codes import board_to_code, board_to_dict
+from catanboardgen.generator import DEFAULT_OPTIONS, ENGINES, BoardGenerator
+from catanboardgen.parallel import run_chunks
+
+
+# boards generated and written at once
+CHUNK_SIZE = 256
+
+# seconds between two progress reports
+PROGRESS_INTERVAL = 1.0
+
+
+def flag_of(option):
+    # command line flag of an option, like --more-players
+    return "--" + option.lower().replace("_", "-")
+
+
+def add_option_flags(parser):
+    # --more-players and --no-more-players, and so on for each option
+    for option, default in DEFAULT_OPTIONS.items():
+        parser.add_argument(flag_of(option), dest=option, action="store_true")
+        parser.add_argument("--no-" + flag_of(option)[2:], dest=option, action="store_false")
+        parser.set_defaults(**{option: default})
+
+
+def options_of(args):
+    # the options dict of parsed arguments
+    return {option: getattr(args, option) for option in DEFAULT_OPTIONS}
+
+
+def format_board(board, fmt):
+    if fmt == "code":
+        return board_to_code(board) + "\n"
+    return json.dumps(board_to_dict(board), separators=(",", ":")) + "\n"
+
+
+def format_chunk(options, fmt, engine, count, seed):
+    # run in the worker processes, the lines of count boards
+    generator = BoardGenerator(options, seed=seed, engine=engine, record_stats=False)
+    return "".join(format_board(generator.generate(), fmt) for _ in range(count))
+
+
+def serial_chunks(options, fmt, engine, count, seed):
+    # the lines of the boards by chunks, from a single generator
+    generator = BoardGenerator(options, seed=seed, engine=engine, record_stats=False)
+    for start in range(0, count, CHUNK_SIZE):
+        yield "".join(
+            format_board(generator.generate(), fmt)
+            for _ in range(min(CHUNK_SIZE, count - start))
+        )
+
+
+def write_chunks(chunks, out, count, progress=None):
+    """Write the chunks of lines to out, reporting the progress on progress."""
+    start = last_report = time.monotonic()
+    written = 0
+    for text in chunks:
+        out.write(text)
+        written += text.count("\n")
+        if progress is not None:
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL or written == count:
+                last_report = now
+                rate = written / max(now - start, 1e-9)
+                progress.write(f"\r{written}/{count} boards, {rate:.0f} boards/s")
+                progress.flush()
+    if progress is not None:
+        progress.write("\n")
+    out.flush()
+    return written
+
+
+def parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m catanboardgen", description=__doc__.strip().splitlines()[0]
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate = commands.add_parser("generate", help="write boards to stdout")
+    generate.add_argument("--count", type=int, default=1, help="number of boards")
+    generate.add_argument("--seed", type=int)
+    generate.add_argument("--format", choices=["ndjson", "code"], default="ndjson")
+    generate.add_argument("--engine", choices=ENGINES, default="wfc")
+    generate.add_argument("--workers", type=int, help="generate on this many processes")
+    generate.add_argument("--progress", action="store_true", help="report on stderr")
+    add_option_flags(generate)
+    return parser
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    if args.count < 0:
+        print("--count cannot be negative", file=sys.stderr)
+        return 2
+
+    options = options_of(args)
+    if args.workers:
+        task = partial(format_chunk, options, args.format, args.engine)
+        chunks = run_chunks(task, args.count, args.seed, args.workers, CHUNK_SIZE)
+    else:
+        chunks = serial_chunks(options, args.format, args.engine, args.count, args.seed)
+
+    try:
+        write_chunks(
+            chunks, sys.stdout, args.count, sys.stderr if args.progress else None
+        )
+    except BrokenPipeError:
+        # the reader stopped (like head), stdout is pointed to devnull so
+        # that Python does not fail flushing it on exit
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Compact codes for boards: the options, ressources and numbers packed in an int
+
+The int is built in mixed radix: the options flags (one bit each, in the
+order of DEFAULT_OPTIONS), the ressource code of each tile (base 6), then
+the number of each tile that is not a desert (base 10). The layout, and so
+the number of tiles, follows from the options: only the boards of the
+standard layouts have codes. As a string, the int is written in URL-safe
+base64: at most 20 characters for a 3-4 player board, and 30 for a 5-6
+player board.
+"""
+
+import base64
+
+from catanboardgen.generator import DEFAULT_OPTIONS, DESERT, BoardGenerator
+from catanboardgen.layout import Layout
+
+
+OPTION_NAMES = list(DEFAULT_OPTIONS)
+
+# the numbers on the tokens, in the order of their code
+NUMBERS = [2, 3, 4, 5, 6, 8, 9, 10, 11, 12]
+NUMBER_CODES = {n: i for i, n in enumerate(NUMBERS)}
+
+
+def encode(options, ressources, numbers):
+    """Pack the options, ressource codes and numbers of a board in an int."""
+    if len(ressources) != len(Layout.standard(options["More_players"])):
+        raise ValueError("Board codes only describe boards of the standard layouts")
+    value = 0
+    for res, num in zip(ressources[::-1], numbers[::-1]):
+        if res != DESERT:
+            value = value * len(NUMBERS) + NUMBER_CODES[int(num)]
+    for res in ressources[::-1]:
+        value = value * 6 + int(res)
+    for name in OPTION_NAMES[::-1]:
+        value = value * 2 + bool(options[name])
+    return value
+
+
+def decode(value):
+    """Unpack an int made by encode, as (options, ressources, numbers)."""
+    if value < 0:
+        raise ValueError("Board codes are positive")
+
+    options = {}
+    for name in OPTION_NAMES:
+        value, options[name] = divmod(value, 2)
+        options[name] = bool(options[name])
+
+    nb_tiles = len(BoardGenerator(options).tile_centers)
+    ressources = []
+    for _ in range(nb_tiles):
+        value, res = divmod(value, 6)
+        ressources.append(res)
+    numbers = []
+    for res in ressources:
+        if res == DESERT:
+            numbers.append(7)
+        else:
+            value, num = divmod(value, len(NUMBERS))
+            numbers.append(NUMBERS[num])
+
+    if value:
+        raise ValueError("Board code is too long for its options")
+    return options, ressources, numbers
+
+
+def board_to_int(board):
+    if not board.layout.is_standard(board.options["More_players"]):
+        raise ValueError("Board codes only describe boards of the standard layouts")
+    ressource_list = BoardGenerator.ressource_list
+    return encode(
+        board.options,
+        [ressource_list.index(res) for res in board.deck],
+        board.numbers_deck,
+    )
+
+
+def board_from_int(value):
+    options, ressources, numbers = decode(value)
+    return BoardGenerator(options).make_board(ressources, numbers)
+
+
+def int_to_code(value):
+    data = value.to_bytes(max(1, (value.bit_length() + 7) // 8), "big")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def code_to_int(code):
+    try:
+        data = base64.b64decode(
+            code + "=" * (-len(code) % 4), altchars=b"-_", validate=True
+        )
+    except ValueError as e:
+        raise ValueError(f"Invalid board code: {code!r}") from e
+    return int.from_bytes(data, "big")
+
+
+def board_to_code(board):
+    """Short string identifying a board and its options."""
+    return int_to_code(board_to_int(board))
+
+
+def board_from_code(code):
+    """Build back the Board from the string made by board_to_code."""
+    return board_from_int(code_to_int(code))
+
+
+def board_to_dict(board):
+    """A Board as a JSON-serializable dict, with its code.
+
+    The code is None for the boards of other layouts than the standard ones.
+    """
+    standard = board.layout.is_standard(board.options["More_players"])
+    return {
+        "code": board_to_code(board) if standard else None,
+        "options": board.options,
+        "tiles": [
+            {"q": t.x, "r": t.y, "ressource": t.ressource, "number": t.number}
+            for t in board.tiles
+        ],
+        "ports": [list(p) for p in board.ports],
+    }
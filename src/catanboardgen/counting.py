@@ -0,0 +1,325 @@
+"""
+Exhaustive enumeration and counting of the valid boards of an options set
+
+The boards are walked depth first, ressources then numbers, pruning every
+partial board breaking the rules of check_ressource_clusters, check_ports,
+check_number_clusters and check_number_repeats. Counting the boards up to
+symmetry uses Burnside's lemma: the number of distinct boards is the mean,
+over the symmetries, of the number of boards they leave unchanged, and the
+boards left unchanged by a symmetry are walked by cycles of tiles, which is
+much faster than walking all the boards.
+
+The number of valid boards of the standard layouts is far too large to be
+walked (around 10^9 ressource layouts, each with billions of numberings),
+count_ressource_layouts counts the ressource layouts alone with a dynamic
+programming over the tiles instead.
+"""
+
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from catanboardgen.generator import (
+    ALL_RESSOURCES,
+    DESERT,
+    MAX_SAME_NEIGHBOURS,
+    BoardGenerator,
+    options_of,
+)
+from catanboardgen.symmetry import layout_symmetries
+
+
+# the numbers on the tokens
+NUMBERS = [2, 3, 4, 5, 6, 8, 9, 10, 11, 12]
+
+
+def cycles_of(permutation):
+    """Cycles of a permutation, each starting with its smallest tile."""
+    cycles = []
+    seen = set()
+    for i in range(len(permutation)):
+        cycle = []
+        while i not in seen:
+            seen.add(i)
+            cycle.append(i)
+            i = permutation[i]
+        if cycle:
+            cycles.append(cycle)
+    return cycles
+
+
+class BoardEnumerator:
+    """Walk and count all the valid boards of an options set.
+
+    With Balanced_ports, the ports are never ignored by the symmetries, as
+    the image of a valid board by another symmetry may not be valid. The
+    layout is the standard one of the options, unless another one is given.
+    """
+
+    def __init__(self, options=None, ignore_ports=False, layout=None):
+        self.generator = BoardGenerator(options, layout=layout)
+        self.options = self.generator.options
+        self.ignore_ports = ignore_ports
+        self.symmetries = layout_symmetries(
+            self.generator, ignore_ports and not self.options["Balanced_ports"]
+        )
+
+        # ressources allowed on each tile, by the ports
+        self.allowed = [ALL_RESSOURCES] * len(self.generator.tile_centers)
+        if self.options["Balanced_ports"]:
+            for mask, neighbours in zip(
+                self.generator.port_masks, self.generator.port_neighbours
+            ):
+                for j in neighbours:
+                    self.allowed[j] &= mask
+
+    def ressource_layouts(self, cycles=None, prefix=()):
+        """Yield the valid ressource layouts, as lists of ressource codes.
+
+        cycles are the groups of tiles getting the same ressource (by
+        default, each tile on its own), assigned in order; prefix gives the
+        ressources of the first cycles.
+        """
+        g = self.generator
+        nb_tiles = len(g.tile_centers)
+        if cycles is None:
+            cycles = [[i] for i in range(nb_tiles)]
+
+        clusters = self.options["Ressource_clusters"]
+        ressources = [-1] * nb_tiles
+        # number of neighbours of the same ressource of each tile
+        same = [0] * nb_tiles
+        counts = g.res_counts.copy()
+
+        def unassign(tiles, res):
+            for i in reversed(tiles):
+                ressources[i] = -1
+                same[i] = 0
+                for j in g.tile_neighbours[i]:
+                    if ressources[j] == res:
+                        same[j] -= 1
+
+        def assign(cycle, res):
+            if counts[res] < len(cycle):
+                return False
+            for k, i in enumerate(cycle):
+                valid = self.allowed[i] >> res & 1
+                if valid and clusters:
+                    same_neighbours = [j for j in g.tile_neighbours[i] if ressources[j] == res]
+                    valid = len(same_neighbours) <= MAX_SAME_NEIGHBOURS[res] and all(
+                        same[j] < MAX_SAME_NEIGHBOURS[res] for j in same_neighbours
+                    )
+                if not valid:
+                    unassign(cycle[:k], res)
+                    return False
+
+                for j in g.tile_neighbours[i]:
+                    if ressources[j] == res:
+                        same[j] += 1
+                        same[i] += 1
+                ressources[i] = res
+            counts[res] -= len(cycle)
+            return True
+
+        def walk(k):
+            if k == len(cycles):
+                yield list(ressources)
+                return
+            for res in range(len(counts)):
+                if assign(cycles[k], res):
+                    yield from walk(k + 1)
+                    unassign(cycles[k], res)
+                    counts[res] += len(cycles[k])
+
+        for k, res in enumerate(prefix):
+            if not assign(cycles[k], res):
+                return
+        yield from walk(len(prefix))
+
+    def number_layouts(self, ressources, cycles=None):
+        """Yield the valid numbers for a ressource layout, as lists of numbers.
+
+        cycles are the groups of tiles getting the same number, see
+        ressource_layouts.
+        """
+        g = self.generator
+        nb_tiles = len(g.tile_centers)
+        if cycles is None:
+            cycles = [[i] for i in range(nb_tiles)]
+
+        more_players = self.options["More_players"]
+        number_clusters = self.options["Number_clusters"]
+        number_repeats = self.options["Number_repeats"]
+
+        # desert tiles get the 7
+        numbers = [7 if res == DESERT else -1 for res in ressources]
+        if number_clusters and any(
+            numbers[j] == 7 for i in range(nb_tiles) if numbers[i] == 7
+            for j in g.tile_neighbours[i]
+        ):
+            return
+        cycles = [c for c in cycles if ressources[c[0]] != DESERT]
+
+        counts = g.num_counts.copy()
+        # count of each number, and repeats, of each ressource
+        res_nums = [[0] * 13 for _ in range(DESERT)]
+        repeats = [0] * DESERT
+
+        def unassign(tiles, num):
+            for i in reversed(tiles):
+                numbers[i] = -1
+                res = ressources[i]
+                res_nums[res][num] -= 1
+                repeats[res] -= res_nums[res][num] > 0
+
+        def assign(cycle, num):
+            if counts[num] < len(cycle):
+                return False
+            for k, i in enumerate(cycle):
+                res = ressources[i]
+                valid = True
+                if number_clusters:
+                    neighbours = [numbers[j] for j in g.tile_neighbours[i]]
+                    valid = num not in neighbours and not (
+                        num in [6, 8] and (6 in neighbours or 8 in neighbours)
+                    )
+                if valid and number_repeats:
+                    taken = res_nums[res][num]
+                    valid = not taken or (more_players and repeats[res] == 0)
+                    if num in [6, 8]:
+                        if more_players:
+                            valid &= not taken
+                        else:
+                            valid &= not (res_nums[res][6] or res_nums[res][8])
+                if not valid:
+                    unassign(cycle[:k], num)
+                    return False
+
+                repeats[res] += res_nums[res][num] > 0
+                res_nums[res][num] += 1
+                numbers[i] = num
+            counts[num] -= len(cycle)
+            return True
+
+        def complete():
+            # for 5-6 players, each ressource has at least one 6 or 8
+            return not (number_repeats and more_players) or all(
+                res_nums[res][6] + res_nums[res][8] >= 1 for res in range(DESERT)
+            )
+
+        def walk(k):
+            if k == len(cycles):
+                if complete():
+                    yield list(numbers)
+                return
+            for num in NUMBERS:
+                if assign(cycles[k], num):
+                    yield from walk(k + 1)
+                    unassign(cycles[k], num)
+                    counts[num] += len(cycles[k])
+
+        yield from walk(0)
+
+    def boards(self, cycles=None, prefix=()):
+        """Yield all the valid boards, as (ressources, numbers) lists."""
+        for ressources in self.ressource_layouts(cycles, prefix):
+            for numbers in self.number_layouts(ressources, cycles):
+                yield ressources, numbers
+
+    def count_boards(self, distinct=False, workers=1, prefix_length=2):
+        """Number of valid boards, or of boards distinct up to symmetry.
+
+        With several workers, the boards are split by the ressources of
+        their first prefix_length tiles, counted on a pool of processes.
+        """
+        if not distinct:
+            return self.count_fixed(None, workers, prefix_length)
+
+        # Burnside's lemma
+        total = sum(
+            self.count_fixed(p, workers, prefix_length) for p in self.symmetries
+        )
+        return total // len(self.symmetries)
+
+    def count_fixed(self, permutation, workers=1, prefix_length=2):
+        # number of valid boards left unchanged by the permutation
+        cycles = None if permutation is None else cycles_of(permutation)
+        if workers == 1:
+            return sum(1 for _ in self.boards(cycles))
+
+        nb_cycles = len(cycles) if cycles is not None else len(self.generator.tile_centers)
+        prefix_cycles = (cycles or [[i] for i in range(nb_cycles)])[:prefix_length]
+        prefixes = [
+            [ressources[c[0]] for c in prefix_cycles]
+            for ressources in self.ressource_layouts(prefix_cycles)
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return sum(
+                executor.map(
+                    count_prefix,
+                    [self] * len(prefixes),
+                    [cycles] * len(prefixes),
+                    prefixes,
+                )
+            )
+
+    def count_ressource_layouts(self):
+        """Number of valid ressource layouts, by dynamic programming.
+
+        The tiles are filled in order, and the partial layouts are merged
+        when they agree on the ressources left in the deck and on the tiles
+        that still have neighbours to fill (with their number of neighbours
+        of the same ressource), as the rest does not matter any more.
+        """
+        g = self.generator
+        nb_tiles = len(g.tile_centers)
+        clusters = self.options["Ressource_clusters"]
+
+        # tiles are part of the frontier until their last neighbour is filled,
+        # each one as ressource << 2 | number of neighbours of the same
+        # ressource (only needed for the clusters)
+        last_neighbour = [max((*g.tile_neighbours[i], i)) for i in range(nb_tiles)]
+        frontier_tiles = []
+
+        # partial layouts: (frontier, deck) -> count
+        layer = {((), tuple(g.res_counts)): 1}
+        for i in range(nb_tiles):
+            # positions in the frontier of the neighbours of the tile, and of
+            # the tiles staying in the frontier
+            neighbours = [p for p, t in enumerate(frontier_tiles) if t in g.tile_neighbours[i]]
+            kept = [p for p, t in enumerate(frontier_tiles) if last_neighbour[t] > i]
+            frontier_tiles = [frontier_tiles[p] for p in kept]
+            stays = last_neighbour[i] > i
+            if stays:
+                frontier_tiles.append(i)
+            candidates = options_of(self.allowed[i] & ALL_RESSOURCES)
+
+            next_layer = defaultdict(int)
+            for (frontier, counts), ways in layer.items():
+                for res in candidates:
+                    if not counts[res]:
+                        continue
+
+                    same = [p for p in neighbours if frontier[p] >> 2 == res]
+                    if clusters:
+                        if len(same) > MAX_SAME_NEIGHBOURS[res] or any(
+                            frontier[p] & 3 >= MAX_SAME_NEIGHBOURS[res] for p in same
+                        ):
+                            continue
+                        next_frontier = list(frontier)
+                        for p in same:
+                            next_frontier[p] += 1
+                    else:
+                        next_frontier = frontier
+
+                    next_frontier = tuple(next_frontier[p] for p in kept)
+                    if stays:
+                        next_frontier += (res << 2 | len(same) * clusters,)
+                    next_counts = counts[:res] + (counts[res] - 1,) + counts[res + 1 :]
+                    next_layer[(next_frontier, next_counts)] += ways
+            layer = next_layer
+
+        return sum(layer.values())
+
+
+def count_prefix(enumerator, cycles, prefix):
+    return sum(1 for _ in enumerator.boards(cycles, prefix))
@@ -0,0 +1,1241 @@
+"""
+Board generation logic for Catan boards, independent of any GUI
+"""
+
+import random as r
+from array import array
+from functools import lru_cache
+import time
+
+from catanboardgen.layout import NEIGHBOUR_DIRECTIONS, RESSOURCES, Layout
+from catanboardgen.stats import SolverStats
+
+
+# options, for the logic, with their default values
+DEFAULT_OPTIONS = {
+    "More_players": False,
+    "Ressource_clusters": True,
+    "Balanced_ports": True,
+    "Number_clusters": True,
+    "Number_repeats": True,
+}
+
+# constraints dropped one after the other, when boards take too long to
+# generate with all of them
+RELAXING_ORDER = [
+    "Number_repeats",
+    "Number_clusters",
+    "Ressource_clusters",
+    "Balanced_ports",
+]
+
+# the solver works on small integers: ressources are coded by their index in
+# BoardGenerator.ressource_list, numbers by their value, and the options of a
+# tile are stored as a bitmask of these codes
+DESERT = 5
+ALL_RESSOURCES = (1 << 6) - 1
+ALL_NUMBERS = sum(1 << n for n in [2, 3, 4, 5, 6, 8, 9, 10, 11, 12])
+MASK_68 = (1 << 6) | (1 << 8)
+
+# numbers a number clashes with: itself, and both 6 and 8 for a 6 or an 8
+SIX_EIGHT = (6, 8)
+CLASHES = tuple(SIX_EIGHT if n in SIX_EIGHT else (n,) for n in range(13))
+
+# number of neighbours of the same ressource a tile can have without making
+# a cluster: brick, stone and desert cannot touch, wood, sheep and wheat can
+# touch once
+MAX_SAME_NEIGHBOURS = [0, 1, 1, 1, 0, 0]
+
+# the same rule, as the largest connected cluster of each ressource: pairs
+# for wood, sheep and wheat, single tiles for the others
+MAX_CLUSTER_SIZE = [n + 1 for n in MAX_SAME_NEIGHBOURS]
+
+# layouts from which the solver keeps its state in arrays rather than lists,
+# and the generators use the local search unless told otherwise
+LARGE_LAYOUT = 100
+
+# the solvers a board can be generated with: the wave function collapse,
+# or the local search repairing a shuffled deck by swaps
+ENGINES = ("wfc", "swap")
+
+
+def bitmask_tables(max_mask):
+    # number of options in each bitmask up to max_mask, and the options
+    # themselves, built by doubling: the masks with bit i set are the ones
+    # below 1 << i with bit i added
+    popcount, options = [0], [[]]
+    for bit in range(max_mask.bit_length()):
+        popcount += [count + 1 for count in popcount]
+        options += [o + [bit] for o in options]
+    return popcount[: max_mask + 1], options[: max_mask + 1]
+
+
+# number of options in a bitmask, and the options themselves, built with the
+# first constraint plan (see build_bitmask_tables): with 8192 masks, they
+# would be most of the time taken to import this module
+POPCOUNT = OPTIONS = None
+
+
+def build_bitmask_tables():
+    global POPCOUNT, OPTIONS
+    if OPTIONS is None:
+        POPCOUNT, OPTIONS = bitmask_tables(ALL_NUMBERS)
+
+
+class GenerationCancelled(Exception):
+    """The generation of a board was cancelled before it finished."""
+
+
+class GenerationTimeout(GenerationCancelled):
+    """The generation of a board took longer than its time budget."""
+
+
+def options_key(options):
+    """The flags of an options dict, in the order of DEFAULT_OPTIONS."""
+    return tuple(bool(options[name]) for name in DEFAULT_OPTIONS)
+
+
+def relaxed_options(options):
+    """Yield the options with their constraints dropped one after the other."""
+    options = dict(options)
+    for name in RELAXING_ORDER:
+        if options[name]:
+            options[name] = False
+            yield dict(options)
+
+
+class Board:
+    """A generated board: the tiles (with ressource and number) and the ports."""
+
+    def __init__(self, tiles, ports, options, layout=None):
+        self.tiles = tiles
+        self.ports = ports
+        self.options = dict(options)
+        # the Layout the board was generated on
+        if layout is None:
+            layout = Layout.standard(self.options["More_players"])
+        self.layout = layout
+
+    @property
+    def deck(self):
+        return [t.ressource for t in self.tiles]
+
+    @property
+    def numbers_deck(self):
+        return [t.number for t in self.tiles]
+
+    @property
+    def tile_centers(self):
+        return [t.coords for t in self.tiles]
+
+
+class ConstraintPlan:
+    """The rules of an options set on a layout, compiled for the solvers.
+
+    Built once for each options set and layout by compile_plan, and shared
+    by all their generators, so the solvers only run the rules that are on,
+    without looking the options up.
+
+    - tile_neighbours, port_neighbours: indices of the tiles around each tile
+      and each port
+    - port_masks: bitmask removing the ressource of each port
+    - port_rules: (mask, neighbours) of each port, empty without
+      Balanced_ports
+    - port_forbidden: the ressources each tile cannot get because of the
+      ports around it (none without Balanced_ports), for the local search
+    - res_counts, num_counts: tiles of each ressource code and each number
+    - res_domain, num_domain: the options of the tiles before any rule, the
+      ressources and numbers the deck has copies of
+    - cluster_rules: for each ressource code, the constraint limiting the
+      size of its clusters, or None
+    - same_neighbour_limits: neighbours of the same ressource each ressource
+      can have, for the local search
+    - neighbour_masks: for each number, the numbers its neighbours lose (0
+      without Number_clusters)
+    - ressource_rules: for each number, (numbers the tiles of the same
+      ressource lose, constraint), or None without Number_repeats
+    - same_ressource_clashes: for each number, the numbers the tiles of the
+      same ressource cannot have, for the local search
+    - six_eight_needed: whether each ressource needs a 6 or an 8 (5-6
+      players, with Number_repeats)
+    """
+
+    __slots__ = (
+        "tile_neighbours",
+        "port_neighbours",
+        "port_masks",
+        "port_rules",
+        "port_forbidden",
+        "res_counts",
+        "num_counts",
+        "res_domain",
+        "num_domain",
+        "cluster_rules",
+        "same_neighbour_limits",
+        "neighbour_masks",
+        "ressource_rules",
+        "same_ressource_clashes",
+        "six_eight_needed",
+    )
+
+    def __init__(self, options, layout):
+        options = dict(zip(DEFAULT_OPTIONS, options))
+        more_players = options["More_players"]
+
+        # the tables the solvers look the options of the tiles up in
+        build_bitmask_tables()
+
+        # integer indexed adjacency, built once by the layout
+        self.tile_neighbours = layout.tile_neighbours
+        self.port_neighbours = layout.port_neighbours
+
+        # bitmask removing the ressource of each port, for balanced ports
+        self.port_masks = tuple(
+            ~(1 << RESSOURCES.index(res)) if res in RESSOURCES else -1
+            for (x, y, res, o) in layout.ports
+        )
+        port_forbidden = [0] * len(layout)
+        self.port_rules = ()
+        if options["Balanced_ports"]:
+            self.port_rules = tuple(zip(self.port_masks, self.port_neighbours))
+            for mask, neighbours in self.port_rules:
+                for j in neighbours:
+                    port_forbidden[j] |= ~mask & ALL_RESSOURCES
+        self.port_forbidden = tuple(port_forbidden)
+
+        # number of tiles of each ressource code, and of each number (the 7
+        # of the deserts included)
+        self.res_counts = tuple(layout.deck.count(res) for res in RESSOURCES)
+        self.num_counts = tuple(
+            layout.numbers.count(n) if n != 7 else self.res_counts[DESERT]
+            for n in range(13)
+        )
+        self.res_domain = sum(1 << res for res, count in enumerate(self.res_counts) if count)
+        self.num_domain = sum(
+            1 << n for n, count in enumerate(self.num_counts) if count and n != 7
+        )
+        if options["Number_repeats"] and not number_repeats_possible(
+            self.res_counts, self.num_counts, more_players
+        ):
+            raise ValueError(
+                "Number_repeats cannot hold on this layout (too many tiles of "
+                "a ressource, or of a number), it must be turned off"
+            )
+
+        # clusters: all ressources with Ressource_clusters, else the deserts
+        # (their 7 cannot touch) with Number_clusters
+        if options["Ressource_clusters"]:
+            self.cluster_rules = ("ressource_clusters",) * len(RESSOURCES)
+            self.same_neighbour_limits = tuple(MAX_SAME_NEIGHBOURS)
+        else:
+            desert = "number_clusters" if options["Number_clusters"] else None
+            self.cluster_rules = (None,) * DESERT + (desert,)
+            self.same_neighbour_limits = (6,) * DESERT + (0 if desert else 6,)
+
+        # numbers: clusters remove the number (or both 6 and 8) from the
+        # neighbours, repeats remove it from the tiles of the same ressource,
+        # and for 3-4 players, a 6 or 8 removes both
+        self.neighbour_masks = tuple(
+            sum(1 << other for other in CLASHES[n]) if options["Number_clusters"] else 0
+            for n in range(13)
+        )
+        if more_players:
+            self.same_ressource_clashes = tuple((n,) for n in range(13))
+        else:
+            self.same_ressource_clashes = CLASHES
+        self.ressource_rules = (None,) * 13
+        if options["Number_repeats"]:
+            self.ressource_rules = tuple(
+                (MASK_68, "six_eight")
+                if n in SIX_EIGHT and not more_players
+                else (1 << n, "number_repeats")
+                for n in range(13)
+            )
+        self.six_eight_needed = more_players and options["Number_repeats"]
+
+
+@lru_cache(maxsize=64)
+def compile_plan(options, layout):
+    """The ConstraintPlan of an options key (see options_key) and a Layout."""
+    return ConstraintPlan(options, layout)
+
+
+def number_repeats_possible(res_counts, num_counts, more_players):
+    # each ressource gets distinct numbers, so at most one of each number,
+    # and at most one 6 or 8 (at least one, for 5-6 players)
+    ressources = sum(1 for count in res_counts[:DESERT] if count)
+    numbers = [count for n, count in enumerate(num_counts) if n != 7]
+    six_eight = num_counts[6] + num_counts[8]
+    if more_players:
+        six_eight_possible = ressources <= six_eight
+    else:
+        six_eight_possible = six_eight <= ressources
+    return (
+        max(res_counts[:DESERT]) <= sum(1 for count in numbers if count)
+        and max(numbers) <= ressources
+        and six_eight_possible
+    )
+
+
+def neighbours_of(x, y):
+    return [(x + dx, y + dy) for (dx, dy) in BoardGenerator.relative_neighbours]
+
+
+class BoardGenerator:
+    """Generate boards for a given set of options.
+
+    The generator only holds the options and the board layout (the standard
+    one of More_players, unless a Layout is given), every board is solved on
+    its own list of tiles, so one generator can be shared to produce any
+    number of boards.
+
+    Boards are solved by a wave function collapse (res_wfc and num_wfc), or
+    with engine="swap" by a local search (res_swap and num_swap). Without an
+    engine, layouts of LARGE_LAYOUT tiles or more use the local search: the
+    number phase of the collapse needs more and more restarts as the board
+    grows (seconds for 331 tiles, over a minute for 721), where the local
+    search stays about linear.
+    """
+
+    relative_neighbours = NEIGHBOUR_DIRECTIONS
+
+    # list of ressources
+    ressource_list = RESSOURCES
+
+    # number of backtracks after which a wave function collapse gives up and
+    # starts again from scratch, to avoid exploring a dead end for too long
+    max_backtracks = 10
+
+    # swaps (per tile) after which the local search gives up and starts
+    # again from a new shuffle, and the share of its swaps made at random
+    max_swaps_per_tile = 20
+    random_swaps = 0.1
+
+    def __init__(
+        self, options=None, seed=None, record_stats=True, layout=None, engine=None,
+        weighted_collapse=False,
+    ):
+        self.options = dict(DEFAULT_OPTIONS)
+        if options is not None:
+            self.options.update(options)
+
+        # random number generator of the solver, used unless one is given
+        # when generating (e.g. one per thread sharing this generator)
+        self.rng = r.Random(seed)
+
+        # whether boards get the SolverStats of their generation
+        self.record_stats = record_stats
+
+        # whether the wave function collapse tries the options of a tile in
+        # proportion to their copies left in the deck, rather than uniformly
+        self.weighted_collapse = weighted_collapse
+
+        # where the tiles and ports are, and the decks, the standard ones
+        # unless another layout is given
+        if layout is None:
+            layout = Layout.standard(self.options["More_players"])
+        self.layout = layout
+        self.tile_centers = list(layout.tile_centers)
+
+        # the solver used unless another one is given when generating, one
+        # of ENGINES, by default the one suiting the size of the layout
+        if engine is None:
+            engine = "wfc" if len(layout) < LARGE_LAYOUT else "swap"
+        self.engine = check_engine(engine)
+
+        # ports: x, y, ressource, orientation (0 if first (counting anti-clockwise) port is top, +1 for each anti-clockwise step)
+        self.ports = list(layout.ports)
+
+        # the rules of the options on the layout, compiled once for all the
+        # generators of the same options and layout
+        self.plan = plan = compile_plan(options_key(self.options), layout)
+        self.tile_neighbours = plan.tile_neighbours
+        self.port_neighbours = plan.port_neighbours
+        self.port_masks = plan.port_masks
+        self.res_counts = list(plan.res_counts)
+        self.num_counts = list(plan.num_counts)
+
+    def get_deck(self):
+        # the deck of ressources to use
+        return list(self.layout.deck)
+
+    def get_nums(self, deck):
+        # the deck of numbers to use, with the 7 on the desert tiles
+        numbers = iter(self.layout.numbers)
+        return [7 if res == "desert" else next(numbers) for res in deck]
+
+    def get_tiles(self):
+        deck = self.get_deck()
+        numbers_deck = self.get_nums(deck)
+
+        # Generate the tiles
+        return [
+            Tile(c[0], c[1], t, n)
+            for (t, c, n) in zip(deck, self.tile_centers, numbers_deck)
+        ]
+
+    def get_neighbours(self, x, y):
+        return neighbours_of(x, y)
+
+    def generate(self, rng=None, budget=None, cancel=None, engine=None):
+        """Generate a board.
+
+        budget is a time limit in seconds, after which GenerationTimeout is
+        raised. cancel is an object with an is_set method, like a
+        threading.Event: GenerationCancelled is raised once it is set. Both
+        are checked between attempts of the solver. engine is one of ENGINES,
+        the one of the generator by default.
+        """
+        if rng is None:
+            rng = self.rng
+        engine = self.engine if engine is None else check_engine(engine)
+        deadline = None if budget is None else time.monotonic() + budget
+
+        # what the solver did, see SolverStats
+        stats = SolverStats() if self.record_stats else None
+        ressources, numbers = self.shuffle_and_check(rng, stats, deadline, cancel, engine)
+
+        board = self.make_board(ressources, numbers)
+        board.stats = stats
+        return board
+
+    def generate_many(self, n, rng=None, engine=None):
+        return [self.generate(rng, engine=engine) for _ in range(n)]
+
+    def make_board(self, ressources, numbers):
+        """Build a Board from the ressource code and the number of each tile."""
+        tiles = [
+            Tile(c[0], c[1], self.ressource_list[res], int(num))
+            for (c, res, num) in zip(self.tile_centers, ressources, numbers)
+        ]
+        return Board(tiles, self.ports, self.options, self.layout)
+
+    def per_tile(self, value, typecode):
+        # a value for each tile, for the state of the solver: the state is
+        # copied at every collapse, lists are faster to work on but arrays
+        # (of typecode) faster to copy, which wins on large layouts
+        if len(self.tile_centers) < LARGE_LAYOUT:
+            return [value] * len(self.tile_centers)
+        return array(typecode, [value]) * len(self.tile_centers)
+
+    def shuffle_and_check(self, rng, stats, deadline=None, cancel=None, engine="wfc"):
+        # the solved board, as ressource codes and numbers for each tile
+        ressources = self.per_tile(-1, "b")
+        numbers = self.per_tile(-1, "b")
+
+        if engine == "swap":
+            res_phase, num_phase = "res_swap", "num_swap"
+            res_solve, num_solve = self.res_swap, self.num_swap
+        else:
+            res_phase, num_phase = "res_wfc", "num_wfc"
+            res_solve, num_solve = self.res_wfc, self.num_wfc
+
+        # ressources first, until a valid board is found
+        start = time.perf_counter()
+        while not res_solve(ressources, rng, stats):
+            if stats is not None:
+                stats["res_restarts"] += 1
+            check_interrupted(deadline, cancel)
+
+        # then numbers
+        middle = time.perf_counter()
+        while not num_solve(ressources, numbers, rng, stats):
+            if stats is not None:
+                stats["num_restarts"] += 1
+            check_interrupted(deadline, cancel)
+
+        if stats is not None:
+            end = time.perf_counter()
+            stats.times[res_phase] += middle - start
+            stats.times[num_phase] += end - middle
+        return ressources, numbers
+
+    def res_wfc(self, ressources, rng, stats=None):
+        # setup: all tiles get options set to the ressources of the deck, as a
+        # bitmask of ressource codes
+        domains = self.per_tile(self.plan.res_domain, "H")
+        ressources[:] = self.per_tile(-1, "b")
+
+        board_res_options = self.res_counts.copy()
+
+        # balanced ports
+        for mask, neighbours in self.plan.port_rules:
+            # remove ressource option from the neighbouring tiles
+            for j in neighbours:
+                domains[j] &= mask
+                if not domains[j]:
+                    return contradiction(stats, "balanced_ports")
+
+        # tiles that can still get each ressource, as a bitmask of tile indices
+        tiles_with = [
+            sum(1 << i for i, d in enumerate(domains) if d >> res & 1)
+            for res in range(len(self.ressource_list))
+        ]
+        for res, count in enumerate(board_res_options):
+            if popcount(tiles_with[res]) < count:
+                return contradiction(stats, "balanced_ports")
+
+        by_count = tiles_by_count(domains, len(self.ressource_list))
+
+        def save():
+            return (
+                domains[:], ressources[:], tiles_with.copy(),
+                board_res_options.copy(), by_count.copy(),
+            )
+
+        def restore(state):
+            domains[:], ressources[:], tiles_with[:], board_res_options[:], by_count[:] = state
+
+        def collapse(idx, res):
+            return self.res_propagate(
+                domains, ressources, tiles_with, board_res_options, by_count, idx, res,
+                stats,
+            )
+
+        return self.backtrack(
+            rng, domains, by_count, save, restore, collapse, stats, "res_backtracks",
+            board_res_options if self.weighted_collapse else None,
+        )
+
+    def res_propagate(
+        self, domains, ressources, tiles_with, board_res_options, by_count, idx, res,
+        stats=None,
+    ):
+        """Give the ressource res to the tile idx, and propagate the constraints.
+
+        The tiles to collapse are kept in a worklist: the one chosen, then the
+        ones left with a single option. Each collapse only visits the tiles it
+        affects: the tiles that could still take the ressource once the deck
+        runs out of it, and the tiles around the cluster it joins.
+
+        by_count, the tiles left by number of options (see tiles_by_count),
+        is kept up to date along the domains.
+        """
+        cluster_rules = self.plan.cluster_rules
+        worklist = [(idx, res)]
+        while worklist:
+            idx, res_col = worklist.pop()
+            bit = 1 << res_col
+            tile_bit = 1 << idx
+
+            ressources[idx] = res_col
+            if stats is not None:
+                stats.counters["collapses"] += 1
+
+            # the tile is not available for its other options any more
+            affected = domains[idx]
+            for res in OPTIONS[affected]:
+                tiles_with[res] &= ~tile_bit
+            by_count[POPCOUNT[affected]] &= ~tile_bit
+            domains[idx] = 0
+
+            # remove ressource that was chosen from deck,
+            board_res_options[res_col] -= 1
+
+            # tiles losing the option: all tiles if this ressource is not in
+            # the deck anymore, the ones that would make the cluster too large
+            # (for the deserts without Ressource_clusters, as their 7 cannot
+            # touch either)
+            removed = []
+            if board_res_options[res_col] == 0:
+                removed = [(j, "deck") for j in options_of(tiles_with[res_col])]
+            elif cluster_rules[res_col] is not None:
+                removed = [
+                    (j, cluster_rules[res_col])
+                    for j in self.cluster_limits(ressources, tiles_with[res_col], idx)
+                ]
+
+            for j, constraint in removed:
+                if not tiles_with[res_col] >> j & 1:
+                    continue
+                j_bit = 1 << j
+                tiles_with[res_col] &= ~j_bit
+                domain = domains[j]
+                by_count[POPCOUNT[domain]] &= ~j_bit
+                domain &= ~bit
+                domains[j] = domain
+                if stats is not None:
+                    stats.counters["propagations"] += 1
+                if not domain:
+                    return contradiction(stats, constraint)
+                by_count[POPCOUNT[domain]] |= j_bit
+                if not domain & (domain - 1):
+                    worklist.append((j, domain.bit_length() - 1))
+
+            # pigeonhole: enough tiles left for what remains in the deck
+            for res in OPTIONS[affected]:
+                if board_res_options[res] and popcount(tiles_with[res]) < board_res_options[res]:
+                    return contradiction(stats, "deck")
+
+        return True
+
+    def cluster_limits(self, ressources, candidates, idx):
+        # tiles among candidates (a bitmask of tile indices) that cannot get
+        # the ressource of idx any more, as the cluster of this ressource
+        # they would join (or merge) would become larger than allowed
+        res = ressources[idx]
+        max_size = MAX_CLUSTER_SIZE[res]
+        cluster = self.cluster(ressources, idx)
+
+        around = {
+            j
+            for i in cluster
+            for j in self.tile_neighbours[i]
+            if candidates >> j & 1
+        }
+        if len(cluster) == max_size:
+            return around
+
+        too_large = []
+        for j in around:
+            # size of the cluster if j got the ressource
+            merged = set()
+            for k in self.tile_neighbours[j]:
+                if ressources[k] == res and k not in merged:
+                    merged |= self.cluster(ressources, k)
+            if len(merged) + 1 > max_size:
+                too_large.append(j)
+        return too_large
+
+    def cluster(self, ressources, idx):
+        # collapsed tiles of the same ressource connected to idx
+        res = ressources[idx]
+        cluster = {idx}
+        stack = [idx]
+        while stack:
+            i = stack.pop()
+            for j in self.tile_neighbours[i]:
+                if ressources[j] == res and j not in cluster:
+                    cluster.add(j)
+                    stack.append(j)
+        return cluster
+
+    def num_wfc(self, ressources, numbers, rng, stats=None):
+        # setup: all tiles get options set to the numbers of the deck, as a
+        # bitmask of numbers
+        domains = self.per_tile(self.plan.num_domain, "H")
+        numbers[:] = self.per_tile(-1, "b")
+
+        # desert is collapsed into 7
+        for i, res in enumerate(ressources):
+            if res == DESERT:
+                domains[i] = 0
+                numbers[i] = 7
+
+        board_num_options = self.num_counts.copy()
+
+        # tiles that can still get each number, as a bitmask of tile indices
+        free = sum(1 << i for i, num in enumerate(numbers) if num < 0)
+        tiles_with = [free if self.plan.num_domain >> num & 1 else 0 for num in range(13)]
+
+        # indices of the tiles of each ressource
+        ressource_tiles = [[] for res in self.ressource_list]
+        for i, res in enumerate(ressources):
+            ressource_tiles[res].append(i)
+
+        by_count = tiles_by_count(domains, POPCOUNT[ALL_NUMBERS])
+
+        def save():
+            return (
+                domains[:], numbers[:], tiles_with.copy(),
+                board_num_options.copy(), by_count.copy(),
+            )
+
+        def restore(state):
+            domains[:], numbers[:], tiles_with[:], board_num_options[:], by_count[:] = state
+
+        def collapse(idx, num):
+            return self.num_propagate(
+                domains, ressources, numbers, tiles_with, board_num_options,
+                ressource_tiles, by_count, idx, num, stats,
+            )
+
+        return self.backtrack(
+            rng, domains, by_count, save, restore, collapse, stats, "num_backtracks",
+            board_num_options if self.weighted_collapse else None,
+        )
+
+    def num_propagate(
+        self, domains, ressources, numbers, tiles_with, board_num_options,
+        ressource_tiles, by_count, idx, num, stats=None,
+    ):
+        """Give the number num to the tile idx, and propagate the constraints.
+
+        Works like res_propagate, with a worklist of the tiles to collapse.
+        """
+        plan = self.plan
+        worklist = [(idx, num)]
+        while worklist:
+            idx, n_col = worklist.pop()
+            bit = 1 << n_col
+            tile_bit = 1 << idx
+
+            numbers[idx] = n_col
+            if stats is not None:
+                stats.counters["collapses"] += 1
+
+            # the tile is not available for its other options any more
+            affected = domains[idx]
+            for num in OPTIONS[affected]:
+                tiles_with[num] &= ~tile_bit
+            by_count[POPCOUNT[affected]] &= ~tile_bit
+            domains[idx] = 0
+
+            # remove number that was chosen from number deck,
+            board_num_options[n_col] -= 1
+
+            # tiles losing options: (tiles, options removed, constraint)
+            removed = []
+
+            # all tiles if this number is not in the deck anymore
+            if board_num_options[n_col] == 0:
+                removed.append((options_of(tiles_with[n_col]), bit, "deck"))
+
+            # remove number from neighbouring tiles' options,
+            # and both 6 and 8 if the number is one of them
+            if plan.neighbour_masks[n_col]:
+                removed.append(
+                    (self.tile_neighbours[idx], plan.neighbour_masks[n_col], "number_clusters")
+                )
+
+            # remove number from same ressource tiles' options
+
+            # handling 6 and 8
+            # for 3-4 player games, each ressource can have at most one 6 or one 8
+            # for 5-6 player games, each ressource has at most one 6 and one 8
+            # as soon as one ressource gets both picked, then the others can have at most one
+            # effectivelly, exactly one
+            rule = plan.ressource_rules[n_col]
+            if rule is not None:
+                removed.append((ressource_tiles[ressources[idx]], *rule))
+
+            for tiles, mask, constraint in removed:
+                for j in tiles:
+                    # collapsed tiles have no options left
+                    domain = domains[j]
+                    options = domain & mask
+                    if not options:
+                        continue
+                    j_bit = 1 << j
+                    by_count[POPCOUNT[domain]] &= ~j_bit
+                    domain ^= options
+                    domains[j] = domain
+                    affected |= options
+                    for num in OPTIONS[options]:
+                        tiles_with[num] &= ~j_bit
+                    if stats is not None:
+                        stats.counters["propagations"] += 1
+                    if not domain:
+                        return contradiction(stats, constraint)
+                    by_count[POPCOUNT[domain]] |= j_bit
+                    if not domain & (domain - 1):
+                        worklist.append((j, domain.bit_length() - 1))
+
+            # pigeonhole: enough tiles left for what remains in the deck
+            for num in OPTIONS[affected]:
+                if board_num_options[num] and popcount(tiles_with[num]) < board_num_options[num]:
+                    return contradiction(stats, "deck")
+
+            if plan.six_eight_needed and not self.six_eight_available(
+                numbers, tiles_with, board_num_options, ressource_tiles
+            ):
+                return contradiction(stats, "six_eight")
+
+        return True
+
+    def six_eight_available(self, numbers, tiles_with, board_num_options, ressource_tiles):
+        # in 5-6 player games, each ressource gets at least one 6 or 8: each
+        # ressource without one needs a tile that can still get one, and
+        # there must be enough 6 and 8 left for all of them
+        can_get_68 = tiles_with[6] | tiles_with[8]
+        missing = 0
+        for res in range(DESERT):
+            if any(numbers[i] in SIX_EIGHT for i in ressource_tiles[res]):
+                continue
+            if not any(can_get_68 >> i & 1 for i in ressource_tiles[res]):
+                return False
+            missing += 1
+        return missing <= board_num_options[6] + board_num_options[8]
+
+    def backtrack(
+        self, rng, domains, by_count, save, restore, collapse, stats, counter,
+        weights=None,
+    ):
+        """Collapse all tiles, undoing the last collapses on contradictions.
+
+        Every collapse pushes the state before it on a stack, with the options
+        of the collapsed tile that were not tried yet. On contradiction, the
+        most recent collapse with options left is undone and retried with the
+        next option. Returns False (so the caller restarts from scratch) when
+        the search is exhausted, or took more than `max_backtracks` backtracks.
+        The propagation enforces every constraint, so a complete board is
+        always valid.
+
+        The next tile is taken from by_count (see tiles_by_count), so picking
+        it does not scan all the tiles. Its options are tried in a random
+        order, drawn in proportion to weights (the copies left in the deck)
+        when given.
+        """
+        # the stack storing the changes applied, to backtrack in case there
+        # is no valid options left: (tile index, options left to try, saved state)
+        stack = []
+        nb_backtracks = 0
+
+        consistent = True
+        while True:
+
+            if not consistent:
+                # undo collapses until one has options left to try
+                while stack and not stack[-1][1]:
+                    stack.pop()
+                if not stack or nb_backtracks >= self.max_backtracks:
+                    return False
+
+                nb_backtracks += 1
+                if stats is not None:
+                    stats.counters[counter] += 1
+
+                idx, options_left, state = stack[-1]
+                restore(state)
+                consistent = collapse(idx, options_left.pop())
+                continue
+
+            # pick the tile with the least options (from non-collapsed
+            # tiles), the first non-empty bucket of by_count
+            for tiles in by_count:
+                if tiles:
+                    break
+            else:
+                return True
+
+            idx = nth_bit(tiles, rng.randrange(popcount(tiles)))
+
+            # collapse it, in a random order of its options
+            options = OPTIONS[domains[idx]].copy()
+            if weights is None:
+                rng.shuffle(options)
+            else:
+                options = weighted_order(rng, options, weights)
+            stack.append((idx, options[1:], save()))
+            consistent = collapse(idx, options[0])
+
+    def res_swap(self, ressources, rng, stats=None):
+        """Place the ressources by local search, from a shuffled deck.
+
+        Tiles breaking a rule are swapped with tiles of another ressource,
+        most of the time the one breaking the fewest rules once swapped
+        (counting the tiles around both), sometimes a random one to get out
+        of local minima. Returns False (so the caller starts again from a new
+        shuffle) after max_swaps_per_tile swaps per tile.
+        """
+        n = len(self.tile_centers)
+        neighbours = self.tile_neighbours
+        forbidden = self.plan.port_forbidden
+        limits = self.plan.same_neighbour_limits
+
+        res = [code for code, count in enumerate(self.res_counts) for _ in range(count)]
+        rng.shuffle(res)
+
+        # counts[6 * k + s]: neighbours of the tile k with the ressource s
+        counts = [0] * (6 * n)
+        for k in range(n):
+            for m in neighbours[k]:
+                counts[6 * k + res[m]] += 1
+
+        def cost(k, s):
+            # rules broken at the tile k if it had the ressource s: too many
+            # neighbours of the same ressource, and a port of this ressource
+            return max(0, counts[6 * k + s] - limits[s]) + (forbidden[k] >> s & 1)
+
+        def place(k, s):
+            old = res[k]
+            for m in neighbours[k]:
+                counts[6 * m + old] -= 1
+                counts[6 * m + s] += 1
+            res[k] = s
+
+        costs = [cost(k, res[k]) for k in range(n)]
+        total = sum(costs)
+        broken = sum(1 << k for k in range(n) if costs[k])
+
+        for _ in range(self.max_swaps_per_tile * n):
+            if not total:
+                for k, s in enumerate(res):
+                    ressources[k] = s
+                return True
+
+            i = nth_bit(broken, rng.randrange(popcount(broken)))
+            a = res[i]
+            others = [j for j in range(n) if res[j] != a]
+            if not others:
+                return False
+
+            if rng.random() < self.random_swaps:
+                j = rng.choice(others)
+            else:
+                # change of the cost of the tile i, and of the tiles around
+                # it, if it got each ressource (ignoring the other tile of
+                # the swap, when they are close)
+                lost = sum(
+                    counts[6 * m + a] > limits[a] for m in neighbours[i] if res[m] == a
+                )
+                change_i = [
+                    cost(i, b) - costs[i] - lost + sum(
+                        counts[6 * m + b] >= limits[b] for m in neighbours[i] if res[m] == b
+                    )
+                    for b in range(len(self.ressource_list))
+                ]
+
+                best, best_change = [], None
+                for j in others:
+                    b = res[j]
+                    change = change_i[b] + cost(j, a) - costs[j]
+                    for m in neighbours[j]:
+                        if res[m] == b:
+                            change -= counts[6 * m + b] > limits[b]
+                        elif res[m] == a:
+                            change += counts[6 * m + a] >= limits[a]
+                    if best_change is None or change < best_change:
+                        best, best_change = [j], change
+                    elif change == best_change:
+                        best.append(j)
+                j = rng.choice(best)
+
+            place(i, res[j])
+            place(j, a)
+            if stats is not None:
+                stats.counters["swaps"] += 1
+
+            for k in {i, j, *neighbours[i], *neighbours[j]}:
+                c = cost(k, res[k])
+                total += c - costs[k]
+                costs[k] = c
+                if c:
+                    broken |= 1 << k
+                else:
+                    broken &= ~(1 << k)
+
+        return False
+
+    def num_swap(self, ressources, numbers, rng, stats=None):
+        """Place the numbers by local search, like res_swap.
+
+        The rules are counted by pairs of tiles (neighbours with clashing
+        numbers, tiles of a ressource with the same number), plus the
+        ressources missing a 6 or 8 for 5-6 players, so the change a swap
+        makes is computed without making it.
+        """
+        n = len(self.tile_centers)
+        neighbours = self.tile_neighbours
+        clusters = self.options["Number_clusters"]
+        repeats = self.options["Number_repeats"]
+
+        # numbers the tiles of a ressource cannot share: the same, and for 3-4
+        # players, a 6 and an 8
+        same_ressource = self.plan.same_ressource_clashes
+
+        # ressources that need a 6 or an 8, for 5-6 players
+        needing_68 = []
+        if self.plan.six_eight_needed:
+            needing_68 = [res for res in range(DESERT) if self.res_counts[res]]
+
+        res = list(ressources)
+        tiles = [k for k in range(n) if res[k] != DESERT]
+        nums = [7] * n
+        deck = [num for num in range(13) if num != 7 for _ in range(self.num_counts[num])]
+        rng.shuffle(deck)
+        for k, num in zip(tiles, deck):
+            nums[k] = num
+
+        # tiles of each ressource, as bitmasks of tile indices
+        ressource_bits = [0] * len(self.ressource_list)
+        for k in tiles:
+            ressource_bits[res[k]] |= 1 << k
+        neighbour_bits = [sum(1 << m for m in neighbours[k]) for k in range(n)]
+
+        # near[13 * k + num]: neighbours of the tile k with the number num
+        # held[13 * s + num]: tiles of the ressource s with the number num
+        near = [0] * (13 * n)
+        held = [0] * (13 * len(self.ressource_list))
+        for k in range(n):
+            held[13 * res[k] + nums[k]] += 1
+            for m in neighbours[k]:
+                near[13 * k + nums[m]] += 1
+
+        def clashes(k, num):
+            # tiles clashing with the tile k if it had the number num
+            c = 0
+            if clusters:
+                for other in CLASHES[num]:
+                    c += near[13 * k + other]
+            if repeats:
+                for other in same_ressource[num]:
+                    c += held[13 * res[k] + other]
+                # not counting the tile itself
+                c -= nums[k] in same_ressource[num]
+            return c
+
+        def missing(s):
+            return held[13 * s + 6] + held[13 * s + 8] == 0
+
+        def place(k, num):
+            old = nums[k]
+            for m in neighbours[k]:
+                near[13 * m + old] -= 1
+                near[13 * m + num] += 1
+            held[13 * res[k] + old] -= 1
+            held[13 * res[k] + num] += 1
+            nums[k] = num
+
+        costs = [clashes(k, nums[k]) if res[k] != DESERT else 0 for k in range(n)]
+        # clashing pairs (counted from both tiles) and ressources without a
+        # 6 or 8
+        pairs = sum(costs)
+        broken = sum(1 << k for k in tiles if costs[k])
+        unmet = [s for s in needing_68 if missing(s)]
+
+        for _ in range(self.max_swaps_per_tile * n):
+            if not pairs and not unmet:
+                for k, num in enumerate(nums):
+                    numbers[k] = num
+                return True
+
+            candidates = broken
+            for s in unmet:
+                candidates |= ressource_bits[s]
+            i = nth_bit(candidates, rng.randrange(popcount(candidates)))
+            a, res_i = nums[i], res[i]
+            others = [j for j in tiles if nums[j] != a]
+
+            if rng.random() < self.random_swaps:
+                j = rng.choice(others)
+            else:
+                clashes_i = {}
+                best, best_change = [], None
+                for j in others:
+                    b = nums[j]
+                    if b not in clashes_i:
+                        clashes_i[b] = clashes(i, b)
+                    # change in clashing pairs
+                    change = clashes_i[b] + clashes(j, a) - costs[i] - costs[j]
+                    if clusters and neighbour_bits[i] >> j & 1:
+                        change += 2 * ((b in CLASHES[a]) - 1)
+                    if repeats and res[j] == res_i:
+                        change += 2 * ((b in same_ressource[a]) - 1)
+                    if needing_68 and res[j] != res_i and (a in SIX_EIGHT) != (b in SIX_EIGHT):
+                        # a 6 or 8 moves from one ressource to the other
+                        giving, getting = (res_i, res[j]) if a in SIX_EIGHT else (res[j], res_i)
+                        change += (
+                            (held[13 * giving + 6] + held[13 * giving + 8] == 1)
+                            - missing(getting)
+                        )
+                    if best_change is None or change < best_change:
+                        best, best_change = [j], change
+                    elif change == best_change:
+                        best.append(j)
+                j = rng.choice(best)
+
+            place(i, nums[j])
+            place(j, a)
+            if stats is not None:
+                stats.counters["swaps"] += 1
+
+            affected = {i, j, *neighbours[i], *neighbours[j]}
+            if repeats:
+                affected.update(options_of(ressource_bits[res_i] | ressource_bits[res[j]]))
+            for k in affected:
+                if res[k] == DESERT:
+                    continue
+                c = clashes(k, nums[k])
+                pairs += c - costs[k]
+                costs[k] = c
+                if c:
+                    broken |= 1 << k
+                else:
+                    broken &= ~(1 << k)
+            unmet = [s for s in needing_68 if missing(s)]
+
+        return False
+
+    def ressource_neighbours(self, tiles):
+        return [
+            len([j for j in self.tile_neighbours[i] if tiles[j].ressource == t.ressource])
+            for i, t in enumerate(tiles)
+        ]
+
+    def check_ressource_clusters(self, tiles):
+        nb_neighbours = self.ressource_neighbours(tiles)
+        valid = [
+            n <= MAX_SAME_NEIGHBOURS[self.ressource_list.index(t.ressource)]
+            for (t, n) in zip(tiles, nb_neighbours)
+        ]
+        return valid
+
+    def check_ports(self, tiles):
+
+        valid = [True] * len(self.ports)
+        for i, (p, neighbours) in enumerate(zip(self.ports, self.port_neighbours)):
+            same_type_neighbours = [j for j in neighbours if tiles[j].ressource == p[2]]
+            valid[i] = valid[i] & (len(same_type_neighbours)== 0)
+        return(valid)
+
+    def check_number_clusters(self, tiles):
+        valid = [True] * len(tiles)
+        for i, t in enumerate(tiles):
+            neighbours_nums = [tiles[j].number for j in self.tile_neighbours[i]]
+
+            # check that no same numbers are touching
+            valid[i] = valid[i] & (t.number not in neighbours_nums)
+
+            # check that no 6 and 8 are adjacent
+            if t.number in SIX_EIGHT:
+                valid[i] = valid[i] & (6 not in neighbours_nums) & (8 not in neighbours_nums)
+
+        return valid
+
+    def check_number_repeats(self, tiles):
+        deck = [t.ressource for t in tiles]
+        numbers_deck = [t.number for t in tiles]
+
+        valid = [True] * len(self.ressource_list[:-1])
+
+        # For all ressources (except desert), check that there is no repeat
+        # For 5/6 players, at most one repeat
+        for i, r in enumerate(self.ressource_list[:-1]):
+            ress_idx = where(deck, r)
+            ress_nums = [numbers_deck[j] for j in ress_idx]
+            unique_nums = list(set(ress_nums))
+            count_nums = [ress_nums.count(e) for e in unique_nums]
+
+            valid[i] = valid[i] & (
+                sum(count_nums) <= len(unique_nums) + 1 * self.options["More_players"]
+            )
+
+            # Conditions for 6 and 8
+
+            ress_6_count = sum([ress_nums.count(e) for e in unique_nums if e == 6])
+            ress_8_count = sum([ress_nums.count(e) for e in unique_nums if e == 8])
+
+            # there can only be at most one of either for 3-4 player boards,
+            if not self.options["More_players"]:
+                valid[i] = valid[i] & (ress_6_count + ress_8_count <= 1)
+
+            # and at least one, or both (but not twice the same) for 5-6 player boards
+            else:
+                valid[i] = (
+                    valid[i]
+                    & (ress_6_count + ress_8_count >= 1)
+                    & (ress_6_count <= 1)
+                    & (ress_8_count <= 1)
+                )
+
+        return valid
+
+
+class Tile:
+    __slots__ = ("x", "y", "coords", "ressource", "number")
+
+    # the possible colors, matching the ressource type
+    colors = {
+        "brick": "coral",
+        "wood": "forestgreen",
+        "sheep": "palegreen",
+        "wheat": "gold",
+        "stone": "slategrey",
+        "desert": "peachpuff",
+    }
+
+    # coordinates of the corners
+    # in hex grid coordinates:
+    corners = [
+        (1 / 3, 1 / 3),
+        (-1 / 3, 2 / 3),
+        (-2 / 3, 1 / 3),
+        (-1 / 3, -1 / 3),
+        (1 / 3, -2 / 3),
+        (2 / 3, -1 / 3),
+    ]
+
+    relative_neighbours = NEIGHBOUR_DIRECTIONS
+
+    def __init__(
+        self, x: int = 0, y: int = 0, ressource: str = "desert", number: int = None
+    ):
+
+        # store x, y (hex coordinates)
+        self.x, self.y = x, y
+        self.coords = (self.x, self.y)
+
+        # store ressource
+        self.ressource = ressource
+
+        # store number
+        self.number = number
+
+    def neighbours(self):
+        return [(i[0] + self.x, i[1] + self.y) for i in self.relative_neighbours]
+
+
+def contradiction(stats, constraint):
+    # a tile was left without options by the propagation of a constraint
+    if stats is not None:
+        stats.contradictions[constraint] += 1
+    return False
+
+
+def check_engine(engine):
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, must be one of {ENGINES}")
+    return engine
+
+
+def check_interrupted(deadline, cancel):
+    if cancel is not None and cancel.is_set():
+        raise GenerationCancelled()
+    if deadline is not None and time.monotonic() > deadline:
+        raise GenerationTimeout()
+
+
+def where(l, element):
+    return [i for i in range(len(l)) if l[i] == element]
+
+
+def options_of(mask):
+    return [i for i in range(mask.bit_length()) if mask >> i & 1]
+
+
+def nth_bit(mask, n):
+    # index of the n-th (from 0) bit set in mask, by bisection on the number
+    # of bits set below an index
+    low, high = 0, mask.bit_length()
+    while high - low > 1:
+        middle = (low + high) // 2
+        if popcount(mask & ((1 << middle) - 1)) > n:
+            high = middle
+        else:
+            low = middle
+    return low
+
+
+def weighted_order(rng, options, weights):
+    # random order of the options, each one coming first in proportion to its
+    # weight among the options left (sorting by random keys u ** (1 / w)),
+    # the weights of the options of a tile are never 0, as the propagation
+    # removes the options the deck runs out of
+    return sorted(options, key=lambda o: rng.random() ** (1 / weights[o]), reverse=True)
+
+
+def tiles_by_count(domains, max_count):
+    # tiles left to collapse (with options) by number of options, as bitmasks
+    # of tile indices: the buckets the solver picks the next tile from, kept
+    # up to date by the propagation as options are removed
+    by_count = [0] * (max_count + 1)
+    for i, domain in enumerate(domains):
+        if domain:
+            by_count[POPCOUNT[domain]] |= 1 << i
+    return by_count
+
+
+# number of bits set in a bitmask of tile indices (int.bit_count needs
+# Python 3.10)
+popcount = getattr(int, "bit_count", lambda mask: bin(mask).count("1"))
@@ -0,0 +1,76 @@
+"""
+Screen geometry of the boards, independent of any GUI
+
+The positions of the tiles and ports, and the offsets of the shapes drawn
+around them, only depend on the layout and the size of the canvas, so they
+are computed once for each canvas size and reused by every redraw.
+"""
+
+import math
+from functools import lru_cache
+
+from catanboardgen.generator import Tile
+
+
+# directions of the corners of a tile (and of the lines of a port), in the
+# order they are drawn: n * 60 degrees from the bottom
+DIRECTIONS = [(math.sin(n * math.pi / 3), math.cos(n * math.pi / 3)) for n in range(6)]
+
+# the possible colors of the ports, matching their ressource
+PORT_COLORS = {**Tile.colors, "None": "white"}
+del PORT_COLORS["desert"]
+
+
+def tile_size_for(min_size, layout):
+    # set size of tile based on the size of the canvas
+    return max(min_size - 15, 2) // layout.screen_size
+
+
+class BoardGeometry:
+    """Screen coordinates of a Layout, for one canvas size.
+
+    - tiles: (x, y) of the center of each tile
+    - ports: (x, y, ressource, orientation) of each port
+    - hex_corners: offsets of the corners of a tile, from its center
+    - port_lines: for each orientation, offsets of the ends of the two lines
+      joining a port to the tile
+
+    The tile size follows from the canvas size, unless it is given.
+    """
+
+    def __init__(self, layout, width, height, canvas_ratio, tile_size=None):
+        self.width, self.height = width, height
+        self.min_size = min(width, height * canvas_ratio)
+        if tile_size is None:
+            tile_size = tile_size_for(self.min_size, layout)
+        self.tile_size = tile_size
+
+        # offset, to center the board
+        offset_x, offset_y = (tile_size * o for o in layout.screen_offset)
+
+        def to_screen(q, r):
+            # convert hex grid coordinates to screen coordinates
+            return (
+                offset_x + width // 2 + 2 * tile_size * (q + math.cos(math.pi / 3) * r),
+                offset_y + height * canvas_ratio / 2 - 15
+                + 2 * tile_size * math.sin(math.pi / 3) * r,
+            )
+
+        self.tiles = [to_screen(q, r) for (q, r) in layout.tile_centers]
+        self.ports = [to_screen(q, r) + (res, o) for (q, r, res, o) in layout.ports]
+
+        self.hex_corners = [(tile_size * dx, tile_size * dy) for (dx, dy) in DIRECTIONS]
+        self.port_lines = [
+            (self.hex_corners[o], self.hex_corners[(o + 1) % 6]) for o in range(6)
+        ]
+
+        # radius of the number tokens and of the ports, and sizes of their text
+        self.token_radius = tile_size / 2
+        self.number_font_size = tile_size / 2
+        self.port_font_size = tile_size / 3
+
+
+@lru_cache(maxsize=16)
+def board_geometry(layout, width, height, canvas_ratio):
+    """The BoardGeometry of a layout, cached by layout and canvas size."""
+    return BoardGeometry(layout, width, height, canvas_ratio)
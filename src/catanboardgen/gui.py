@@ -0,0 +1,346 @@
+"""
+The toga app: the window, the switches of the options and the board canvas
+
+Only imported when the app starts (see app.main), so the generation logic
+can be used without importing toga.
+"""
+
+import asyncio
+import threading
+
+import toga
+from toga.style import Pack
+from toga.style.pack import COLUMN, ROW
+from toga.fonts import SANS_SERIF
+from toga.constants import Baseline
+from toga.colors import WHITE, rgb
+
+from catanboardgen.generator import (
+    GenerationCancelled,
+    GenerationTimeout,
+    Tile,
+    relaxed_options,
+)
+from catanboardgen.geometry import PORT_COLORS, board_geometry
+from catanboardgen.pool import BoardPool
+
+
+class CatanBoardGenerator(toga.App):
+    def startup(self):
+        """Construct and show the Toga application.
+
+        Usually, you would add your application to a main content box.
+        We then create a main window (with a name matching the app), and
+        show the main window.
+        """
+
+        #####  Initiate the window and its content  #####
+
+        self.main_window = toga.MainWindow(
+            title=self.formal_name,
+        )
+
+        # options, for the logic:
+        self.options = {
+            "More_players": False,
+            "Ressource_clusters": True,
+            "Balanced_ports": True,
+            "Number_clusters": True,
+            "Number_repeats": True,
+        }
+
+        # boards generated in the background, for the current options
+        self.pool = BoardPool()
+        self.pool.warm(self.options)
+
+        # time (in s) given to generate a board, before relaxing constraints
+        self.time_budget = 2.0
+
+        # event set to cancel the generation in progress, if any
+        self.generation_cancel = None
+
+        self.prompted_warning = False
+
+        # fonts and sizes of the texts drawn, by font size, see text_size
+        self.fonts = {}
+        self.text_sizes = {}
+
+        # initiate all the widgets
+        self.create_widgets()
+
+        # put them in a box
+        main_box = toga.Box(
+            children=[
+                self.board_canvas,
+                self.switch_scroll,
+            ],
+            style=Pack(
+                direction="column",
+                padding_top=5,
+                padding_right=5,
+                padding_bottom=5,
+                padding_left=5,
+            ),
+        )
+
+        # put box in window
+        self.main_window.content = main_box
+
+        # show the window
+        self.main_window.show()
+
+    def geometry(self):
+        # screen coordinates of the board, only computed again when the size
+        # of the window changes
+        self.width, self.height = self.main_window.size
+        return board_geometry(self.layout, self.width, self.height, self.canvas_ratio)
+
+    def text_size(self, text, font_size):
+        # fonts and text sizes, measured once for each size
+        key = (text, font_size)
+        if key not in self.text_sizes:
+            if font_size not in self.fonts:
+                self.fonts[font_size] = toga.Font(family=SANS_SERIF, size=font_size)
+            self.text_sizes[key] = self.board_canvas.measure_text(
+                text, self.fonts[font_size]
+            )
+        return self.text_sizes[key]
+
+    def draw(self):
+        self.board_canvas.context.clear()
+        geometry = self.geometry()
+        self.tile_size = geometry.tile_size
+
+        for (x, y), res, num in zip(geometry.tiles, self.deck, self.numbers_deck):
+            self.draw_hex(x, y, num, geometry, fill_color=Tile.colors[res])
+
+        for p in geometry.ports:
+            self.draw_port(p, geometry)
+
+    def draw_hex(self, x, y, num, geometry, fill_color="BLANK"):
+        edge_size = geometry.tile_size
+
+        # Drawing the actual hexagonal tile
+        with self.board_canvas.Stroke(line_width=2, color="black") as stroker:
+            with stroker.Fill(x, y + edge_size, fill_color) as filler:
+                for dx, dy in geometry.hex_corners:
+                    filler.line_to(x + dx, y + dy)
+
+        # Drawing the number token
+        if num != 7:
+            r = geometry.token_radius
+            with self.board_canvas.Fill(x, y, color="WHITE") as filler:
+                filler.ellipse(x, y, r, r)
+            with self.board_canvas.Stroke(line_width=2) as stroker:
+                stroker.arc(x, y, r)
+            c = "BLACK" * ((num != 6) & (num != 8)) + "RED" * ((num == 6) | (num == 8))
+            w, h = self.text_size(str(num), geometry.number_font_size)
+            with self.board_canvas.Fill(x, y, color=c) as text_filler:
+                text_filler.write_text(
+                    str(num),
+                    x - w / 2.0,
+                    y - h / 2.0,
+                    self.fonts[geometry.number_font_size],
+                    Baseline.TOP,
+                )
+
+    def draw_port(self, port, geometry):
+        x, y, t, o = port
+        r = geometry.token_radius
+
+        with self.board_canvas.Stroke(line_width=2) as stroker:
+                stroker.arc(x, y, r)
+
+        (x1, y1), (x2, y2) = geometry.port_lines[o % 6]
+        with self.board_canvas.Stroke(x, y, line_width = 2) as stroker:
+            stroker.line_to(x + x1, y + y1)
+            stroker.move_to(x, y)
+            stroker.line_to(x + x2, y + y2)
+        with self.board_canvas.Fill(x, y, color=PORT_COLORS[t]) as filler:
+            filler.ellipse(x, y, r, r)
+
+        if t == "None":
+            w, h = self.text_size("3:1", geometry.port_font_size)
+
+            with self.board_canvas.Fill(x, y, color="black") as text_filler:
+                text_filler.write_text(
+                    "3:1",
+                    x - w / 2.0,
+                    y - h / 2.0,
+                    self.fonts[geometry.port_font_size],
+                    Baseline.TOP,
+                )
+
+    def on_canvas_resize(self, widget, width, height, **kwargs):
+        # only redraw once a board was generated
+        if hasattr(self, "deck"):
+            self.draw()
+
+
+    async def generate_pressed(self, widget):
+        # pressing again cancels the generation in progress
+        if self.generation_cancel is not None:
+            self.generation_cancel.set()
+            return
+
+        requested = dict(self.options)
+        cancel = threading.Event()
+        self.generation_cancel = cancel
+        self.generate_button.text = "Cancel"
+        self.activity_indicator.start()
+
+        # generate in a worker thread, keeping the event loop responsive
+        loop = asyncio.get_running_loop()
+        try:
+            board, options = await loop.run_in_executor(
+                None, self.generate_board, requested, cancel
+            )
+        except GenerationCancelled:
+            return
+        finally:
+            self.generation_cancel = None
+            self.generate_button.text = "Generate board"
+            self.activity_indicator.stop()
+
+        if options != requested:
+            dropped = [
+                s.text
+                for s in self.switches
+                if options[s.id.replace("_switch", "")] != requested[s.id.replace("_switch", "")]
+            ]
+            self.main_window.info_dialog(
+                "Constraints relaxed",
+                "No board was found in time with all the options, this board "
+                "was generated without: " + ", ".join(dropped),
+            )
+
+        # keep what the drawing needs from the generated board
+        self.deck = board.deck
+        self.numbers_deck = board.numbers_deck
+        self.layout = board.layout
+
+        self.draw()
+
+    def generate_board(self, options, cancel):
+        # try with the options within the time budget, then with less and
+        # less constraints, returns the board and the options used; only the
+        # options asked for are kept in the pool
+        for opts in [options, *relaxed_options(options)]:
+            try:
+                return (
+                    self.pool.pop(opts, self.time_budget, cancel, touch=opts is options),
+                    opts,
+                )
+            except GenerationTimeout:
+                continue
+        return self.pool.pop(opts, cancel=cancel, touch=False), opts
+
+    def on_option_switch(self, widget):
+        self.options[widget.id.replace("_switch", "")] = widget.value
+        self.pool.warm(self.options)
+
+    def show_description(self, widget, **kwargs):
+        description_text = {
+            "More_players_info_button": "Bigger board for games up to 6 players",
+            "Ressource_clusters_info_button": "Prevent clusters of similar ressources. For brick and stones (and, for 5-6 players, also desert), prevents two similar tiles from touching. For wood, wheat and sheep, prevents three similar tiles from touching.",
+            "Balanced_ports_info_button": "Prevent ressourses of touching their corresponding ports.",
+            "Number_clusters_info_button": "Prevent similar numbers from being next to one another. Also prevents 6 and 8 to be next to another 6 or 8.",
+            "Number_repeats_info_button": "Prevent numbers from being twice on the same ressource. Also prevent ressources to have more than one 6 or one 8 (or, for 5-6 players, two 6 or two 8).",
+        }[widget.id]
+
+        title_text = " ".join(widget.id.split("_")[:2])
+
+        self.main_window.info_dialog(title_text, description_text)
+
+    def create_widgets(self):
+
+        # Canvas:
+
+        # set proportions relative to the screen height
+        self.canvas_prop_size = 1.8
+        self.canvas_ratio = self.canvas_prop_size / (1 + self.canvas_prop_size)
+
+        # create the canvas
+        self.board_canvas = toga.Canvas(
+            style=Pack(flex=self.canvas_prop_size),
+            on_resize=self.on_canvas_resize,
+        )
+
+        # Buttons to get a description of what the options do
+        self.description_buttons = [
+            toga.Button(
+                text="(?)",
+                on_press=self.show_description,
+                id=f"{t}_info_button",
+            )
+            for t in self.options.keys()
+        ]
+
+        # Text to display on the switches
+        switches_text = [
+            "5/6 players",
+            "No ressource clusters",
+            "Balanced ports",
+            "No number clusters",
+            "No repeating numbers",
+        ]
+
+        # All the switches
+        self.switches = [
+            toga.Switch(
+                style=Pack(flex=1),
+                text=t,
+                on_change=self.on_option_switch,
+                value=v,
+                id=f"{i}_switch",
+            )
+            for t, i, v in zip(
+                switches_text, self.options.keys(), self.options.values()
+            )
+        ]
+
+        # Pair the switches and buttons
+        self.switch_boxes = [
+            toga.Box(
+                children=[b, s],
+                style=Pack(direction="row"),
+            )
+            for (b, s) in zip(self.description_buttons, self.switches)
+        ]
+
+        # The button to generate a board
+        self.generate_button = toga.Button(
+            style=Pack(flex=1),
+            text="Generate board",
+            on_press=self.generate_pressed,
+        )
+
+        # Shown while a board is being generated
+        self.activity_indicator = toga.ActivityIndicator()
+
+        # Put all switches and button in the same box
+        self.switch_box = toga.Box(
+            children=self.switch_boxes
+            + [
+                toga.Box(
+                    children=[self.generate_button, self.activity_indicator],
+                    style=Pack(direction="row"),
+                )
+            ],
+            style=Pack(
+                direction="column",
+            ),
+        )
+
+        # Make it scrollable
+        self.switch_scroll = toga.ScrollContainer(
+            content=self.switch_box,
+            style=Pack(
+                padding_top=5,
+                padding_right=5,
+                padding_bottom=5,
+                padding_left=5,
+                flex=1,
+            ),
+            horizontal=False,
+        )
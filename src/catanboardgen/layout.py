@@ -0,0 +1,301 @@
+"""
+Board layouts: where the tiles and ports are, and what goes on the tiles
+
+A Layout holds the tile coordinates, the deck of ressources, the deck of
+numbers and the ports of a board. The generator, the renderers and the app
+work on any layout: the two standard ones (3-4 and 5-6 players), hexagons
+of any radius, or layouts loaded from a JSON file like:
+
+    {
+        "tiles": [[0, 0], [1, 0], ...],
+        "deck": {"brick": 3, "wood": 4, ...},
+        "numbers": {"2": 1, "3": 2, ...},
+        "ports": [[0, -3, "None", 0], [2, -3, "sheep", -1], ...]
+    }
+
+Coordinates are axial hex coordinates (q, r). A port is (q, r, ressource,
+orientation), the ressource being "None" for 3:1 ports, and the orientation
+n pointing to the tile at (q, r) + PORT_DIRECTIONS[n % 6].
+"""
+
+import math
+
+
+RESSOURCES = ["brick", "wood", "sheep", "wheat", "stone", "desert"]
+
+# neighbour of a port each orientation points to (counting anti-clockwise,
+# from the one below)
+PORT_DIRECTIONS = [(0, 1), (1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1)]
+
+# share of each ressource and number in the standard 3-4 player decks, used
+# to fill the decks of larger layouts
+RESSOURCE_WEIGHTS = {"brick": 3, "wood": 4, "sheep": 4, "wheat": 4, "stone": 3, "desert": 1}
+NUMBER_WEIGHTS = {2: 1, 3: 2, 4: 2, 5: 2, 6: 2, 8: 2, 9: 2, 10: 2, 11: 2, 12: 1}
+
+# kinds of the ports, in the order they are placed around generated layouts
+PORT_CYCLE = ["None", "sheep", "None", "stone", "wheat", "None", "wood", "brick", "None"]
+
+STANDARD_PORTS = [
+    [
+        (2, -3, "sheep", -1),
+        (0, -3, "None", 0),
+        (-2, -1, "stone", 1),
+        (-3, 1, "wheat", 1),
+        (-3, 3, "None", 2),
+        (-1, 3, "wood", -3),
+        (1, 2, "brick", -3),
+        (3, 0, "None", -2),
+        (3, -2, "None", -1),
+    ],
+    [
+        (2, -4, "sheep", -1),
+        (0, -4, "None", 0),
+        (-3, -1, "stone", 1),
+        (-4, 1, "None", 2),
+        (-4, 2, "wheat", 1),
+        (-4, 4, "None", 2),
+        (-2, 4, "wood", -3),
+        (0, 3, "sheep", -2),
+        (1, 2, "brick", -3),
+        (3, 0, "None", -2),
+        (3, -2, "None", -1),
+    ],
+]
+
+# (dq, dr) of the six tiles around a tile
+NEIGHBOUR_DIRECTIONS = [(1, 0), (0, 1), (-1, 1), (-1, 0), (0, -1), (1, -1)]
+
+
+class Layout:
+    """Tiles, decks and ports of a board.
+
+    - tile_centers: (q, r) of each tile
+    - deck: the ressource of each tile, before shuffling
+    - numbers: the numbers to place, without the 7 of the deserts
+    - ports: (q, r, ressource, orientation) of each port
+    - screen_size, screen_offset: width of the board in tile sizes, and
+      (x, y) shift to center it, for drawing (computed when not given)
+    - tile_neighbours, port_neighbours: indices of the tiles around each
+      tile and each port (computed)
+
+    Layouts are not meant to be changed once built: the generators and
+    renderers built from one keep what they derived from it.
+    """
+
+    def __init__(
+        self, tile_centers, deck, numbers, ports, screen_size=None, screen_offset=None,
+    ):
+        self.tile_centers = tuple((int(q), int(r)) for (q, r) in tile_centers)
+        self.deck = tuple(deck)
+        self.numbers = tuple(int(n) for n in numbers)
+        self.ports = tuple((int(q), int(r), res, int(o)) for (q, r, res, o) in ports)
+        self.check()
+
+        tile_index = {c: i for i, c in enumerate(self.tile_centers)}
+        self.tile_neighbours = tuple(
+            neighbour_indices(tile_index, q, r) for (q, r) in self.tile_centers
+        )
+        self.port_neighbours = tuple(
+            neighbour_indices(tile_index, q, r) for (q, r, res, o) in self.ports
+        )
+
+        if screen_size is None or screen_offset is None:
+            xs, ys = zip(*(
+                (2 * (q + r / 2), 2 * math.sin(math.pi / 3) * r)
+                for (q, r) in self.tile_centers + tuple(p[:2] for p in self.ports)
+            ))
+            # a port or tile reaches one tile size around its center
+            screen_size = max(max(xs) - min(xs), max(ys) - min(ys)) + 2
+            screen_offset = (-(max(xs) + min(xs)) / 2, -(max(ys) + min(ys)) / 2)
+        self.screen_size = screen_size
+        self.screen_offset = screen_offset
+
+    def check(self):
+        if len(set(self.tile_centers)) != len(self.tile_centers):
+            raise ValueError("Layout has several tiles at the same coordinates")
+        if len(self.deck) != len(self.tile_centers):
+            raise ValueError("Layout deck does not have one ressource per tile")
+        unknown = set(self.deck) - set(RESSOURCES)
+        if unknown:
+            raise ValueError(f"Unknown ressources in layout deck: {sorted(unknown)}")
+        if len(self.numbers) != len(self.deck) - self.deck.count("desert"):
+            raise ValueError("Layout needs one number per tile, except the deserts")
+        if not set(self.numbers) <= set(NUMBER_WEIGHTS):
+            raise ValueError("Layout numbers must be 2 to 12, without the 7")
+
+        tiles = set(self.tile_centers)
+        for q, r, res, o in self.ports:
+            if res not in RESSOURCES[:-1] and res != "None":
+                raise ValueError(f"Unknown port ressource: {res}")
+            if (q, r) in tiles:
+                raise ValueError(f"Port on a tile: {(q, r)}")
+
+    def __len__(self):
+        return len(self.tile_centers)
+
+    def __repr__(self):
+        return f"Layout({len(self)} tiles, {len(self.ports)} ports)"
+
+    @classmethod
+    def standard(cls, more_players=False):
+        """The layout of the base game, or of its 5-6 player extension."""
+        return STANDARD_LAYOUTS[bool(more_players)]
+
+    def is_standard(self, more_players=False):
+        """Whether the layout has the tiles, decks and ports of a standard one."""
+        standard = Layout.standard(more_players)
+        return self is standard or (
+            self.tile_centers == standard.tile_centers
+            and sorted(self.deck) == sorted(standard.deck)
+            and sorted(self.numbers) == sorted(standard.numbers)
+            and self.ports == standard.ports
+        )
+
+    @classmethod
+    def hexagon(cls, radius):
+        """A hexagon of tiles with `radius` rings around the center one.
+
+        The decks keep the proportions of the standard 3-4 player decks, and
+        the ports go on every other sea hex around the board.
+        """
+        if radius < 1:
+            raise ValueError("Hexagon layouts need a radius of at least 1")
+        tile_centers = [
+            (q, r)
+            for r in range(-radius, radius + 1)
+            for q in range(max(-radius - r, -radius), min(radius - r, radius) + 1)
+        ]
+        tiles = set(tile_centers)
+
+        n = len(tile_centers)
+        counts = shares(RESSOURCE_WEIGHTS, n)
+        counts["desert"] = max(counts["desert"], 1)
+        counts["wood"] += n - sum(counts.values())
+        deck = [res for res in RESSOURCES for _ in range(counts[res])]
+        numbers = [
+            num
+            for num, count in shares(NUMBER_WEIGHTS, n - counts["desert"]).items()
+            for _ in range(count)
+        ]
+
+        # ports: every other hex of the ring around the board, turned to the
+        # tile closest to the direction of the center
+        ports = []
+        for k, (q, r) in enumerate(ring(radius + 1)):
+            if k % 2:
+                continue
+            center = (-2 * (q + r / 2), -2 * math.sin(math.pi / 3) * r)
+            o = max(
+                (o for o, (dq, dr) in enumerate(PORT_DIRECTIONS) if (q + dq, r + dr) in tiles),
+                key=lambda o: math.cos(
+                    math.atan2(*center) - math.radians(60 * o + 30)
+                ),
+            )
+            ports.append((q, r, PORT_CYCLE[len(ports) % len(PORT_CYCLE)], o))
+
+        return cls(tile_centers, deck, numbers, ports)
+
+    @classmethod
+    def from_dict(cls, data):
+        deck = data["deck"]
+        if isinstance(deck, dict):
+            deck = [res for res in RESSOURCES for _ in range(deck.get(res, 0))]
+        numbers = data["numbers"]
+        if isinstance(numbers, dict):
+            numbers = [int(n) for n, count in numbers.items() for _ in range(count)]
+        return cls(
+            data["tiles"], deck, numbers, data["ports"],
+            data.get("screen_size"), data.get("screen_offset"),
+        )
+
+    def to_dict(self):
+        return {
+            "tiles": [list(c) for c in self.tile_centers],
+            "deck": {res: self.deck.count(res) for res in RESSOURCES if res in self.deck},
+            "numbers": {
+                str(n): self.numbers.count(n) for n in sorted(set(self.numbers))
+            },
+            "ports": [list(p) for p in self.ports],
+            "screen_size": self.screen_size,
+            "screen_offset": list(self.screen_offset),
+        }
+
+    @classmethod
+    def load(cls, path):
+        """Read a layout from a JSON file, see the module docs."""
+        # json (and the re module it needs) is only imported for the files,
+        # it would make up most of the import time of the generator
+        import json
+
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path):
+        import json
+
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+
+def neighbour_indices(tile_index, q, r):
+    # indices of the tiles around (q, r), in the order of NEIGHBOUR_DIRECTIONS
+    return tuple(
+        tile_index[(q + dq, r + dr)]
+        for (dq, dr) in NEIGHBOUR_DIRECTIONS
+        if (q + dq, r + dr) in tile_index
+    )
+
+
+def shares(weights, total):
+    # split total in proportion to the weights, giving what rounding down
+    # leaves to the largest remainders
+    weight = sum(weights.values())
+    exact = {key: total * w / weight for key, w in weights.items()}
+    counts = {key: int(x) for key, x in exact.items()}
+    by_remainder = sorted(weights, key=lambda key: counts[key] - exact[key])
+    for key in by_remainder[: total - sum(counts.values())]:
+        counts[key] += 1
+    return counts
+
+
+def ring(radius):
+    # hexes at distance radius from the center, going around from the top
+    # left corner
+    q, r = 0, -radius
+    hexes = []
+    for dq, dr in [(1, 0), (0, 1), (-1, 1), (-1, 0), (0, -1), (1, -1)]:
+        for _ in range(radius):
+            hexes.append((q, r))
+            q, r = q + dq, r + dr
+    return hexes
+
+
+def standard_layout(more_players):
+    # tiles, decks and ports of the standard layouts, see STANDARD_LAYOUTS
+    offset = 1 * more_players
+    tile_centers = [
+        (i, j)
+        for j in range(-2 - offset, 3 + offset)
+        for i in range(max(-2 - j - offset, -2 - offset), min(3 - j, 3))
+    ]
+    deck = (
+        (3 + 2 * offset) * ["brick"]
+        + (4 + 2 * offset) * ["wood"]
+        + (4 + 2 * offset) * ["sheep"]
+        + (4 + 2 * offset) * ["wheat"]
+        + (3 + 2 * offset) * ["stone"]
+        + (1 + 1 * offset) * ["desert"]
+    )
+    numbers = [2, 12] * (1 + offset) + [3, 4, 5, 6, 8, 9, 10, 11] * (2 + offset)
+    return Layout(
+        tile_centers,
+        deck,
+        numbers,
+        STANDARD_PORTS[more_players],
+        screen_size=12 + 4 * offset,
+        screen_offset=(math.cos(math.pi / 6) * offset, 0),
+    )
+
+
+# the standard layouts (3-4 players, then 5-6 players), built once at import
+STANDARD_LAYOUTS = (standard_layout(False), standard_layout(True))
@@ -0,0 +1,70 @@
+"""
+Generate boards on several processes, reproducibly from a master seed
+"""
+
+import os
+import random as r
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from catanboardgen.generator import BoardGenerator
+
+
+def derive_seed(master_seed, chunk):
+    """Seed of one chunk of boards, derived from the master seed."""
+    return r.Random(f"{master_seed}:{chunk}").getrandbits(64)
+
+
+def generate_chunk(options, count, seed, engine="wfc"):
+    return BoardGenerator(options, seed=seed, engine=engine).generate_many(count)
+
+
+def generate_parallel(options, n, seed=None, workers=None, chunk_size=256, engine="wfc"):
+    """Generate n boards on a pool of processes, yielding them in order.
+
+    The boards are split in chunks of chunk_size boards, and every chunk is
+    generated from its own seed derived from the master seed, so the same
+    (seed, n, chunk_size) always gives the same boards, whatever the number
+    of workers. A few chunks per worker are in flight at any time, so the
+    memory used does not depend on n.
+    """
+    task = partial(generate_chunk, options, engine=engine)
+    for boards in run_chunks(task, n, seed, workers, chunk_size):
+        yield from boards
+
+
+def run_chunks(task, n, seed=None, workers=None, chunk_size=256):
+    """Yield, in order, task(count, seed) for the chunks of n items.
+
+    task must be picklable (a module function, or a partial of one), it is
+    run on a pool of processes with the seed of each chunk derived from the
+    master seed, as in generate_parallel.
+    """
+    if seed is None:
+        seed = r.SystemRandom().getrandbits(64)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # (index, size) of each chunk
+    chunks = (
+        (i, min(chunk_size, n - start))
+        for i, start in enumerate(range(0, n, chunk_size))
+    )
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        def submit_next():
+            chunk = next(chunks, None)
+            if chunk is not None:
+                index, count = chunk
+                pending.append(executor.submit(task, count, derive_seed(seed, index)))
+
+        for _ in range(2 * workers):
+            submit_next()
+
+        while pending:
+            result = pending.popleft().result()
+            submit_next()
+            yield result
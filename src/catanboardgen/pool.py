@@ -0,0 +1,106 @@
+"""
+Pool of boards generated in advance, by a background thread
+"""
+
+import random as r
+import threading
+from collections import OrderedDict, deque
+
+from catanboardgen.generator import DEFAULT_OPTIONS, BoardGenerator, options_key
+
+
+class BoardPool:
+    """Boards ready to be used, for the most recently used options.
+
+    The pool keeps up to `size` boards for each of the last `max_keys`
+    options combinations used, the least recently used one being dropped
+    when a new one comes in. A daemon thread keeps the pools topped up,
+    starting with the most recently used options, so taking a board is
+    instantaneous unless the pool of its options is empty.
+    """
+
+    def __init__(self, size=5, max_keys=4):
+        self.size = size
+        self.max_keys = max_keys
+
+        # boards ready for each options key, in least recently used order
+        self.boards = OrderedDict()
+        self.generators = {}
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stopped = False
+
+        # the background thread has its own random number generator, as the
+        # callers can use the same BoardGenerator at the same time
+        self.refill_rng = r.Random()
+
+    def use(self, options):
+        # mark the options as the most recently used ones, evicting the
+        # least recently used ones, needs to hold the lock
+        key = options_key(options)
+        if key not in self.boards:
+            self.boards[key] = deque()
+            self.generators[key] = BoardGenerator(dict(zip(DEFAULT_OPTIONS, key)))
+        self.boards.move_to_end(key)
+
+        while len(self.boards) > self.max_keys:
+            old_key, _ = self.boards.popitem(last=False)
+            del self.generators[old_key]
+
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.refill, daemon=True)
+            self.thread.start()
+        self.condition.notify()
+        return key
+
+    def warm(self, options):
+        """Start filling the pool for these options."""
+        with self.condition:
+            self.use(options)
+
+    def pop(self, options, budget=None, cancel=None, touch=True):
+        """Take a board for these options, generating it if none is ready.
+
+        budget and cancel limit the generation, see BoardGenerator.generate.
+        With touch=False the options are not marked as used, so they do not
+        evict other options nor get a pool of their own (e.g. for fallbacks
+        with less constraints than the options asked for).
+        """
+        with self.condition:
+            key = self.use(options) if touch else options_key(options)
+            if self.boards.get(key):
+                self.condition.notify()
+                return self.boards[key].popleft()
+            generator = self.generators.get(key)
+
+        if generator is None:
+            generator = BoardGenerator(dict(zip(DEFAULT_OPTIONS, key)))
+        return generator.generate(r.Random(), budget, cancel)
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+    def refill(self):
+        while True:
+            with self.condition:
+                while not self.stopped and not self.missing():
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                key = self.missing()[0]
+                generator = self.generators[key]
+
+            board = generator.generate(self.refill_rng)
+
+            with self.condition:
+                # the options may have been evicted while generating
+                if key in self.boards and len(self.boards[key]) < self.size:
+                    self.boards[key].append(board)
+
+    def missing(self):
+        # keys of the pools to fill, most recently used first
+        return [
+            key for key in reversed(self.boards) if len(self.boards[key]) < self.size
+        ]
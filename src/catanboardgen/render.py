@@ -0,0 +1,544 @@
+"""
+Render boards to SVG or PNG files, without toga
+
+The boards are drawn like in the app, from the same BoardGeometry and
+colors. Everything that does not depend on the board (the ports, the
+outlines of the tiles, the pixels covered by each shape) is computed once
+per layout, so rendering a board only fills in its colors and numbers.
+
+PNG images are written with the standard library only: palette images,
+filled row span by row span, compressed with zlib. By default the pieces
+of the image (each row of a tile, and the background between them) are
+compressed once, and the compressed data of a board is only joined from
+them: about 3 times faster than compressing each image, for files 3 to 4
+times as big. The numbers are drawn with a small built-in pixel font, as
+no font renderer is available.
+"""
+
+import math
+import os
+import struct
+import zlib
+from itertools import accumulate
+from operator import itemgetter
+
+from catanboardgen.generator import Tile
+from catanboardgen.geometry import PORT_COLORS, BoardGeometry
+from catanboardgen.layout import Layout
+
+
+# RGB values of the named colors used to draw boards
+RGB = {
+    "white": (255, 255, 255),
+    "black": (0, 0, 0),
+    "red": (255, 0, 0),
+    "coral": (255, 127, 80),
+    "forestgreen": (34, 139, 34),
+    "palegreen": (152, 251, 152),
+    "gold": (255, 215, 0),
+    "slategrey": (112, 128, 144),
+    "peachpuff": (255, 218, 185),
+}
+PALETTE = list(RGB)
+COLOR_INDEX = {name: i for i, name in enumerate(PALETTE)}
+
+# 3x5 pixel font, for the numbers and the "3:1" of the ports
+GLYPHS = {
+    "0": ["###", "#.#", "#.#", "#.#", "###"],
+    "1": [".#.", "##.", ".#.", ".#.", "###"],
+    "2": ["###", "..#", "###", "#..", "###"],
+    "3": ["###", "..#", "###", "..#", "###"],
+    "4": ["#.#", "#.#", "###", "..#", "..#"],
+    "5": ["###", "#..", "###", "..#", "###"],
+    "6": ["###", "#..", "###", "#.#", "###"],
+    "7": ["###", "..#", "..#", "..#", "..#"],
+    "8": ["###", "#.#", "###", "#.#", "###"],
+    "9": ["###", "#.#", "###", "..#", "###"],
+    ":": ["...", ".#.", "...", ".#.", "..."],
+}
+
+LINE_WIDTH = 2
+
+
+def convex_spans(points):
+    # pixels covered by a convex polygon, as (row, start, end) spans, the
+    # end excluded, sampling each row at its middle
+    ys = [y for (x, y) in points]
+    spans = []
+    for row in range(math.floor(min(ys)), math.ceil(max(ys))):
+        yc = row + 0.5
+        xs = [
+            x1 + (yc - y1) * (x2 - x1) / (y2 - y1)
+            for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1])
+            if y1 <= yc < y2 or y2 <= yc < y1
+        ]
+        if len(xs) >= 2:
+            start, end = round(min(xs)), round(max(xs))
+            if end > start:
+                spans.append((row, start, end))
+    return spans
+
+
+def disc_spans(r):
+    # pixels of a disc of radius r centered on (0, 0)
+    spans = []
+    for row in range(math.floor(-r), math.ceil(r)):
+        dy = row + 0.5
+        if dy * dy < r * r:
+            half = math.sqrt(r * r - dy * dy)
+            start, end = round(-half), round(half)
+            if end > start:
+                spans.append((row, start, end))
+    return spans
+
+
+def ring_spans(r, width=LINE_WIDTH):
+    # pixels of a circle of radius r, drawn with the given line width
+    inner = {row: (start, end) for (row, start, end) in disc_spans(r - width / 2)}
+    spans = []
+    for row, start, end in disc_spans(r + width / 2):
+        if row in inner:
+            spans.append((row, start, inner[row][0]))
+            spans.append((row, inner[row][1], end))
+        else:
+            spans.append((row, start, end))
+    return [s for s in spans if s[2] > s[1]]
+
+
+def line_spans(p, q, width=LINE_WIDTH):
+    # pixels of a segment, as the rectangle around it
+    (x1, y1), (x2, y2) = p, q
+    length = math.hypot(x2 - x1, y2 - y1)
+    nx, ny = -(y2 - y1) / length * width / 2, (x2 - x1) / length * width / 2
+    return convex_spans(
+        [(x1 + nx, y1 + ny), (x2 + nx, y2 + ny), (x2 - nx, y2 - ny), (x1 - nx, y1 - ny)]
+    )
+
+
+def text_spans(text, font_size):
+    # pixels of a text written with GLYPHS, centered on (0, 0)
+    scale = max(1, round(font_size / 6))
+    width = (4 * len(text) - 1) * scale
+    left, top = -width // 2, -5 * scale // 2
+    spans = []
+    for k, char in enumerate(text):
+        for j, line in enumerate(GLYPHS[char]):
+            for i, pixel in enumerate(line):
+                if pixel == "#":
+                    x = left + (4 * k + i) * scale
+                    for row in range(top + j * scale, top + (j + 1) * scale):
+                        spans.append((row, x, x + scale))
+    return spans
+
+
+def png_chunk(kind, data):
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+    )
+
+
+def png_bytes(width, height, pixels, level=1, compressed=None):
+    # PNG palette image, from rows of palette indices each starting with
+    # the filter type (0: none), as PNG stores them, compressed unless the
+    # zlib stream is given
+    header = struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)
+    palette = b"".join(bytes(RGB[name]) for name in PALETTE)
+    if compressed is None:
+        compressed = zlib.compress(bytes(pixels), level)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + png_chunk(b"IHDR", header)
+        + png_chunk(b"PLTE", palette)
+        + png_chunk(b"IDAT", compressed)
+        + png_chunk(b"IEND", b"")
+    )
+
+
+def deflate_piece(data):
+    # raw deflate blocks of data, ending on a byte boundary and without
+    # references to earlier data, so pieces can be joined in any order
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FULL_FLUSH)
+
+
+def zlib_stream(pieces, data):
+    # zlib stream of the joined deflate pieces of data: header, pieces, an
+    # empty final block, and the checksum of data
+    checksum = struct.pack(">I", zlib.adler32(data))
+    return b"\x78\x01" + b"".join(pieces) + b"\x03\x00" + checksum
+
+
+class BoardRenderer:
+    """Draw the boards of one Layout (the standard one by default) as SVG or PNG.
+
+    tile_size is the size of the tiles in pixels, as in the app, and gives
+    the size of the images. Images of single boards and sprite sheets (a
+    grid of boards, `columns` wide) are returned as str (SVG) or bytes (PNG).
+    """
+
+    def __init__(self, layout=None, tile_size=24, margin=4):
+        if layout is None:
+            layout = Layout.standard()
+        self.layout = layout
+        self.nb_tiles = len(layout)
+        geometry = BoardGeometry(layout, 0, 0, 1, tile_size=tile_size)
+        self.geometry = geometry
+
+        # translate the board so everything drawn fits in the image: the
+        # tiles and the port lines reach tile_size from their center
+        xs = [x for (x, y) in geometry.tiles] + [p[0] for p in geometry.ports]
+        ys = [y for (x, y) in geometry.tiles] + [p[1] for p in geometry.ports]
+        reach = tile_size + LINE_WIDTH + margin
+        dx, dy = reach - min(xs), reach - min(ys)
+        self.width = math.ceil(max(xs) + dx + reach)
+        self.height = math.ceil(max(ys) + dy + reach)
+
+        self.tiles = [(round(x + dx), round(y + dy)) for (x, y) in geometry.tiles]
+        self.ports = [(round(x + dx), round(y + dy), t, o) for (x, y, t, o) in geometry.ports]
+
+        self.svg_parts()
+        self.raster_parts()
+
+    # SVG
+
+    def svg_parts(self):
+        g = self.geometry
+        stroke = f'stroke="black" stroke-width="{LINE_WIDTH}"'
+
+        # the ports never change
+        ports = []
+        for x, y, t, o in self.ports:
+            (x1, y1), (x2, y2) = g.port_lines[o % 6]
+            ports.append(
+                f'<path d="M{x + x1:.1f},{y + y1:.1f} L{x},{y} L{x + x2:.1f},{y + y2:.1f}" '
+                f'fill="none" {stroke}/>'
+                f'<circle cx="{x}" cy="{y}" r="{g.token_radius:.1f}" '
+                f'fill="{PORT_COLORS[t]}" {stroke}/>'
+            )
+            if t == "None":
+                ports.append(self.svg_text(x, y, "3:1", g.port_font_size, "black"))
+        self.svg_ports = "".join(ports)
+
+        # the tiles, missing their fill color
+        self.svg_hexes = [
+            '<polygon points="'
+            + " ".join(f"{x + cx:.1f},{y + cy:.1f}" for (cx, cy) in g.hex_corners)
+            + f'" {stroke} fill="'
+            for (x, y) in self.tiles
+        ]
+        self.svg_tokens = [
+            f'<circle cx="{x}" cy="{y}" r="{g.token_radius:.1f}" fill="white" {stroke}/>'
+            for (x, y) in self.tiles
+        ]
+
+    def svg_text(self, x, y, text, font_size, color):
+        return (
+            f'<text x="{x}" y="{y}" text-anchor="middle" dominant-baseline="central" '
+            f'font-family="sans-serif" font-size="{font_size:.1f}" fill="{color}">'
+            f"{text}</text>"
+        )
+
+    def svg_board(self, board):
+        # the elements of a board, without the svg header
+        parts = [self.svg_ports]
+        for (x, y), hexagon, token, tile in zip(
+            self.tiles, self.svg_hexes, self.svg_tokens, board.tiles
+        ):
+            parts.append(hexagon + Tile.colors[tile.ressource] + '"/>')
+            num = tile.number
+            if num != 7:
+                color = "red" if num in [6, 8] else "black"
+                parts.append(token)
+                parts.append(
+                    self.svg_text(x, y, num, self.geometry.number_font_size, color)
+                )
+        return "".join(parts)
+
+    def svg_document(self, width, height, content):
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}">'
+            f'<rect width="{width}" height="{height}" fill="white"/>'
+            f"{content}</svg>\n"
+        )
+
+    def svg(self, board):
+        """The board as an SVG document."""
+        self.check_layout(board)
+        return self.svg_document(self.width, self.height, self.svg_board(board))
+
+    def svg_sheet(self, boards, columns=10):
+        """A grid of boards, as one SVG document."""
+        parts = []
+        for k, board in enumerate(boards):
+            self.check_layout(board)
+            row, col = divmod(k, columns)
+            parts.append(
+                f'<g transform="translate({col * self.width},{row * self.height})">'
+                f"{self.svg_board(board)}</g>"
+            )
+        rows = max(1, -(-len(parts) // columns))
+        return self.svg_document(
+            min(len(parts), columns) * self.width or self.width,
+            rows * self.height,
+            "".join(parts),
+        )
+
+    # PNG
+
+    def raster_parts(self):
+        g = self.geometry
+
+        # spans of each shape, relative to the center of its tile or port
+        self.hex_spans = convex_spans(g.hex_corners)
+        self.outline_spans = [
+            span
+            for p, q in zip(g.hex_corners, g.hex_corners[1:] + g.hex_corners[:1])
+            for span in line_spans(p, q)
+        ]
+        self.token_spans = disc_spans(g.token_radius)
+        self.ring_spans = ring_spans(g.token_radius)
+        self.number_spans = {
+            num: text_spans(str(num), g.number_font_size)
+            for num in [2, 3, 4, 5, 6, 8, 9, 10, 11, 12]
+        }
+
+        # a tile covers one span per row: its outline
+        rows = {}
+        for row, start, end in self.hex_spans + self.outline_spans:
+            s, e = rows.get(row, (start, end))
+            rows[row] = (min(s, start), max(e, end))
+        self.tile_spans = [(row, s, e) for row, (s, e) in sorted(rows.items())]
+        self.reach = max(
+            max(abs(row) + 1, abs(s), abs(e)) for (row, s, e) in self.tile_spans
+        )
+
+        # the ports, drawn once on the background
+        self.background_shapes = []
+        for x, y, t, o in self.ports:
+            for end in g.port_lines[o % 6]:
+                self.background_shapes.append(
+                    (x, y, line_spans((0, 0), end), "black")
+                )
+            self.background_shapes.append((x, y, self.token_spans, PORT_COLORS[t]))
+            self.background_shapes.append((x, y, self.ring_spans, "black"))
+            if t == "None":
+                self.background_shapes.append(
+                    (x, y, text_spans("3:1", g.port_font_size), "black")
+                )
+
+        self.stamps = {}
+        self.backgrounds = {}
+        self.slices_stride, self.slices = None, {}
+        self.pieces_key, self.pieces = None, None
+        self.shapes, self.shape_ids, self.tile_pieces = [], {}, {}
+
+    def fill(self, pixels, spans, stride, x, y, color):
+        # pixels of an image with rows of stride bytes, starting with their
+        # filter byte
+        base = y * stride + 1 + x
+        value = bytes([COLOR_INDEX[color]])
+        for row, start, end in spans:
+            offset = base + row * stride
+            pixels[offset + start : offset + end] = value * (end - start)
+
+    def stamp(self, res, num):
+        # the rows of pixels of a tile, drawn once for each ressource and
+        # number, then copied onto the boards
+        key = (res, num)
+        if key not in self.stamps:
+            size = 2 * self.reach + 1
+            pixels = bytearray(size * (size + 1))
+            c = self.reach
+            self.fill(pixels, self.hex_spans, size + 1, c, c, Tile.colors[res])
+            self.fill(pixels, self.outline_spans, size + 1, c, c, "black")
+            if num != 7:
+                self.fill(pixels, self.token_spans, size + 1, c, c, "white")
+                self.fill(pixels, self.ring_spans, size + 1, c, c, "black")
+                color = "red" if num in [6, 8] else "black"
+                self.fill(pixels, self.number_spans[num], size + 1, c, c, color)
+            center = c * (size + 1) + 1 + c
+            self.stamps[key] = [
+                bytes(pixels[center + row * (size + 1) + s : center + row * (size + 1) + e])
+                for (row, s, e) in self.tile_spans
+            ]
+        return self.stamps[key]
+
+    def blank(self, width, height, cells):
+        # white image, with the filter byte of each row, and the ports drawn
+        # in each cell
+        stride = width + 1
+        key = (width, height, tuple(cells))
+        if key not in self.backgrounds:
+            pixels = bytearray(bytes([COLOR_INDEX["white"]]) * (stride * height))
+            pixels[::stride] = bytes(height)
+            for ox, oy in cells:
+                for x, y, spans, color in self.background_shapes:
+                    self.fill(pixels, spans, stride, ox + x, oy + y, color)
+            # keep only the last one, sheets of many sizes would pile up
+            self.backgrounds = {key: pixels}
+        return bytearray(self.backgrounds[key])
+
+    def tile_slices(self, stride, ox, oy):
+        # where the rows of each tile go in the image, for a board drawn at
+        # (ox, oy), kept for the last image size
+        if self.slices_stride != stride:
+            self.slices_stride, self.slices = stride, {}
+        if (ox, oy) not in self.slices:
+            self.slices[ox, oy] = [
+                [
+                    slice(base + row * stride + s, base + row * stride + e)
+                    for (row, s, e) in self.tile_spans
+                ]
+                for base in ((y + oy) * stride + 1 + x + ox for (x, y) in self.tiles)
+            ]
+        return self.slices[ox, oy]
+
+    def draw_board(self, pixels, stride, board, ox=0, oy=0):
+        for slices, tile in zip(self.tile_slices(stride, ox, oy), board.tiles):
+            for rows, data in zip(slices, self.stamp(tile.ressource, tile.number)):
+                pixels[rows] = data
+
+    def image_pieces(self, width, height, cells):
+        # the image cut into the rows of the tiles of each cell, the holes,
+        # and the background between them, kept for the last image size:
+        # the background pieces (raw and compressed), the shape of the holes
+        # of each tile of each cell, and a function putting the pieces in
+        # the order of the image, from the background pieces followed by the
+        # pieces of each tile
+        key = (width, height, tuple(cells))
+        if self.pieces_key != key:
+            stride = width + 1
+            background = bytes(self.blank(width, height, cells))
+            holes = sorted(
+                (rows.start, rows.stop, c * self.nb_tiles + t, k)
+                for c, (ox, oy) in enumerate(cells)
+                for t, slices in enumerate(self.tile_slices(stride, ox, oy))
+                for k, rows in enumerate(slices)
+            )
+
+            # the image as background pieces, and holes as (tile, index of
+            # the hole in the tile)
+            raw, order = [], []
+            shapes = [[] for _ in range(len(cells) * self.nb_tiles)]
+            end = 0
+            for start, stop, t, k in holes:
+                # neighbouring tiles share the pixels of their outlines
+                if stop <= end:
+                    continue
+                covered = max(0, end - start)
+                if start + covered > end:
+                    order.append(len(raw))
+                    raw.append(background[end:start])
+                order.append((t, len(shapes[t])))
+                shapes[t].append((k, covered))
+                end = stop
+            order.append(len(raw))
+            raw.append(background[end:])
+
+            # the pieces of the tiles follow the background ones
+            first = list(accumulate(map(len, shapes), initial=len(raw)))
+            order = [i if isinstance(i, int) else first[i[0]] + i[1] for i in order]
+            shapes = [self.shape_id(tuple(s)) for s in shapes]
+            self.pieces_key = key
+            self.pieces = (raw, [deflate_piece(r) for r in raw], shapes, itemgetter(*order))
+        return self.pieces
+
+    def shape_id(self, shape):
+        # small integer standing for the holes of a tile, as the key of the
+        # pieces of its stamps
+        if shape not in self.shape_ids:
+            self.shape_ids[shape] = len(self.shapes)
+            self.shapes.append(shape)
+        return self.shape_ids[shape]
+
+    def stamp_pieces(self, res, num, shape):
+        # the rows of a stamp going in the holes of a tile, raw and
+        # compressed, computed once for each shape of holes
+        key = (res, num, shape)
+        if key not in self.tile_pieces:
+            rows = self.stamp(res, num)
+            raw = [rows[k][covered:] for (k, covered) in self.shapes[shape]]
+            self.tile_pieces[key] = (raw, [deflate_piece(r) for r in raw])
+        return self.tile_pieces[key]
+
+    def joined_png(self, width, height, cells, boards):
+        # PNG image of boards drawn in cells, joined from the pieces
+        raw, compressed, shapes, in_order = self.image_pieces(width, height, cells)
+        raw, compressed = list(raw), list(compressed)
+        tiles = (tile for board in boards for tile in board.tiles)
+        for shape, tile in zip(shapes, tiles):
+            rows, pieces = self.stamp_pieces(tile.ressource, tile.number, shape)
+            raw += rows
+            compressed += pieces
+        data = b"".join(in_order(raw))
+        stream = zlib_stream(in_order(compressed), data)
+        return png_bytes(width, height, None, compressed=stream)
+
+    def png(self, board, level=None):
+        """The board as a PNG image.
+
+        level is the zlib compression level of the whole image: 1 is the
+        fastest, 9 makes files half as big, about 30 times slower. By
+        default the image is joined from pieces compressed once, the
+        fastest (about 4500 boards per second with a tile_size of 24, 1300
+        with level 1), for files 3 to 4 times as big as with level 1.
+        """
+        self.check_layout(board)
+        if level is None:
+            return self.joined_png(self.width, self.height, [(0, 0)], [board])
+        pixels = self.blank(self.width, self.height, [(0, 0)])
+        self.draw_board(pixels, self.width + 1, board)
+        return png_bytes(self.width, self.height, pixels, level)
+
+    def png_sheet(self, boards, columns=10, level=None):
+        """A grid of boards, as one PNG image, see png for the level."""
+        boards = list(boards)
+        rows = max(1, -(-len(boards) // columns))
+        width = min(max(1, len(boards)), columns) * self.width
+        height = rows * self.height
+        cells = [
+            (col * self.width, row * self.height)
+            for row, col in (divmod(k, columns) for k in range(len(boards)))
+        ]
+        for board in boards:
+            self.check_layout(board)
+        if level is None:
+            return self.joined_png(width, height, cells, boards)
+        pixels = self.blank(width, height, cells)
+        for board, (ox, oy) in zip(boards, cells):
+            self.draw_board(pixels, width + 1, board, ox, oy)
+        return png_bytes(width, height, pixels, level)
+
+    def check_layout(self, board):
+        if len(board.tiles) != self.nb_tiles:
+            raise ValueError("Board does not match the layout of the renderer")
+
+
+def render_files(boards, directory, fmt="svg", tile_size=24, name="board_{:05d}"):
+    """Write each board to its own file, yielding the paths as they are written.
+
+    boards can be any iterable, even an endless generator: the boards are
+    rendered one by one, with one renderer per layout.
+    """
+    if fmt not in ("svg", "png"):
+        raise ValueError(f"Unknown format: {fmt}")
+    os.makedirs(directory, exist_ok=True)
+
+    renderers = {}
+    for k, board in enumerate(boards):
+        if board.layout not in renderers:
+            renderers[board.layout] = BoardRenderer(board.layout, tile_size)
+        renderer = renderers[board.layout]
+
+        path = os.path.join(directory, name.format(k) + "." + fmt)
+        if fmt == "svg":
+            with open(path, "w") as f:
+                f.write(renderer.svg(board))
+        else:
+            with open(path, "wb") as f:
+                f.write(renderer.png(board))
+        yield path
@@ -0,0 +1,153 @@
+"""
+Score boards by how fairly they produce, to rank them or keep the fairest
+
+The rules of the options only look at neighbouring tiles. The scores look at
+what the players get: a settlement sits on an intersection (a corner shared
+by up to three tiles) and collects the pips of its tiles, the number of ways
+to roll their number with two dice. For each board:
+
+- "ressource_spread": pips of the richest ressource minus the poorest one
+- "max_vertex_pips": pips of the best intersection
+- "vertex_pips_std": standard deviation of the pips of the intersections
+- "max_port_pips": pips of the best intersection with a port
+- "score": the weighted sum of the above, lower is fairer
+
+The intersections of the layout, and the tiles around each of them, are
+computed once from the corners of the tiles, so a batch of boards is scored
+with a few array products. Needs NumPy.
+"""
+
+import numpy as np
+
+from catanboardgen.generator import DESERT, Tile
+from catanboardgen.layout import PORT_DIRECTIONS, RESSOURCES, Layout
+
+
+# pips of each number, 0 for the 7 of the deserts
+PIPS = np.array([0 if n == 7 else max(0, 6 - abs(7 - n)) for n in range(13)])
+
+# weight of each score in the total, the defaults keep them on a similar
+# scale for the standard layouts
+DEFAULT_WEIGHTS = {
+    "ressource_spread": 1.0,
+    "max_vertex_pips": 1.0,
+    "vertex_pips_std": 2.0,
+    "max_port_pips": 0.5,
+}
+
+
+def corner_keys(q, r):
+    # corners of the tile at (q, r), as integer coordinates (in thirds of
+    # the hex grid) shared by the tiles around each corner
+    return [(round(3 * (q + dq)), round(3 * (r + dr))) for (dq, dr) in Tile.corners]
+
+
+class BoardScorer:
+    """Fairness scores of the boards of one Layout (the standard one by default).
+
+    - vertices: the intersections of the layout, as corner coordinates
+    - incidence: (intersections, tiles) array, 1 where a tile touches an
+      intersection
+    - port_vertices: (ports, 2) indices of the two intersections of each port
+    """
+
+    def __init__(self, layout=None, weights=None):
+        if layout is None:
+            layout = Layout.standard()
+        self.layout = layout
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+        vertex_index = {}
+        tile_corners = []
+        for q, r in layout.tile_centers:
+            tile_corners.append(
+                [vertex_index.setdefault(key, len(vertex_index)) for key in corner_keys(q, r)]
+            )
+        self.vertices = list(vertex_index)
+
+        self.incidence = np.zeros((len(self.vertices), len(layout)), dtype=np.int16)
+        for t, corners in enumerate(tile_corners):
+            self.incidence[corners, t] = 1
+
+        # the intersections of a port: the corners it shares with the tile it
+        # points to
+        self.port_vertices = np.zeros((len(layout.ports), 2), dtype=int)
+        for i, (q, r, res, o) in enumerate(layout.ports):
+            dq, dr = PORT_DIRECTIONS[o % 6]
+            shared = set(corner_keys(q, r)) & set(corner_keys(q + dq, r + dr))
+            if not shared <= set(vertex_index):
+                raise ValueError(f"Port {(q, r)} does not point to a tile")
+            self.port_vertices[i] = sorted(vertex_index[key] for key in shared)
+
+    def score_arrays(self, ressources, numbers):
+        """Scores of (N, tiles) arrays of ressource codes and numbers.
+
+        Returns a dict of (N,) arrays, see the module docs.
+        """
+        ressources = np.asarray(ressources)
+        numbers = np.asarray(numbers)
+        if ressources.ndim != 2 or ressources.shape[1] != len(self.layout):
+            raise ValueError(f"Boards must be arrays of shape (N, {len(self.layout)})")
+
+        pips = PIPS[np.clip(numbers, 0, 12)]
+
+        # pips of each ressource: the pips of the tiles, summed by ressource
+        onehot = ressources[:, :, None] == np.arange(DESERT)
+        ressource_pips = np.einsum("nt,ntr->nr", pips, onehot)
+
+        # pips of each intersection
+        vertex_pips = pips @ self.incidence.T
+
+        scores = {
+            "ressource_spread": ressource_pips.max(1) - ressource_pips.min(1),
+            "max_vertex_pips": vertex_pips.max(1),
+            "vertex_pips_std": vertex_pips.std(1),
+            "max_port_pips": (
+                vertex_pips[:, self.port_vertices].max((1, 2))
+                if len(self.port_vertices)
+                else np.zeros(len(pips))
+            ),
+        }
+        scores["score"] = sum(w * scores[name] for name, w in self.weights.items())
+        return scores
+
+    def score_boards(self, boards):
+        """Scores of a list of Board objects, as (N,) arrays."""
+        boards = list(boards)
+        ressources = np.array(
+            [[RESSOURCES.index(res) for res in b.deck] for b in boards], dtype=int
+        ).reshape(len(boards), len(self.layout))
+        numbers = np.array(
+            [b.numbers_deck for b in boards], dtype=int
+        ).reshape(len(boards), len(self.layout))
+        return self.score_arrays(ressources, numbers)
+
+    def score(self, board):
+        """Scores of one Board, as a dict of floats."""
+        return {name: float(v[0]) for name, v in self.score_boards([board]).items()}
+
+    def check_generator(self, generator):
+        if generator.layout.tile_centers != self.layout.tile_centers:
+            raise ValueError("The generator does not use the layout of the scorer")
+
+    def best_of(self, generator, k, rng=None):
+        """The fairest (lowest score) of k boards from generator."""
+        self.check_generator(generator)
+        boards = generator.generate_many(k, rng)
+        return boards[int(np.argmin(self.score_boards(boards)["score"]))]
+
+    def generate_fair(self, generator, max_score, tries=100, rng=None):
+        """A board from generator scoring at most max_score.
+
+        Gives up after `tries` boards, returning the fairest of them.
+        """
+        self.check_generator(generator)
+        best, best_score = None, None
+        for _ in range(tries):
+            board = generator.generate(rng)
+            score = self.score(board)["score"]
+            if score <= max_score:
+                return board
+            if best is None or score < best_score:
+                best, best_score = board, score
+        return best
@@ -0,0 +1,320 @@
+"""
+Local HTTP service generating boards, for programs that only need the data
+
+Run it with:
+
+    python -m catanboardgen.server --port 8765 --workers 4
+
+and ask it for boards:
+
+    GET /board?More_players=1&Number_repeats=0&seed=42&count=2&format=code
+    GET /health
+    GET /stats
+
+The options not given keep their default values, and format is "json" (the
+tiles, ports and code of each board) or "code" (the codes only). The boards
+are generated on a pool of processes, so the server keeps answering while
+they are solved. A seed gives the boards of BoardGenerator(options, seed)
+.generate_many(count), and identical seeded requests arriving together
+share the same generation. The server only listens on the loopback
+interface.
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+from catanboardgen.codes import board_to_dict
+from catanboardgen.generator import DEFAULT_OPTIONS, ENGINES, BoardGenerator
+
+
+# most boards a single request can ask for
+MAX_COUNT = 1000
+
+# seconds a client has to send its request line and headers
+READ_TIMEOUT = 10.0
+
+TRUE_VALUES = ("1", "true", "yes", "on")
+FALSE_VALUES = ("0", "false", "no", "off")
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+
+
+class RequestError(Exception):
+    """A request the server cannot answer, with its HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def generate_boards(options, seed, engine, count):
+    # run in the worker processes: the boards as dicts, and the time taken
+    start = time.perf_counter()
+    generator = BoardGenerator(options, seed=seed, engine=engine, record_stats=False)
+    boards = [board_to_dict(b) for b in generator.generate_many(count)]
+    return boards, time.perf_counter() - start
+
+
+def ignore_interrupts():
+    # the workers are stopped by the server, not by Ctrl-C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def parse_board_query(query):
+    """(options, seed, engine, count, format) of the query of /board."""
+    options = dict(DEFAULT_OPTIONS)
+    seed, engine, count, fmt = None, "wfc", 1, "json"
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        if key in options:
+            if value.lower() in TRUE_VALUES:
+                options[key] = True
+            elif value.lower() in FALSE_VALUES:
+                options[key] = False
+            else:
+                raise RequestError(400, f"{key} must be 0 or 1")
+        elif key == "seed":
+            try:
+                seed = int(value)
+            except ValueError:
+                raise RequestError(400, "seed must be an integer") from None
+        elif key == "engine":
+            if value not in ENGINES:
+                raise RequestError(400, f"engine must be one of {', '.join(ENGINES)}")
+            engine = value
+        elif key == "count":
+            if not value.isdigit() or not 1 <= int(value) <= MAX_COUNT:
+                raise RequestError(400, f"count must be between 1 and {MAX_COUNT}")
+            count = int(value)
+        elif key == "format":
+            if value not in ("json", "code"):
+                raise RequestError(400, "format must be json or code")
+            fmt = value
+        else:
+            raise RequestError(400, f"Unknown parameter: {key}")
+    return options, seed, engine, count, fmt
+
+
+async def read_request(reader):
+    """The request line of a request, once its headers are read.
+
+    A line longer than the limit of the reader raises RequestError, with
+    the status 400 for the request line and 431 for the headers.
+    """
+    try:
+        request_line = await reader.readline()
+    except ValueError:
+        raise RequestError(400, "Request line too long") from None
+    try:
+        while (await reader.readline()).strip():
+            # headers, unused
+            pass
+    except ValueError:
+        raise RequestError(431, "Request header too long") from None
+    return request_line.decode("latin-1")
+
+
+def check_loopback(host):
+    if host == "localhost":
+        return
+    try:
+        loopback = ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback:
+        raise ValueError(f"The server only listens on the loopback interface, not {host}")
+
+
+class BoardServer:
+    """HTTP server of boards, generating them on a pool of processes.
+
+    - start(): bind the socket (port 0 picks a free one, see .port)
+    - serve_forever(): answer requests until cancelled
+    - close(): stop listening and shut the pool down
+
+    The counters of /stats are kept in .stats. Clients not sending their
+    request within read_timeout seconds get a 408.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, workers=None, read_timeout=READ_TIMEOUT):
+        check_loopback(host)
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.read_timeout = read_timeout
+        self.executor = None
+        self.server = None
+
+        # seeded generations in progress, by (options, seed, engine, count),
+        # shared by the identical requests arriving meanwhile
+        self.pending = {}
+
+        self.started = time.monotonic()
+        self.stats = {
+            "requests": 0,
+            "errors": 0,
+            "boards": 0,
+            "generations": 0,
+            "coalesced": 0,
+            "in_flight": 0,
+            "generation_seconds": 0.0,
+        }
+
+    async def start(self):
+        # spawned rather than forked workers, which would keep the sockets
+        # of the connections open
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=ignore_interrupts,
+        )
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.started = time.monotonic()
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    async def handle(self, reader, writer):
+        # one request per connection
+        try:
+            self.stats["requests"] += 1
+            try:
+                try:
+                    request_line = await asyncio.wait_for(
+                        read_request(reader), self.read_timeout
+                    )
+                except asyncio.TimeoutError:
+                    raise RequestError(408, "Request not received in time") from None
+                status, body = 200, await self.route(request_line)
+            except RequestError as e:
+                status, body = e.status, {"error": str(e)}
+            except Exception as e:
+                status, body = 500, {"error": repr(e)}
+            if status != 200:
+                self.stats["errors"] += 1
+
+            data = json.dumps(body).encode()
+            writer.write(
+                f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                "Connection: close\r\n\r\n".encode()
+                + data
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, request_line):
+        parts = request_line.split()
+        if len(parts) != 3:
+            raise RequestError(400, "Malformed request line")
+        method, target, _ = parts
+        if method != "GET":
+            raise RequestError(405, "Only GET is supported")
+
+        url = urlsplit(target)
+        if url.path == "/health":
+            return {"status": "ok"}
+        if url.path == "/stats":
+            return self.stats_data()
+        if url.path == "/board":
+            return await self.boards(*parse_board_query(url.query))
+        raise RequestError(404, f"No such endpoint: {url.path}")
+
+    async def boards(self, options, seed, engine, count, fmt):
+        key = (tuple(options.values()), seed, engine, count)
+        if seed is not None and key in self.pending:
+            self.stats["coalesced"] += 1
+            boards = await asyncio.shield(self.pending[key])
+        else:
+            task = asyncio.ensure_future(self.generate(options, seed, engine, count))
+            if seed is not None:
+                self.pending[key] = task
+                task.add_done_callback(lambda _: self.pending.pop(key, None))
+            boards = await asyncio.shield(task)
+
+        if fmt == "code":
+            return {"codes": [b["code"] for b in boards]}
+        return {"boards": boards}
+
+    async def generate(self, options, seed, engine, count):
+        self.stats["in_flight"] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            boards, seconds = await loop.run_in_executor(
+                self.executor, generate_boards, options, seed, engine, count
+            )
+        finally:
+            self.stats["in_flight"] -= 1
+        self.stats["generations"] += 1
+        self.stats["boards"] += len(boards)
+        self.stats["generation_seconds"] += seconds
+        return boards
+
+    def stats_data(self):
+        uptime = time.monotonic() - self.started
+        busy = self.stats["generation_seconds"]
+        return {
+            **self.stats,
+            "uptime_seconds": uptime,
+            "workers": self.workers,
+            "boards_per_second": self.stats["boards"] / uptime if uptime else 0.0,
+            "mean_generation_ms": 1000 * busy / max(1, self.stats["generations"]),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="a loopback address")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, help="generating processes (one per CPU)")
+    args = parser.parse_args(argv)
+
+    async def run():
+        server = BoardServer(args.host, args.port, args.workers)
+        await server.start()
+        print(f"Serving boards on http://{args.host}:{server.port}", file=sys.stderr)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Counters and timers of the solver, for one board or summed over many
+"""
+
+
+# constraints a contradiction (a tile left without options) is recorded
+# against: the one whose propagation emptied the options of the tile
+CONSTRAINTS = (
+    "deck",
+    "ressource_clusters",
+    "balanced_ports",
+    "number_clusters",
+    "number_repeats",
+    "six_eight",
+)
+
+# phases of the solver
+PHASES = ("res_wfc", "num_wfc", "res_swap", "num_swap")
+
+COUNTERS = (
+    "collapses",
+    "propagations",
+    "res_restarts",
+    "res_backtracks",
+    "num_restarts",
+    "num_backtracks",
+    "swaps",
+)
+
+
+class SolverStats:
+    """What the solver did to generate boards.
+
+    - counters: collapses, propagations (options removed from a tile by a
+      collapse), restarts and backtracks of each wave function collapse,
+      and swaps of the local search, readable as stats["res_restarts"]
+    - contradictions: tiles left without options, or too few tiles left
+      for the rest of the deck, by constraint
+    - times: seconds spent in each phase
+
+    BoardGenerator records them only when built with record_stats=True
+    (the default); when disabled, the solver is given None and records
+    nothing. Stats of several boards are summed with + or SolverStats.total.
+    """
+
+    __slots__ = ("boards", "counters", "contradictions", "times")
+
+    def __init__(self, boards=1):
+        self.boards = boards
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.contradictions = dict.fromkeys(CONSTRAINTS, 0)
+        self.times = dict.fromkeys(PHASES, 0.0)
+
+    def __getitem__(self, name):
+        return self.counters[name]
+
+    def __setitem__(self, name, value):
+        self.counters[name] = value
+
+    def __add__(self, other):
+        total = SolverStats(0)
+        for stats in (self, other):
+            total.boards += stats.boards
+            for name in ("counters", "contradictions", "times"):
+                values = getattr(total, name)
+                for key, value in getattr(stats, name).items():
+                    values[key] += value
+        return total
+
+    @classmethod
+    def total(cls, stats):
+        """Sum of an iterable of stats, skipping None (disabled stats)."""
+        total = cls(0)
+        for s in stats:
+            if s is not None:
+                total = total + s
+        return total
+
+    def as_dict(self):
+        return {
+            "boards": self.boards,
+            **self.counters,
+            "contradictions": dict(self.contradictions),
+            "times": dict(self.times),
+        }
+
+    def per_board(self):
+        """The stats as a dict, averaged over the boards."""
+        n = max(1, self.boards)
+        return {
+            **{key: value / n for key, value in self.counters.items()},
+            "contradictions": {k: v / n for k, v in self.contradictions.items()},
+            "times": {k: v / n for k, v in self.times.items()},
+        }
+
+    def __repr__(self):
+        return f"SolverStats({self.as_dict()})"
@@ -0,0 +1,128 @@
+"""
+Symmetries of the board layouts, and canonical forms of boards
+
+A symmetry is one of the 6 rotations, or 6 reflections, of the hex grid,
+followed by the translation bringing the tiles back on the layout. As the
+ports are fixed, only the symmetries mapping every port to a port of the
+same ressource leave a board equivalent, unless the ports are ignored.
+"""
+
+from catanboardgen.generator import BoardGenerator
+
+
+def rotate(q, r):
+    # 60 degrees rotation of axial coordinates, around (0, 0)
+    return -r, q + r
+
+
+def reflect(q, r):
+    return q, -q - r
+
+
+def transforms():
+    """The 12 rotations and reflections of the hex grid, as functions."""
+
+    def transform(nb_rotations, reflection):
+        def f(q, r):
+            if reflection:
+                q, r = reflect(q, r)
+            for _ in range(nb_rotations):
+                q, r = rotate(q, r)
+            return q, r
+
+        return f
+
+    return [transform(k, reflection) for reflection in (False, True) for k in range(6)]
+
+
+def layout_symmetries(generator, ignore_ports=False):
+    """Symmetries of the layout of a generator, as permutations of its tiles.
+
+    Each permutation p maps tile i on tile p[i]. The identity comes first.
+    """
+    tiles = generator.tile_centers
+    tile_index = {c: i for i, c in enumerate(tiles)}
+    ports = {(x, y, res) for (x, y, res, o) in generator.ports}
+
+    symmetries = []
+    for f in transforms():
+        image = [f(*c) for c in tiles]
+
+        # translation bringing the image back on the layout, if any
+        dx, dy = (a - b for a, b in zip(min(tiles), min(image)))
+        image = [(x + dx, y + dy) for (x, y) in image]
+        if set(image) != set(tile_index):
+            continue
+
+        if not ignore_ports:
+            port_image = set()
+            for x, y, res in ports:
+                x, y = f(x, y)
+                port_image.add((x + dx, y + dy, res))
+            if port_image != ports:
+                continue
+
+        permutation = [tile_index[c] for c in image]
+        if permutation not in symmetries:
+            symmetries.append(permutation)
+
+    return symmetries
+
+
+def apply_symmetry(permutation, values):
+    image = [None] * len(values)
+    for i, v in enumerate(values):
+        image[permutation[i]] = v
+    return image
+
+
+def canonical_form(ressources, numbers, symmetries):
+    """Representative of a board among its images by the symmetries.
+
+    ressources and numbers are the values of the tiles (codes or names);
+    the representative is the smallest image, comparing the ressources,
+    then the numbers.
+    """
+    return min(
+        (tuple(apply_symmetry(p, ressources)), tuple(apply_symmetry(p, numbers)))
+        for p in symmetries
+    )
+
+
+class Canonicalizer:
+    """Canonical forms of the boards of one options set.
+
+    Keeps the symmetries of the layout, so finding the representative of a
+    board only applies them. The layout is the standard one of the options,
+    unless another one is given.
+    """
+
+    def __init__(self, options=None, ignore_ports=False, layout=None):
+        self.generator = BoardGenerator(options, layout=layout)
+        self.symmetries = layout_symmetries(self.generator, ignore_ports)
+
+    def codes(self, board):
+        if len(board.tiles) != len(self.generator.tile_centers):
+            raise ValueError("Board does not match the layout of the canonicalizer")
+        ressource_list = self.generator.ressource_list
+        return (
+            [ressource_list.index(res) for res in board.deck],
+            board.numbers_deck,
+        )
+
+    def key(self, board):
+        """Hashable key, equal for boards equivalent by symmetry."""
+        return canonical_form(*self.codes(board), self.symmetries)
+
+    def canonical(self, board):
+        """The representative Board of the board and its symmetric images."""
+        return self.generator.make_board(*self.key(board))
+
+    def unique(self, boards):
+        """Yield the boards that are not symmetric images of previous ones."""
+        seen = set()
+        for board in boards:
+            key = self.key(board)
+            if key not in seen:
+                seen.add(key)
+                yield board
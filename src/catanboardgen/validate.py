@@ -0,0 +1,118 @@
+"""
+Check batches of boards, made elsewhere, against the rules of the options
+
+The boards come as (N, tiles) arrays of ressource codes and numbers, like in
+batch.py, or as board codes (see codes.py). The result gives, for each rule,
+whether each board follows it:
+
+- "deck": the board has exactly the tiles and numbers of the deck of its
+  layout, with the 7 on the deserts
+- one entry per rule option: "Ressource_clusters", "Balanced_ports",
+  "Number_clusters" and "Number_repeats", checked whether the option is on
+  or not
+- "valid": the deck, and the rules of the options that are on
+"""
+
+import numpy as np
+
+from catanboardgen.batch import BatchGenerator
+from catanboardgen.codes import OPTION_NAMES, code_to_int, decode
+from catanboardgen.generator import DESERT
+
+
+RULES = ["Ressource_clusters", "Balanced_ports", "Number_clusters", "Number_repeats"]
+
+
+class BoardValidator:
+    """Validate arrays of boards for one options set.
+
+    The adjacency of the layout is built once, then each rule is checked on
+    the whole batch at once with the vectorized checks of BatchGenerator.
+    """
+
+    def __init__(self, options=None):
+        self.batch = BatchGenerator(options)
+        self.options = self.batch.options
+
+        generator = self.batch.generator
+        deck = [generator.ressource_list.index(res) for res in generator.get_deck()]
+        self.nb_tiles = len(generator.tile_centers)
+        self.sorted_deck = np.sort(deck)
+        self.sorted_numbers = np.sort(generator.get_nums(generator.get_deck()))
+
+    def validate(self, ressources, numbers):
+        """Verdicts of each rule, as (N,) bool arrays, see the module docs."""
+        ressources = np.asarray(ressources)
+        numbers = np.asarray(numbers)
+        if ressources.ndim != 2 or ressources.shape[1] != self.nb_tiles:
+            raise ValueError(f"Boards must be arrays of shape (N, {self.nb_tiles})")
+        if numbers.shape != ressources.shape:
+            raise ValueError("Ressources and numbers must have the same shape")
+
+        verdicts = {"deck": self.check_deck(ressources, numbers)}
+
+        # out of range values already fail the deck, keep them in range so
+        # the other checks can index with them
+        res = np.clip(ressources, 0, DESERT).astype(np.int8)
+        nums = np.clip(numbers, 0, 12).astype(np.int8)
+        verdicts["Ressource_clusters"] = self.batch.check_ressource_clusters(res).all(1)
+        verdicts["Balanced_ports"] = self.batch.check_ports(res).all(1)
+        verdicts["Number_clusters"] = self.batch.check_number_clusters(nums).all(1)
+        verdicts["Number_repeats"] = self.batch.check_number_repeats(res, nums).all(1)
+
+        verdicts["valid"] = verdicts["deck"].copy()
+        for rule in RULES:
+            if self.options[rule]:
+                verdicts["valid"] &= verdicts[rule]
+        return verdicts
+
+    def check_deck(self, ressources, numbers):
+        valid = (np.sort(ressources, 1) == self.sorted_deck).all(1)
+        valid &= (np.sort(numbers, 1) == self.sorted_numbers).all(1)
+        # the 7 goes on the deserts, and only there
+        valid &= ((ressources == DESERT) == (numbers == 7)).all(1)
+        return valid
+
+
+def validate_codes(codes, options=None):
+    """Verdicts of each rule for a list of board codes (or their ints).
+
+    Each board is checked against the options stored in its code, or the
+    given options (the layout, so More_players, always comes from the code).
+    Codes that cannot be decoded fail every rule, and the extra "code" entry
+    tells which ones were decoded.
+    """
+    n = len(codes)
+    verdicts = {
+        name: np.zeros(n, dtype=bool) for name in ["code", "deck", *RULES, "valid"]
+    }
+
+    # boards grouped by the options they are checked against
+    groups = {}
+    for i, code in enumerate(codes):
+        try:
+            value = code_to_int(code) if isinstance(code, str) else code
+            board_options, ressources, numbers = decode(value)
+        except ValueError:
+            continue
+        if options is not None:
+            board_options = {
+                **board_options,
+                **options,
+                "More_players": board_options["More_players"],
+            }
+        key = tuple(bool(board_options[name]) for name in OPTION_NAMES)
+        groups.setdefault(key, ([], [], []))
+        rows, res, nums = groups[key]
+        rows.append(i)
+        res.append(ressources)
+        nums.append(numbers)
+
+    for key, (rows, res, nums) in groups.items():
+        validator = BoardValidator(dict(zip(OPTION_NAMES, key)))
+        group_verdicts = validator.validate(np.array(res), np.array(nums))
+        verdicts["code"][rows] = True
+        for name, values in group_verdicts.items():
+            verdicts[name][rows] = values
+
+    return verdicts
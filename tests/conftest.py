@@ -0,0 +1,22 @@
+import pytest
+
+
+def rules_broken_by(generator, board):
+    # the rules of the options of the generator that are on, which the board
+    # breaks
+    checks = {
+        "Ressource_clusters": generator.check_ressource_clusters,
+        "Balanced_ports": generator.check_ports,
+        "Number_clusters": generator.check_number_clusters,
+        "Number_repeats": generator.check_number_repeats,
+    }
+    return [
+        name
+        for name, check in checks.items()
+        if generator.options[name] and not all(check(board.tiles))
+    ]
+
+
+@pytest.fixture
+def broken_rules():
+    return rules_broken_by
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from catanboardgen.archive import ArchiveWriter, BoardArchive, pip_spread
+from catanboardgen.generator import BoardGenerator
+from catanboardgen.layout import Layout
+
+
+def matching(archive, options=None, max_pip_spread=None):
+    # the indices are views on the index file, released before it closes
+    indices = archive.matching_indices(options, max_pip_spread)
+    return sorted(i for idx in indices for i in idx)
+
+
+@pytest.mark.parametrize("more_players", [False, True])
+def test_archive_round_trip(tmp_path, more_players):
+    path = str(tmp_path / "boards.catb")
+    relaxed = {"More_players": more_players, "Number_repeats": False}
+    boards = BoardGenerator({"More_players": more_players}, seed=5).generate_many(20)
+    boards += BoardGenerator(relaxed, seed=6).generate_many(10)
+
+    with ArchiveWriter(path, more_players=more_players) as writer:
+        writer.write_many(boards)
+
+    with BoardArchive(path) as archive:
+        assert len(archive) == len(boards)
+        assert archive.more_players == more_players
+        for i, board in enumerate(boards):
+            read = archive[i]
+            assert read.options == board.options
+            assert read.deck == board.deck
+            assert read.numbers_deck == board.numbers_deck
+
+        assert matching(archive, {"Number_repeats": False}) == list(range(20, 30))
+
+        spreads = [pip_spread(*archive.codes(i)[1:]) for i in range(len(boards))]
+        assert matching(archive, max_pip_spread=3) == [
+            i for i, spread in enumerate(spreads) if spread <= 3
+        ]
+
+        board = archive.random_board({"Number_repeats": False}, rng=random.Random(0))
+        assert not board.options["Number_repeats"]
+
+
+def test_archive_rejects_other_layouts(tmp_path):
+    path = str(tmp_path / "boards.catb")
+    five_six = BoardGenerator({"More_players": True}, seed=5).generate()
+    hexagon = BoardGenerator({"Number_repeats": False}, layout=Layout.hexagon(3)).generate()
+    with ArchiveWriter(path) as writer:
+        for board in [five_six, hexagon]:
+            with pytest.raises(ValueError):
+                writer.write(board)
+        with pytest.raises(ValueError):
+            writer.write_codes(hexagon.options, [0] * 37, [2] * 37)
+        writer.write(BoardGenerator(seed=5).generate())
+
+    with BoardArchive(path) as archive:
+        assert len(archive) == 1
@@ -0,0 +1,18 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from catanboardgen.batch import BatchGenerator  # noqa: E402
+from catanboardgen.benchmark import all_options  # noqa: E402
+
+
+@pytest.mark.parametrize("options", all_options())
+def test_batch_boards_follow_the_rules(options, broken_rules):
+    batch = BatchGenerator(options, seed=1, batch_size=512)
+    ressources, numbers = batch.generate(50)
+    assert ressources.shape == numbers.shape == (50, len(batch.generator.tile_centers))
+
+    generator = batch.generator
+    for board in batch.to_boards(ressources, numbers):
+        assert sorted(board.deck) == sorted(generator.get_deck())
+        assert broken_rules(generator, board) == []
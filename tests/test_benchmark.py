@@ -0,0 +1,18 @@
+from catanboardgen.benchmark import compare_startup
+
+
+def startup(**times):
+    return {"startup": {"process_ms": 30.0, "app_import_ms": None, **times}}
+
+
+def test_small_startup_changes_are_noise():
+    baseline = startup(import_ms=3.0, first_board_ms=3.0)
+
+    # 50% slower, but by 1.5 ms only
+    assert compare_startup(baseline, startup(import_ms=4.5, first_board_ms=3.0)) == []
+
+    slower = compare_startup(baseline, startup(import_ms=6.0, first_board_ms=3.0))
+    assert slower == [("import_ms", 3.0, 6.0)]
+    assert compare_startup(
+        baseline, startup(import_ms=4.5, first_board_ms=3.0), min_change_ms=1.0
+    ) == [("import_ms", 3.0, 4.5)]
@@ -0,0 +1,96 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from catanboardgen.benchmark import all_options  # noqa: E402
+from catanboardgen.bias import BiasAggregator, UniformSampler, chi2_sf, chi_square  # noqa: E402
+from catanboardgen.generator import BoardGenerator  # noqa: E402
+from catanboardgen.layout import RESSOURCES, Layout  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "x, dof, p_value",
+    [
+        (3.841, 1, 0.05),
+        (6.635, 1, 0.01),
+        (5.991, 2, 0.05),
+        (13.277, 4, 0.01),
+        (18.307, 10, 0.05),
+        (1.0, 3, 0.8013),
+        (124.342, 100, 0.05),
+    ],
+)
+def test_chi2_sf(x, dof, p_value):
+    assert chi2_sf(x, dof) == pytest.approx(p_value, abs=2e-4)
+
+
+def test_chi_square():
+    assert chi_square([10, 20, 30], [20, 40, 60]) == {"chi2": 0.0, "dof": 2, "p_value": 1.0}
+    # the categories empty in both samples are left out
+    result = chi_square([30, 10, 0], [10, 30, 0])
+    assert result["dof"] == 1
+    assert result["chi2"] == pytest.approx(20.0)
+    assert chi_square([5, 0], [0, 0])["p_value"] == 1.0
+
+
+def expected_counts(boards, layout):
+    ressources = np.zeros((len(layout), 6), dtype=int)
+    numbers = np.zeros((len(layout), 13), dtype=int)
+    ressource_pairs = np.zeros((6, 6), dtype=int)
+    number_pairs = np.zeros((13, 13), dtype=int)
+    for board in boards:
+        codes = [RESSOURCES.index(res) for res in board.deck]
+        for i, (res, num) in enumerate(zip(codes, board.numbers_deck)):
+            ressources[i, res] += 1
+            numbers[i, num] += 1
+            for j in layout.tile_neighbours[i]:
+                if j > i:
+                    ressource_pairs[min(res, codes[j]), max(res, codes[j])] += 1
+                    num_j = board.numbers_deck[j]
+                    number_pairs[min(num, num_j), max(num, num_j)] += 1
+    return ressources, numbers, ressource_pairs, number_pairs
+
+
+def test_aggregator_counts():
+    layout = Layout.hexagon(1)
+    generator = BoardGenerator({"Number_repeats": False}, seed=0, layout=layout)
+    boards = generator.generate_many(3)
+
+    # two boards buffered in a block, the third one flushed
+    aggregator = BiasAggregator(layout, block_size=2)
+    aggregator.add_many(boards)
+    aggregator.flush()
+    assert aggregator.boards == 3
+    counts = (
+        aggregator.ressource_counts,
+        aggregator.number_counts,
+        aggregator.ressource_pairs,
+        aggregator.number_pairs,
+    )
+    for counted, expected in zip(counts, expected_counts(boards, layout)):
+        assert (counted == expected).all()
+    # a board has one pair of values for each pair of neighbouring tiles
+    assert aggregator.ressource_pairs.sum() == 3 * 12
+
+    first, second = BiasAggregator(layout), BiasAggregator(layout)
+    first.add(boards[0])
+    second.add_many(boards[1:])
+    merged = first.merge(second)
+    assert merged.boards == 3
+    assert (merged.number_pairs == aggregator.number_pairs).all()
+    with pytest.raises(ValueError):
+        merged.merge(BiasAggregator(Layout.hexagon(2)))
+
+
+@pytest.mark.parametrize(
+    "options", [o for o in all_options() if not o["More_players"]][::3]
+)
+def test_uniform_boards_follow_the_rules(options, broken_rules):
+    sampler = UniformSampler(options, seed=1, batch_size=512)
+    ressources, numbers = sampler.generate(20)
+    assert ressources.shape == numbers.shape == (20, len(sampler.layout))
+
+    generator = sampler.batch.generator
+    for board in sampler.batch.to_boards(ressources, numbers):
+        assert sorted(board.deck) == sorted(generator.get_deck())
+        assert broken_rules(generator, board) == []
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from catanboardgen.cli import main
+from catanboardgen.codes import board_from_code, board_to_code
+from catanboardgen.generator import DEFAULT_OPTIONS, BoardGenerator
+
+
+def run(capsys, *args):
+    assert main(["generate", *args]) == 0
+    return capsys.readouterr().out.splitlines()
+
+
+def test_codes_are_the_seeded_boards(capsys):
+    codes = run(capsys, "--count", "5", "--seed", "3", "--format", "code", "--more-players")
+    boards = BoardGenerator({"More_players": True}, seed=3).generate_many(5)
+    assert codes == [board_to_code(b) for b in boards]
+
+
+def test_ndjson(capsys):
+    lines = run(capsys, "--count", "3", "--seed", "3", "--no-number-repeats")
+    boards = [json.loads(line) for line in lines]
+    assert len(boards) == 3
+    for board in boards:
+        assert board["options"] == {**DEFAULT_OPTIONS, "Number_repeats": False}
+        decoded = board_from_code(board["code"])
+        assert [t["ressource"] for t in board["tiles"]] == decoded.deck
+        assert [t["number"] for t in board["tiles"]] == decoded.numbers_deck
+
+
+def test_workers_do_not_change_the_boards(capsys):
+    args = ["--count", "600", "--seed", "8", "--format", "code"]
+    one = run(capsys, *args, "--workers", "1")
+    two = run(capsys, *args, "--workers", "2")
+    assert len(one) == 600
+    assert one == two
+
+
+@pytest.mark.parametrize(
+    "args", [["--no-such-option"], ["--engine", "magic"], ["--count", "many"]]
+)
+def test_invalid_options(args, capsys):
+    with pytest.raises(SystemExit) as exit:
+        main(["generate", *args])
+    assert exit.value.code == 2
+    assert capsys.readouterr().out == ""
+
+
+def test_negative_count(capsys):
+    assert main(["generate", "--count", "-1"]) == 2
+    assert "--count" in capsys.readouterr().err
@@ -0,0 +1,55 @@
+import pytest
+
+from catanboardgen.codes import (
+    board_from_code,
+    board_from_int,
+    board_to_code,
+    board_to_dict,
+    board_to_int,
+)
+from catanboardgen.generator import BoardGenerator
+from catanboardgen.layout import Layout
+
+
+@pytest.mark.parametrize("more_players", [False, True])
+def test_code_round_trip(more_players):
+    options = {"More_players": more_players, "Number_repeats": not more_players}
+    for board in BoardGenerator(options, seed=3).generate_many(10):
+        code = board_to_code(board)
+        assert len(code) <= (30 if more_players else 20)
+
+        decoded = board_from_code(code)
+        assert decoded.options == board.options
+        assert decoded.deck == board.deck
+        assert decoded.numbers_deck == board.numbers_deck
+        assert board_from_int(board_to_int(board)).deck == board.deck
+
+
+def test_invalid_codes_are_rejected():
+    with pytest.raises(ValueError):
+        board_from_code("not a code!")
+
+    # a code with more tiles than its layout
+    code = board_to_code(BoardGenerator({"More_players": True}, seed=3).generate())
+    with pytest.raises(ValueError):
+        board_from_code("A" + code[1:] + code)
+
+
+def test_other_layouts_have_no_code():
+    hexagon = BoardGenerator({"Number_repeats": False}, layout=Layout.hexagon(1)).generate()
+    with pytest.raises(ValueError):
+        board_to_code(hexagon)
+    assert board_to_dict(hexagon)["code"] is None
+
+    # a layout of 19 tiles, like the standard one, but with other ports
+    standard = Layout.standard()
+    layout = Layout(standard.tile_centers, standard.deck, standard.numbers, [])
+    board = BoardGenerator(layout=layout, seed=3).generate()
+    with pytest.raises(ValueError):
+        board_to_code(board)
+
+    # the standard layout, saved and loaded
+    layout = Layout.from_dict(standard.to_dict())
+    board = BoardGenerator(layout=layout, seed=3).generate()
+    assert board_from_code(board_to_code(board)).deck == board.deck
+    assert board_to_dict(board)["code"] == board_to_code(board)
@@ -0,0 +1,77 @@
+from itertools import permutations
+
+import pytest
+
+from catanboardgen.benchmark import all_options
+from catanboardgen.counting import BoardEnumerator
+from catanboardgen.generator import BoardGenerator
+from catanboardgen.layout import Layout
+from catanboardgen.symmetry import Canonicalizer
+
+
+def small_layout():
+    # the tiles and ports of the hexagon of radius 1, with a deck small
+    # enough to try every board
+    hexagon = Layout.hexagon(1)
+    return Layout(
+        hexagon.tile_centers,
+        ["sheep", "sheep", "wheat", "wheat", "stone", "stone", "desert"],
+        [5, 5, 5, 9, 9, 9],
+        hexagon.ports,
+    )
+
+
+LAYOUT = small_layout()
+# Number_repeats cannot hold for 5-6 players with the deck of LAYOUT
+OPTIONS = [o for o in all_options() if not (o["More_players"] and o["Number_repeats"])]
+
+
+def all_boards(generator):
+    ressource_list = generator.ressource_list
+    for deck in set(permutations(LAYOUT.deck)):
+        ressources = [ressource_list.index(res) for res in deck]
+        for order in set(permutations(LAYOUT.numbers)):
+            order = iter(order)
+            numbers = [7 if res == "desert" else next(order) for res in deck]
+            yield generator.make_board(ressources, numbers)
+
+
+def valid_boards(options, broken_rules):
+    generator = BoardGenerator(options, layout=LAYOUT)
+    return [b for b in all_boards(generator) if broken_rules(generator, b) == []]
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_counts_match_a_brute_force(options, broken_rules):
+    boards = valid_boards(options, broken_rules)
+    enumerator = BoardEnumerator(options, layout=LAYOUT)
+    assert enumerator.count_boards() == len(boards)
+
+    # with the ports, only the identity is left
+    assert len(enumerator.symmetries) == 1
+    assert enumerator.count_boards(distinct=True) == len(boards)
+
+    ignore_ports = not options["Balanced_ports"]
+    enumerator = BoardEnumerator(options, ignore_ports=True, layout=LAYOUT)
+    canonicalizer = Canonicalizer(options, ignore_ports=ignore_ports, layout=LAYOUT)
+    distinct = {canonicalizer.key(b) for b in boards}
+    assert enumerator.count_boards(distinct=True) == len(distinct)
+    if ignore_ports:
+        assert len(enumerator.symmetries) == 12
+
+
+def test_workers_do_not_change_the_counts():
+    options = {"Balanced_ports": False, "Number_repeats": False}
+    enumerator = BoardEnumerator(options, ignore_ports=True, layout=LAYOUT)
+    assert enumerator.count_boards(workers=2) == enumerator.count_boards()
+    assert enumerator.count_boards(distinct=True, workers=2) == enumerator.count_boards(
+        distinct=True
+    )
+
+
+def test_canonicalizer_checks_the_layout():
+    board = BoardGenerator({"More_players": True}, seed=1).generate()
+    with pytest.raises(ValueError):
+        Canonicalizer({"More_players": False}).key(board)
+    with pytest.raises(ValueError):
+        Canonicalizer(layout=LAYOUT).codes(board)
@@ -0,0 +1,62 @@
+import pytest
+
+from catanboardgen.benchmark import all_options
+from catanboardgen.generator import ENGINES, BoardGenerator
+from catanboardgen.layout import Layout
+
+
+def option_id(options):
+    return "-".join(name for name, value in options.items() if value) or "none"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("options", all_options(), ids=option_id)
+def test_generated_boards_follow_the_rules(options, engine, broken_rules):
+    generator = BoardGenerator(options, seed=1, engine=engine)
+    for board in generator.generate_many(3):
+        assert sorted(board.deck) == sorted(generator.get_deck())
+        assert broken_rules(generator, board) == []
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_seeded_boards_are_reproducible(engine):
+    first = BoardGenerator(seed=7, engine=engine).generate_many(3)
+    second = BoardGenerator(seed=7, engine=engine).generate_many(3)
+    assert [b.deck for b in first] == [b.deck for b in second]
+    assert [b.numbers_deck for b in first] == [b.numbers_deck for b in second]
+
+
+def small_layouts():
+    hexagon = Layout.hexagon(1)
+    # the same tiles without a desert
+    no_desert = Layout(
+        hexagon.tile_centers,
+        ["brick", "wood", "sheep", "sheep", "wheat", "stone", "wood"],
+        [3, 4, 5, 6, 8, 9, 10],
+        hexagon.ports,
+    )
+    return [hexagon, no_desert]
+
+
+@pytest.mark.parametrize("layout", small_layouts(), ids=["hexagon", "no_desert"])
+@pytest.mark.parametrize("weighted_collapse", [False, True])
+def test_decks_without_some_options(layout, weighted_collapse, broken_rules):
+    # ressources and numbers without copies in the deck are never placed
+    generator = BoardGenerator(
+        {"Number_repeats": False}, seed=1, layout=layout,
+        weighted_collapse=weighted_collapse,
+    )
+    for board in generator.generate_many(5):
+        assert sorted(board.deck) == sorted(layout.deck)
+        assert sorted(n for n in board.numbers_deck if n != 7) == sorted(layout.numbers)
+        assert broken_rules(generator, board) == []
+
+
+def test_large_layouts_use_the_local_search(broken_rules):
+    assert BoardGenerator().engine == "wfc"
+    assert BoardGenerator(engine="swap").engine == "swap"
+
+    generator = BoardGenerator({"Number_repeats": False}, seed=1, layout=Layout.hexagon(10))
+    assert generator.engine == "swap"
+    board = generator.generate(budget=30)
+    assert broken_rules(generator, board) == []
@@ -0,0 +1,16 @@
+from catanboardgen.parallel import generate_parallel
+
+
+def codes(boards):
+    return [(b.deck, b.numbers_deck) for b in boards]
+
+
+def test_seeded_runs_do_not_depend_on_the_workers():
+    options = {"More_players": False}
+    one = codes(generate_parallel(options, 25, seed=11, workers=1, chunk_size=10))
+    three = codes(generate_parallel(options, 25, seed=11, workers=3, chunk_size=10))
+    assert len(one) == 25
+    assert one == three
+
+    other = codes(generate_parallel(options, 25, seed=12, workers=2, chunk_size=10))
+    assert other != one
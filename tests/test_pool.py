@@ -0,0 +1,27 @@
+from catanboardgen.generator import DEFAULT_OPTIONS, options_key, relaxed_options
+from catanboardgen.pool import BoardPool
+
+
+def test_pop_takes_boards_of_its_options():
+    pool = BoardPool(size=2)
+    try:
+        for more_players in [False, True]:
+            options = {**DEFAULT_OPTIONS, "More_players": more_players}
+            board = pool.pop(options)
+            assert board.options == options
+    finally:
+        pool.stop()
+
+
+def test_fallbacks_do_not_evict_the_options_used():
+    pool = BoardPool(size=1, max_keys=2)
+    try:
+        options = dict(DEFAULT_OPTIONS)
+        pool.pop(options)
+        for relaxed in relaxed_options(options):
+            assert pool.pop(relaxed, touch=False).options == relaxed
+
+        assert list(pool.boards) == [options_key(options)]
+        assert list(pool.generators) == [options_key(options)]
+    finally:
+        pool.stop()
@@ -0,0 +1,82 @@
+import struct
+import xml.etree.ElementTree as ET
+import zlib
+
+import pytest
+
+from catanboardgen.generator import BoardGenerator
+from catanboardgen.layout import Layout
+from catanboardgen.render import BoardRenderer
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+def png_chunks(data):
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    chunks, pos = {}, 8
+    while pos < len(data):
+        (length,) = struct.unpack(">I", data[pos : pos + 4])
+        kind, body = data[pos + 4 : pos + 8], data[pos + 8 : pos + 8 + length]
+        (crc,) = struct.unpack(">I", data[pos + 8 + length : pos + 12 + length])
+        assert crc == zlib.crc32(kind + body)
+        chunks[kind] = body
+        pos += 12 + length
+    return chunks
+
+
+def png_pixels(data):
+    # the size of the image, and its rows with their filter byte
+    chunks = png_chunks(data)
+    assert list(chunks) == [b"IHDR", b"PLTE", b"IDAT", b"IEND"]
+    width, height = struct.unpack(">II", chunks[b"IHDR"][:8])
+    return width, height, zlib.decompress(chunks[b"IDAT"])
+
+
+@pytest.mark.parametrize("layout", [None, Layout.standard(True), Layout.hexagon(3)])
+@pytest.mark.parametrize("level", [None, 1])
+def test_png(layout, level):
+    generator = BoardGenerator({"Number_repeats": False}, seed=1, layout=layout)
+    renderer = BoardRenderer(generator.layout, tile_size=20)
+    boards = generator.generate_many(3)
+
+    for board in boards:
+        width, height, pixels = png_pixels(renderer.png(board, level))
+        assert (width, height) == (renderer.width, renderer.height)
+        assert len(pixels) == (width + 1) * height
+
+    width, height, pixels = png_pixels(renderer.png_sheet(boards, columns=2, level=level))
+    assert (width, height) == (2 * renderer.width, 2 * renderer.height)
+    assert len(pixels) == (width + 1) * height
+
+
+def test_joined_png_has_the_pixels_of_the_compressed_one():
+    renderer = BoardRenderer()
+    boards = BoardGenerator(seed=2).generate_many(12)
+    for board in boards:
+        assert png_pixels(renderer.png(board)) == png_pixels(renderer.png(board, level=1))
+    joined = renderer.png_sheet(boards, columns=5)
+    assert png_pixels(joined) == png_pixels(renderer.png_sheet(boards, columns=5, level=9))
+
+
+def test_svg():
+    generator = BoardGenerator(seed=3)
+    renderer = BoardRenderer()
+    board = generator.generate()
+    root = ET.fromstring(renderer.svg(board))
+    assert root.tag == SVG + "svg"
+    assert (root.get("width"), root.get("height")) == (str(renderer.width), str(renderer.height))
+    assert len(root.findall(SVG + "polygon")) == len(board.tiles)
+
+    boards = generator.generate_many(7)
+    root = ET.fromstring(renderer.svg_sheet(boards, columns=3))
+    cells = root.findall(SVG + "g")
+    assert len(cells) == 7
+    assert all(len(cell.findall(SVG + "polygon")) == len(board.tiles) for cell in cells)
+
+
+def test_boards_of_another_layout_are_refused():
+    board = BoardGenerator({"More_players": True}, seed=1).generate()
+    renderer = BoardRenderer()
+    for draw in (renderer.png, renderer.svg):
+        with pytest.raises(ValueError):
+            draw(board)
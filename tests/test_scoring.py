@@ -0,0 +1,81 @@
+import random
+import statistics
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from catanboardgen.generator import BoardGenerator  # noqa: E402
+from catanboardgen.layout import PORT_DIRECTIONS, Layout  # noqa: E402
+from catanboardgen.scoring import DEFAULT_WEIGHTS, BoardScorer, corner_keys  # noqa: E402
+
+
+def pips(number):
+    return 0 if number == 7 else 6 - abs(7 - number)
+
+
+def scalar_scores(board):
+    # the scores of one board, tile by tile
+    ressource_pips = {}
+    vertex_pips = {}
+    for tile in board.tiles:
+        if tile.ressource != "desert":
+            res = tile.ressource
+            ressource_pips[res] = ressource_pips.get(res, 0) + pips(tile.number)
+        for key in corner_keys(tile.x, tile.y):
+            vertex_pips[key] = vertex_pips.get(key, 0) + pips(tile.number)
+
+    port_pips = [0]
+    for q, r, res, o in board.ports:
+        dq, dr = PORT_DIRECTIONS[o % 6]
+        for key in set(corner_keys(q, r)) & set(corner_keys(q + dq, r + dr)):
+            port_pips.append(vertex_pips[key])
+
+    scores = {
+        "ressource_spread": max(ressource_pips.values()) - min(ressource_pips.values()),
+        "max_vertex_pips": max(vertex_pips.values()),
+        "vertex_pips_std": statistics.pstdev(vertex_pips.values()),
+        "max_port_pips": max(port_pips),
+    }
+    scores["score"] = sum(w * scores[name] for name, w in DEFAULT_WEIGHTS.items())
+    return scores
+
+
+@pytest.mark.parametrize("layout", [None, Layout.standard(True), Layout.hexagon(3)])
+def test_batch_scores_match_the_scalar_ones(layout):
+    generator = BoardGenerator({"Number_repeats": False}, seed=4, layout=layout)
+    scorer = BoardScorer(generator.layout)
+    boards = generator.generate_many(5)
+
+    batch = scorer.score_boards(boards)
+    for k, board in enumerate(boards):
+        expected = scalar_scores(board)
+        assert scorer.score(board) == pytest.approx(expected)
+        assert {name: batch[name][k] for name in expected} == pytest.approx(expected)
+
+
+def test_best_of_keeps_the_lowest_score():
+    scorer = BoardScorer()
+    best = scorer.best_of(BoardGenerator(), 10, random.Random(3))
+    boards = BoardGenerator().generate_many(10, random.Random(3))
+    scores = [scorer.score(b)["score"] for b in boards]
+    assert best.deck == boards[scores.index(min(scores))].deck
+    assert scorer.score(best)["score"] == min(scores)
+
+
+def test_fair_boards_follow_the_rules(broken_rules):
+    scorer = BoardScorer()
+    generator = BoardGenerator(seed=5)
+    scores = scorer.score_boards(generator.generate_many(50))["score"]
+    threshold = float(np.quantile(scores, 0.2))
+
+    generator = BoardGenerator(seed=6)
+    for _ in range(5):
+        board = scorer.generate_fair(generator, threshold, tries=200)
+        assert scorer.score(board)["score"] <= threshold
+        assert broken_rules(generator, board) == []
+
+
+def test_scorer_checks_the_layout():
+    with pytest.raises(ValueError):
+        BoardScorer().best_of(BoardGenerator({"More_players": True}), 2)
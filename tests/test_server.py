@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+
+from catanboardgen.codes import board_to_code
+from catanboardgen.generator import DEFAULT_OPTIONS, BoardGenerator
+from catanboardgen.server import BoardServer, RequestError, parse_board_query
+
+
+async def request(port, data):
+    # send raw request bytes, return the status and the JSON body
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def with_server(test, **kwargs):
+    # run the coroutine function test on a started server
+    async def run():
+        server = BoardServer(port=0, workers=1, **kwargs)
+        await server.start()
+        try:
+            return await test(server)
+        finally:
+            await server.close()
+
+    return asyncio.run(run())
+
+
+def run_requests(*requests):
+    async def test(server):
+        return [await request(server.port, data) for data in requests]
+
+    return with_server(test)
+
+
+def test_health_and_errors():
+    responses = run_requests(
+        b"GET /health HTTP/1.1\r\n\r\n",
+        b"GET /nowhere HTTP/1.1\r\n\r\n",
+        b"POST /health HTTP/1.1\r\n\r\n",
+        b"GET /board?count=0 HTTP/1.1\r\n\r\n",
+    )
+    assert [status for status, _ in responses] == [200, 404, 405, 400]
+    assert responses[0][1] == {"status": "ok"}
+
+
+def test_long_lines_get_an_answer():
+    long_line, long_header = run_requests(
+        b"GET /health?" + b"a" * 100000 + b" HTTP/1.1\r\n\r\n",
+        b"GET /health HTTP/1.1\r\nX-Long: " + b"a" * 100000 + b"\r\n\r\n",
+    )
+    assert long_line[0] == 400
+    assert long_header[0] == 431
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["Number_repeats=maybe", "count=0", "count=1001", "count=two", "seed=x", "colour=red"],
+)
+def test_bad_queries(query):
+    with pytest.raises(RequestError) as error:
+        parse_board_query(query)
+    assert error.value.status == 400
+
+
+def test_board_query():
+    options, seed, engine, count, fmt = parse_board_query(
+        "More_players=yes&Number_repeats=0&seed=42&count=3&format=code"
+    )
+    assert options == {**DEFAULT_OPTIONS, "More_players": True, "Number_repeats": False}
+    assert (seed, engine, count, fmt) == (42, "wfc", 3, "code")
+
+
+def test_identical_seeded_requests_share_a_generation():
+    n = 4
+    data = b"GET /board?More_players=1&seed=42&count=3&format=code HTTP/1.1\r\n\r\n"
+
+    async def test(server):
+        responses = await asyncio.gather(*[request(server.port, data) for _ in range(n)])
+        return responses, dict(server.stats)
+
+    responses, stats = with_server(test)
+    assert stats["generations"] == 1
+    assert stats["coalesced"] == n - 1
+
+    boards = BoardGenerator({"More_players": True}, seed=42).generate_many(3)
+    expected = {"codes": [board_to_code(b) for b in boards]}
+    assert responses == [(200, expected)] * n
+
+
+def test_silent_clients_time_out():
+    async def test(server):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        # the request line, without the end of the headers
+        writer.write(b"GET /health HTTP/1.1\r\n")
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return int(response.split()[1])
+
+    assert with_server(test, read_timeout=0.2) == 408
@@ -0,0 +1,62 @@
+import pytest
+
+from catanboardgen.generator import ENGINES, BoardGenerator
+from catanboardgen.stats import CONSTRAINTS, COUNTERS, PHASES, SolverStats
+
+# the constraints of the contradictions of each option
+OPTION_CONSTRAINTS = {
+    "Ressource_clusters": ["ressource_clusters"],
+    "Balanced_ports": ["balanced_ports"],
+    "Number_clusters": ["number_clusters"],
+    "Number_repeats": ["number_repeats", "six_eight"],
+}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_total_and_per_board(engine):
+    boards = BoardGenerator({"More_players": True}, seed=2, engine=engine).generate_many(10)
+    total = SolverStats.total([b.stats for b in boards] + [None])
+    assert total.boards == 10
+    for name in COUNTERS:
+        assert total[name] == sum(b.stats[name] for b in boards)
+    for phase in PHASES:
+        assert total.times[phase] == pytest.approx(sum(b.stats.times[phase] for b in boards))
+
+    per_board = total.per_board()
+    assert per_board["collapses"] == pytest.approx(total["collapses"] / 10)
+    assert per_board["times"]["num_" + engine] == pytest.approx(total.times["num_" + engine] / 10)
+    assert SolverStats.total([]).per_board()["swaps"] == 0
+
+
+@pytest.mark.parametrize("option", OPTION_CONSTRAINTS)
+def test_contradictions_by_constraint(option):
+    options = {name: name == option for name in OPTION_CONSTRAINTS}
+    boards = BoardGenerator({"More_players": True, **options}, seed=3).generate_many(30)
+    total = SolverStats.total(b.stats for b in boards)
+    assert set(total.contradictions) == set(CONSTRAINTS)
+
+    # a contradiction makes the solver backtrack, or restart
+    failures = sum(total[name] for name in COUNTERS if name.endswith(("restarts", "backtracks")))
+    assert sum(total.contradictions.values()) == failures
+    # the rules that are off are never broken
+    broken = {name for name, n in total.contradictions.items() if n}
+    assert broken <= set(OPTION_CONSTRAINTS[option]) | {"deck"}
+
+    added = boards[0].stats + boards[1].stats
+    for name in CONSTRAINTS:
+        assert added.contradictions[name] == (
+            boards[0].stats.contradictions[name] + boards[1].stats.contradictions[name]
+        )
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_stats_can_be_turned_off(engine):
+    generator = BoardGenerator(seed=4, engine=engine, record_stats=False)
+    boards = generator.generate_many(3)
+    assert all(b.stats is None for b in boards)
+    assert SolverStats.total(b.stats for b in boards).as_dict() == SolverStats(0).as_dict()
+
+    # the same boards as with the stats
+    recorded = BoardGenerator(seed=4, engine=engine).generate_many(3)
+    assert [b.deck for b in boards] == [b.deck for b in recorded]
+    assert [b.numbers_deck for b in boards] == [b.numbers_deck for b in recorded]
@@ -0,0 +1,63 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from catanboardgen.codes import board_to_code  # noqa: E402
+from catanboardgen.generator import BoardGenerator  # noqa: E402
+from catanboardgen.validate import BoardValidator, validate_codes  # noqa: E402
+
+
+def as_arrays(generator, boards):
+    ressource_list = generator.ressource_list
+    ressources = np.array([[ressource_list.index(res) for res in b.deck] for b in boards])
+    numbers = np.array([b.numbers_deck for b in boards])
+    return ressources, numbers
+
+
+@pytest.mark.parametrize("more_players", [False, True])
+def test_generated_boards_are_valid(more_players):
+    generator = BoardGenerator({"More_players": more_players}, seed=2)
+    ressources, numbers = as_arrays(generator, generator.generate_many(20))
+
+    verdicts = BoardValidator(generator.options).validate(ressources, numbers)
+    assert verdicts["valid"].all()
+    assert verdicts["deck"].all()
+
+
+def test_broken_rules_are_reported():
+    generator = BoardGenerator(seed=2)
+    ressources, numbers = as_arrays(generator, generator.generate_many(2))
+
+    # give a tile the number of one of its neighbours, by swapping it with
+    # another tile of this number
+    res, nums = ressources[0], numbers[0]
+    a, b, c = next(
+        (a, b, c)
+        for a, neighbours in enumerate(generator.tile_neighbours)
+        for b in neighbours
+        for c in range(len(nums))
+        if nums[c] == nums[b] and c not in (a, b) and 5 not in (res[a], res[c])
+    )
+    nums[[a, c]] = nums[[c, a]]
+    # a tile of the wrong deck
+    numbers[1, numbers[1] != 7] = 2
+
+    verdicts = BoardValidator().validate(ressources, numbers)
+    assert not verdicts["Number_clusters"][0]
+    assert verdicts["deck"][0]
+    assert not verdicts["deck"][1]
+    assert not verdicts["valid"].any()
+
+
+def test_validate_codes():
+    boards = BoardGenerator({"Number_repeats": False}, seed=4).generate_many(5)
+    codes = [board_to_code(b) for b in boards] + ["not a code!"]
+
+    verdicts = validate_codes(codes)
+    assert verdicts["code"].tolist() == [True] * 5 + [False]
+    assert verdicts["valid"].tolist() == [True] * 5 + [False]
+
+
+def test_wrong_shape_is_rejected():
+    with pytest.raises(ValueError):
+        BoardValidator().validate(np.zeros((2, 30)), np.zeros((2, 30)))